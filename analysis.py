@@ -0,0 +1,302 @@
+import heapq
+import logging
+import os
+import metrics
+
+# Per-repository detail is logged at DEBUG for every Nth repository only
+REPO_LOG_SAMPLE_EVERY = max(1, int(os.environ.get('LOG_REPO_SAMPLE_EVERY', 100)))
+
+repo_log = logging.getLogger('analyzer.repos')
+
+# Aggregation backend: 'python' (RepoAggregator), 'columnar' (NumPy RepoTable)
+# or 'auto' (columnar when NumPy is installed). Columnar holds an unbounded
+# crawl in about a quarter of the memory until result() but is no faster, so
+# it is opt-in.
+ANALYSIS_BACKEND = os.environ.get('ANALYSIS_BACKEND', 'python').lower()
+
+def get_milestone_info(lines):
+    milestones = [
+        (0, "🐣 Hatchling Coder", "You're just getting started!", "#4a9eff", 
+         "Fun Fact: That's like writing a shopping list!", "hatchling"),
+        (100, "🌱 Code Sprout", "Nice! You've planted the seed!", "#5cb85c",
+         "Fun Fact: That's about 1 SMS message worth of code!", "sprout"),
+        (500, "🔥 Keyboard Warrior", "You're on fire!", "#ff6b6b",
+         "Fun Fact: You've written more code than lines in a children's book!", "warrior"),
+        (1000, "⚡ Code Ninja", "Sneaky fast coding!", "#f39c12",
+         "Fun Fact: That's enough to crash a small website!", "ninja"),
+        (5000, "🎯 Bug Creator Pro", "With great code comes great bugs!", "#9b59b6",
+         "Fun Fact: Statistically, you've introduced 50 bugs by now!", "bug"),
+        (10000, "🏆 Code Veteran", "Impressive! You've seen some things...", "#e74c3c",
+         "Fun Fact: That's about 200 pages of a novel!", "veteran"),
+        (25000, "💎 Diamond Developer", "You're precious!", "#3498db",
+         "Fun Fact: You've typed more than Shakespeare's Hamlet!", "diamond"),
+        (50000, "🌟 Code Wizard", "Magic happens at your fingertips!", "#f1c40f",
+         "Fun Fact: You could print this and use it as a weapon!", "wizard"),
+        (100000, "🚀 Code Astronaut", "You're in orbit now!", "#16a085",
+         "Fun Fact: This is like writing 4 full textbooks!", "astronaut"),
+        (250000, "👑 Code Monarch", "You rule the codebase!", "#8e44ad",
+         "Fun Fact: That's enough code to confuse any code reviewer!", "monarch"),
+        (500000, "🦸 Code Superhero", "Not all heroes wear capes!", "#c0392b",
+         "Fun Fact: You've written more lines than the original Linux kernel!", "superhero"),
+        (1000000, "🌌 Code Legend", "LEGENDARY STATUS ACHIEVED!", "#d35400",
+         "Fun Fact: You've basically written the next operating system!", "legend"),
+    ]
+    
+    for i in range(len(milestones) - 1, -1, -1):
+        if lines >= milestones[i][0]:
+            return {
+                'title': milestones[i][1],
+                'subtitle': milestones[i][2],
+                'color': milestones[i][3],
+                'fact': milestones[i][4],
+                'class': milestones[i][5]
+            }
+    return {
+        'title': milestones[0][1],
+        'subtitle': milestones[0][2],
+        'color': milestones[0][3],
+        'fact': milestones[0][4],
+        'class': milestones[0][5]
+    }
+
+def get_next_milestone(lines):
+    """Calculate progress to next milestone"""
+    milestones = [0, 100, 500, 1000, 5000, 10000, 25000, 50000, 100000, 250000, 500000, 1000000]
+    current_milestone = 0
+    next_milestone = 100
+    
+    if lines >= milestones[-1]:
+        current_milestone = milestones[-1]
+        next_milestone = milestones[-1] * 2  # Double the last milestone
+    else:
+        for i in range(len(milestones) - 1):
+            if milestones[i] <= lines < milestones[i + 1]:
+                current_milestone = milestones[i]
+                next_milestone = milestones[i + 1]
+                break
+    
+    progress = ((lines - current_milestone) / (next_milestone - current_milestone)) * 100 if next_milestone > current_milestone else 100
+    remaining = next_milestone - lines
+    
+    return {
+        'current': current_milestone,
+        'next': next_milestone,
+        'progress': min(100, max(0, progress)),
+        'remaining': max(0, remaining),
+        'percentage': round(progress, 1)
+    }
+
+def get_language_distribution(repos):
+    """Calculate language distribution across all repos"""
+    lang_total = {}
+    
+    for repo in repos:
+        for lang, size in repo.get('languages', {}).items():
+            lang_total[lang] = lang_total.get(lang, 0) + size
+    
+    return language_distribution_from_totals(lang_total)
+
+def language_distribution_from_totals(lang_total, limit=None):
+    """Turn a language -> size map into the sorted distribution list"""
+    total_lines = sum(lang_total.values())
+    
+    # Calculate percentages and sort
+    lang_dist = []
+    for lang, size in sorted(lang_total.items(), key=lambda x: x[1], reverse=True)[:limit]:
+        percentage = (size / total_lines * 100) if total_lines > 0 else 0
+        lang_dist.append({
+            'name': lang,
+            'lines': size,
+            'percentage': round(percentage, 2)
+        })
+    
+    return lang_dist
+
+def get_funny_stats(lines, repos):
+    stats = []
+    coffee = lines // 1000
+    stats.append({'icon': '☕', 'label': 'Coffee cups needed', 'value': f'{coffee:,}'})
+    
+    keyboards = lines // 5000
+    stats.append({'icon': '⌨️', 'label': 'Keyboards destroyed', 'value': f'{keyboards:,}'})
+    
+    so_visits = lines // 500
+    stats.append({'icon': '🔍', 'label': 'Stack Overflow visits', 'value': f'{so_visits:,}+'})
+    
+    bugs = lines // 150
+    stats.append({'icon': '🐛', 'label': 'Bugs created', 'value': f'~{bugs:,}'})
+    
+    hours = lines // 300
+    stats.append({'icon': '⏰', 'label': 'Hours of coding', 'value': f'~{hours:,}h'})
+    
+    # More creative stats
+    commits = lines // 150
+    stats.append({'icon': '💾', 'label': 'Estimated commits', 'value': f'~{commits:,}'})
+    
+    if lines > 0:
+        avg_repo = lines // max(repos, 1)
+        stats.append({'icon': '📦', 'label': 'Avg lines per repo', 'value': f'{avg_repo:,}'})
+    
+    if lines > 50000:
+        stats.append({'icon': '🌌', 'label': 'Code density', 'value': 'Matrix Level'})
+    elif lines > 10000:
+        stats.append({'icon': '⚡', 'label': 'Code density', 'value': 'High'})
+    else:
+        stats.append({'icon': '💫', 'label': 'Code density', 'value': 'Growing'})
+    
+    if lines > 100000:
+        stats.append({'icon': '📚', 'label': 'Equivalent to', 'value': f'{lines // 25000} novels'})
+    elif lines > 10000:
+        stats.append({'icon': '📖', 'label': 'Equivalent to', 'value': f'{lines // 2500} short stories'})
+    else:
+        stats.append({'icon': '📝', 'label': 'Equivalent to', 'value': f'{lines // 50} blog posts'})
+    
+    # Code complexity metrics
+    if lines > 1000000:
+        stats.append({'icon': '👑', 'label': 'Status', 'value': 'Code Deity'})
+    elif lines > 500000:
+        stats.append({'icon': '🚀', 'label': 'Status', 'value': 'Code Legend'})
+    elif lines > 100000:
+        stats.append({'icon': '⭐', 'label': 'Status', 'value': 'Code Master'})
+    elif lines > 50000:
+        stats.append({'icon': '🔥', 'label': 'Status', 'value': 'Code Warrior'})
+    else:
+        stats.append({'icon': '🌱', 'label': 'Status', 'value': 'Code Sprout'})
+    
+    # Add typing speed estimate
+    wpm = 60  # average typing speed
+    chars_per_line = 50  # average
+    typing_hours = (lines * chars_per_line) / (wpm * 5 * 60)  # 5 chars per word
+    stats.append({'icon': '⌨️', 'label': 'Typing time (est)', 'value': f'{int(typing_hours):,}h'})
+    
+    return stats
+
+
+def parse_repo_node(repo):
+    """
+    Convert a repository node from the GraphQL response into a repo dict.
+    
+    Returns None for repositories without any detected code.
+    """
+    # Extract languages from GraphQL response
+    languages_edges = repo.get('languages', {}).get('edges', [])
+    languages = {}
+    repo_lines = 0
+    
+    for lang_edge in languages_edges:
+        lang_name = lang_edge.get('node', {}).get('name', '')
+        lang_size = lang_edge.get('size', 0)
+        if lang_name:
+            languages[lang_name] = lang_size
+            repo_lines += lang_size
+    
+    if repo_lines <= 0:
+        return None
+    
+    return {
+        'name': repo.get('name', 'Unknown'),
+        'lines': repo_lines,
+        'languages': languages,
+        'stars': repo.get('stargazerCount', 0),
+        'url': repo.get('url', '')
+    }
+
+def build_result(username, repos, top_k=None):
+    """
+    Aggregate GraphQL repository nodes into the analysis result dict.
+    
+    repos may be any iterable of nodes (including a generator); it is
+    consumed in a single pass. With top_k set, only the top_k largest
+    repositories are kept in 'repos'; totals still cover every repository.
+    """
+    aggregator = new_aggregator(top_k)
+    aggregator.add_page(repos)
+    return aggregator.result(username)
+
+def new_aggregator(top_k=None):
+    """RepoAggregator or ColumnarAggregator, depending on ANALYSIS_BACKEND"""
+    if ANALYSIS_BACKEND != 'python':
+        try:
+            from repo_table import ColumnarAggregator
+        except ImportError:
+            if ANALYSIS_BACKEND == 'columnar':
+                raise
+        else:
+            return ColumnarAggregator(top_k)
+    return RepoAggregator(top_k)
+
+class RepoAggregator:
+    """
+    Single-pass fold over repository nodes, updated one page at a time.
+    
+    Keeps the running total, the per-language totals and the parsed
+    repositories (bounded to the top_k largest when top_k is set), so raw
+    GraphQL nodes never need to be held beyond the current page.
+    """
+    
+    def __init__(self, top_k=None):
+        self.top_k = top_k
+        self.total_lines = 0
+        self.repo_count = 0
+        self.languages = {}
+        self.scanned = 0
+        # (lines, -seq, repo) entries; a min-heap when top_k is set
+        self._repos = []
+    
+    def add_page(self, nodes):
+        # Checked once per page so the disabled case costs nothing per repo
+        log_repos = repo_log.isEnabledFor(logging.DEBUG)
+        for node in nodes:
+            self.scanned += 1
+            parsed = parse_repo_node(node)
+            if log_repos and self.scanned % REPO_LOG_SAMPLE_EVERY == 0:
+                repo_log.debug("Repository #%d %s: %s lines", self.scanned, node.get('name'), parsed['lines'] if parsed else 0)
+            if parsed is None:
+                continue
+            self.total_lines += parsed['lines']
+            self.repo_count += 1
+            for lang, size in parsed['languages'].items():
+                self.languages[lang] = self.languages.get(lang, 0) + size
+            
+            # -seq makes earlier repositories win ties, like a stable sort
+            entry = (parsed['lines'], -self.scanned, parsed)
+            if self.top_k is None:
+                self._repos.append(entry)
+            elif len(self._repos) < self.top_k:
+                heapq.heappush(self._repos, entry)
+            elif self.top_k > 0 and entry[:2] > self._repos[0][:2]:
+                heapq.heapreplace(self._repos, entry)
+    
+    def top_repos(self):
+        """Kept repositories, largest first"""
+        return [entry[2] for entry in sorted(self._repos, key=lambda entry: entry[:2], reverse=True)]
+    
+    def progress(self, top_languages=5):
+        """Partial result: running total, current milestone and top languages so far"""
+        return {
+            'repos_scanned': self.scanned,
+            'repo_count': self.repo_count,
+            'total_lines': self.total_lines,
+            'milestone': get_milestone_info(self.total_lines),
+            'milestone_progress': get_next_milestone(self.total_lines),
+            'language_distribution': language_distribution_from_totals(self.languages, top_languages)
+        }
+    
+    def result(self, username):
+        """Full analysis result for everything added so far"""
+        metrics.repos_per_analysis.observe(self.scanned)
+        with metrics.aggregation_seconds.time('language_distribution'):
+            language_distribution = language_distribution_from_totals(self.languages)
+        with metrics.aggregation_seconds.time('funny_stats'):
+            funny_stats = get_funny_stats(self.total_lines, self.repo_count)
+        return {
+            'success': True,
+            'username': username,
+            'total_lines': self.total_lines,
+            'repo_count': self.repo_count,
+            'repos': self.top_repos(),
+            'milestone': get_milestone_info(self.total_lines),
+            'milestone_progress': get_next_milestone(self.total_lines),
+            'language_distribution': language_distribution,
+            'funny_stats': funny_stats
+        }
@@ -0,0 +1,316 @@
+from quart import Quart, Response, g, render_template, request, jsonify
+import asyncio
+import logging
+import os
+import time
+import metrics
+from analysis import build_result, new_aggregator
+from cache import ResultCache, cache_key, open_cache
+from github_client import GITHUB_TOKEN, fetch_org_repos, fetch_repos_with_graphql_async, iter_repo_pages_async, token_pool
+from singleflight import AsyncSingleFlight
+from logging_config import configure_logging, new_request_id
+from refresher import WATCHLIST, AsyncRefresher, Watchlist, parse_watchlist
+from results import ResultStore, page_repos, parse_fields, render_result
+from snapshot_store import open_snapshot_store, plan_refresh
+
+configure_logging()
+log = logging.getLogger('analyzer.async')
+
+# Asyncio serving mode for /analyze. Every in-flight analysis is a coroutine
+# waiting on GitHub rather than a blocked worker thread, so one process can
+# hold hundreds of them. Run with: hypercorn async_app:app
+app = Quart(__name__)
+
+# Cache of analysis results, keyed by username. CACHE_URL picks where it
+# lives: memory:// (this process), sqlite:///cache.db (every process on this
+# host) or redis://host:6379/0 (every process on every host). Expired results
+# are served for another RESULT_CACHE_STALE_TTL seconds while they refresh.
+CACHE_URL = os.environ.get('CACHE_URL', 'memory://')
+result_cache = open_cache(
+    CACHE_URL,
+    max_entries=int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', 256)),
+    ttl=int(os.environ.get('RESULT_CACHE_TTL', 600)),
+    max_bytes=int(os.environ.get('RESULT_CACHE_MAX_BYTES', 32 * 1024 * 1024)),
+    stale_ttl=int(os.environ.get('RESULT_CACHE_STALE_TTL', 3600))
+)
+
+# Persistent per-user repository snapshots used for incremental refreshes:
+# a SQLite path (shared by the processes on this host) or a redis:// URL
+SNAPSHOT_DB_PATH = os.environ.get('SNAPSHOT_DB_PATH', 'snapshots.db')
+snapshot_store = open_snapshot_store(SNAPSHOT_DB_PATH) if SNAPSHOT_DB_PATH else None
+
+# Walk every page at least this often so deleted or renamed repos drop out
+SNAPSHOT_FULL_CRAWL_INTERVAL = int(os.environ.get('SNAPSHOT_FULL_CRAWL_INTERVAL', 24 * 3600))
+
+# Keep only the N largest repositories in results (0 keeps all)
+RESULT_TOP_REPOS = int(os.environ.get('RESULT_TOP_REPOS', 100)) or None
+
+metrics.registry.add_collector(metrics.cache_collector(result_cache))
+
+# Result ids, id reuse for unchanged results and pre-encoded response bodies
+result_store = ResultStore(result_cache)
+
+# Deduplicates concurrent analyses of the same username
+analysis_flights = AsyncSingleFlight()
+
+async def cache_io(fn, *args):
+    """
+    Call a result cache or result store method without blocking the loop.
+    
+    The in-process cache answers immediately; the SQLite and Redis backends
+    wait on disk or the network, so they are called from a worker thread.
+    """
+    if isinstance(result_cache, ResultCache):
+        return fn(*args)
+    return await asyncio.to_thread(fn, *args)
+
+def wants_refresh(body):
+    """Check whether the client asked to bypass the result cache"""
+    if body.get('refresh') or request.args.get('refresh', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'no-cache' in request.headers.get('Cache-Control', '').lower()
+
+def wants_org(body):
+    """Check whether the client asked for organization mode"""
+    return bool(body.get('org')) or request.args.get('org', '').lower() in ('1', 'true', 'yes')
+
+def view_options(body=None):
+    """view= and fields= options from the query string or JSON body"""
+    body = body or {}
+    view = request.args.get('view') or body.get('view')
+    fields = parse_fields(request.args.get('fields') or body.get('fields'))
+    return view, fields
+
+def encoded_response(encoded, cache_status):
+    """304 for a matching If-None-Match, otherwise the pre-encoded body for the request's Accept-Encoding"""
+    body, coding, etag = encoded.select(request.headers.get('Accept-Encoding'))
+    headers = {
+        'ETag': etag,
+        'Vary': 'Accept-Encoding',
+        'Cache-Control': 'no-cache',
+        'X-Cache': cache_status
+    }
+    if encoded.matches(request.headers.get('If-None-Match')):
+        return Response(status=304, headers=headers)
+    if coding is not None:
+        headers['Content-Encoding'] = coding
+    return Response(body, content_type='application/json', headers=headers)
+
+@app.before_request
+async def start_request():
+    g.request_started = time.perf_counter()
+    g.request_id = new_request_id(request.headers.get('X-Request-ID'))
+
+@app.after_request
+async def finish_request(response):
+    if request.endpoint in ('analyze', 'analyze_get') and 'request_started' in g:
+        cache_status = response.headers.get('X-Cache') or ('ERROR' if response.status_code >= 400 else 'NONE')
+        # The route pattern, not the path: /analyze/<username> must stay one series
+        metrics.analyze_seconds.observe(time.perf_counter() - g.request_started, request.url_rule.rule, cache_status)
+    if 'request_id' in g:
+        response.headers['X-Request-ID'] = g.request_id
+    return response
+
+@app.route('/')
+async def index():
+    return await render_template('index.html')
+
+@app.route('/metrics')
+async def metrics_endpoint():
+    """Prometheus text exposition of request, GitHub and cache metrics"""
+    # The cache collector reads entry counts from a shared backend's storage
+    return Response(await cache_io(metrics.registry.render), content_type=metrics.CONTENT_TYPE)
+
+async def run_analysis(username, api_token=None, refresh=False):
+    """
+    Async counterpart of main.run_analysis; returns (result, error_msg, status_code).
+    
+    Pages are folded into an aggregator as they arrive. SQLite access and
+    folding a stored snapshot run in a worker thread.
+    """
+    aggregator = new_aggregator(RESULT_TOP_REPOS)
+    key = cache_key(username, api_token)
+    snapshot = await asyncio.to_thread(snapshot_store.load, key) if snapshot_store is not None else None
+    plan = plan_refresh(snapshot, result_cache.ttl, SNAPSHOT_FULL_CRAWL_INTERVAL, refresh) if snapshot_store is not None else 'full'
+    
+    if plan == 'incremental':
+        log.info("Incremental refresh for user '%s' since %s", username, snapshot['high_water'])
+        new_repos, error_msg, status_code = await fetch_repos_with_graphql_async(
+            username, api_token, since=snapshot['high_water']
+        )
+        if new_repos is None:
+            return None, error_msg, status_code
+        await asyncio.to_thread(snapshot_store.upsert, key, new_repos)
+    
+    if plan in ('fresh', 'incremental'):
+        await asyncio.to_thread(aggregator.add_page, snapshot_store.iter_nodes(key))
+    else:
+        writer = snapshot_store.writer(key, full_crawl=True) if snapshot_store is not None else None
+        try:
+            async for repos, error_msg, status_code in iter_repo_pages_async(username, api_token):
+                if repos is None:
+                    if writer is not None:
+                        await asyncio.to_thread(writer.discard)
+                    return None, error_msg, status_code
+                aggregator.add_page(repos)
+                if writer is not None:
+                    await asyncio.to_thread(writer.add, repos)
+        except BaseException:
+            # Errors and cancellation (client gone, shutdown) leave no staged rows behind
+            if writer is not None:
+                await asyncio.to_thread(writer.discard)
+            raise
+        if writer is not None:
+            await asyncio.to_thread(writer.commit)
+    
+    result = aggregator.result(username)
+    log.info(
+        "Analysis complete for user '%s': %d lines in %d repositories", username, result['total_lines'], result['repo_count'],
+        extra={'username': username, 'total_lines': result['total_lines'], 'repo_count': result['repo_count']}
+    )
+    await cache_io(result_store.store, key, result)
+    return result, None, 200
+
+async def run_org_analysis(org, api_token=None, refresh=False):
+    """
+    Async wrapper of main.run_org_analysis.
+    
+    The slices are crawled by github_client's thread pool, so the whole
+    crawl runs in a worker thread rather than on the event loop.
+    """
+    repos, error_msg, status_code = await asyncio.to_thread(fetch_org_repos, org, api_token)
+    if repos is None:
+        return None, error_msg, status_code
+    result = await asyncio.to_thread(build_result, org, repos, RESULT_TOP_REPOS)
+    log.info(
+        "Analysis complete for organization '%s': %d lines in %d repositories", org, result['total_lines'], result['repo_count'],
+        extra={'username': org, 'total_lines': result['total_lines'], 'repo_count': result['repo_count']}
+    )
+    await cache_io(result_store.store, cache_key(org, api_token, org=True), result)
+    return result, None, 200
+
+async def refresh_analysis(username, api_token=None):
+    """Recompute a cached result in the background, joining any in-flight analysis of the same key"""
+    return (await analysis_flights.do(cache_key(username, api_token), run_analysis, username, api_token, True))[0]
+
+# Background refreshes of stale results and of the WATCHLIST users
+refresher = AsyncRefresher(refresh_analysis, token_pool)
+watchlist = Watchlist(parse_watchlist(WATCHLIST), result_cache, refresher)
+
+@app.before_serving
+async def start_watchlist():
+    app.watchlist_task = asyncio.get_running_loop().create_task(watchlist.run())
+
+@app.after_serving
+async def stop_watchlist():
+    app.watchlist_task.cancel()
+    refresher.shutdown()
+
+async def cached_result(username, api_token=None):
+    """(result, 'HIT' or 'STALE') from the result cache, or (None, None); see main.cached_result"""
+    result, stale = await cache_io(result_cache.get_stale, cache_key(username, api_token))
+    if result is None:
+        return None, None
+    if stale:
+        log.info("Serving stale result for user '%s' while it refreshes", username)
+        refresher.submit(username, api_token)
+        return result, 'STALE'
+    return result, 'HIT'
+
+@app.route('/analyze', methods=['POST'])
+async def analyze():
+    try:
+        body = await request.get_json(silent=True) or {}
+        username = (body.get('username') or '').strip()
+        log.info("Analyze request received for: %s", username)
+
+        if not username:
+            return jsonify({'error': 'Please enter a GitHub username'}), 400
+
+        # Get API token from request (optional) or use environment variable
+        api_token = (body.get('api_token') or '').strip() or None
+        if api_token:
+            log.debug("API token provided in request")
+        elif GITHUB_TOKEN:
+            log.debug("Using API token from environment variable")
+
+        # Organizations are crawled as parallel slices and skip stale serving
+        org = wants_org(body)
+        key = cache_key(username, api_token, org)
+        refresh = wants_refresh(body)
+        if not refresh:
+            if org:
+                cached, cache_status = await cache_io(result_cache.get, key), 'HIT'
+            else:
+                cached, cache_status = await cached_result(username, api_token)
+            if cached is not None:
+                response = jsonify(render_result(cached, *view_options(body)))
+                response.headers['X-Cache'] = cache_status
+                return response
+
+        # Concurrent requests for the same key share a single fetch
+        (result, error_msg, status_code), shared = await analysis_flights.do(
+            key, run_org_analysis if org else run_analysis, username, api_token, refresh
+        )
+
+        if result is None:
+            log.warning("Error: %s (Status: %s)", error_msg, status_code)
+            return jsonify({'error': error_msg if error_msg else 'An unexpected error occurred. Please try again later.'}), status_code if status_code else 500
+
+        response = jsonify(render_result(result, *view_options(body)))
+        response.headers['X-Cache'] = 'SHARED' if shared else 'MISS'
+        return response
+
+    except Exception as e:
+        log.exception("Unexpected error: %s: %s", type(e).__name__, e)
+        return jsonify({'error': f'An unexpected error occurred: {str(e)}. Please try again later.'}), 500
+
+@app.route('/analyze/<username>', methods=['GET'])
+async def analyze_get(username):
+    """
+    Cacheable GET form of /analyze for dashboards that poll the same users.
+    
+    Uses the server's tokens only. The response is served from bytes that
+    were serialized and compressed once per result, with a strong ETag;
+    If-None-Match gets a 304. Accepts the same view= and fields= options.
+    """
+    username = username.strip()
+    key = cache_key(username)
+    refresh = wants_refresh({})
+    result, cache_status = (None, None) if refresh else await cached_result(username)
+    if result is None:
+        (result, error_msg, status_code), shared = await analysis_flights.do(key, run_analysis, username, None, refresh)
+        if result is None:
+            return jsonify({'error': error_msg if error_msg else 'An unexpected error occurred. Please try again later.'}), status_code if status_code else 500
+        cache_status = 'SHARED' if shared else 'MISS'
+    return encoded_response(result_store.encode(result, *view_options()), cache_status)
+
+@app.route('/results/<result_id>')
+async def get_result(result_id):
+    """A stored result by id, with the same view= and fields= options as /analyze"""
+    result = await cache_io(result_store.lookup, result_id)
+    if result is None:
+        return jsonify({'error': 'Result not found or expired. Please run the analysis again.'}), 404
+    return jsonify(render_result(result, *view_options()))
+
+@app.route('/results/<result_id>/repos')
+async def get_result_repos(result_id):
+    """Cursor-paginated repositories of a stored result; see main.get_result_repos"""
+    result = await cache_io(result_store.lookup, result_id)
+    if result is None:
+        return jsonify({'error': 'Result not found or expired. Please run the analysis again.'}), 404
+    page, error_msg = page_repos(
+        result,
+        request.args.get('cursor'),
+        request.args.get('limit'),
+        parse_fields(request.args.get('fields'))
+    )
+    if page is None:
+        return jsonify({'error': error_msg}), 400
+    return jsonify(page)
+
+if __name__ == '__main__':
+    print("✨ GitHub Code Analyzer (async) is starting...")
+    print("🌐 Open your browser and go to: http://127.0.0.1:5000")
+    print("🚀 Press Ctrl+C to stop the server")
+    app.run(port=5000)
@@ -0,0 +1,181 @@
+"""
+Microbenchmarks for the aggregation core.
+
+Times the milestone, language distribution and funny stats helpers and the
+full repository-nodes-to-result fold (what analyze_github_user and the
+/analyze endpoints run per user) on synthetic users of 10 to 100k repos.
+
+    python benchmark.py                      # run and compare with the last recorded run
+    python benchmark.py --record             # also append this run to the history
+    python benchmark.py --sizes 10,1000 --only fold
+
+Runs are appended to benchmark_history.jsonl together with the commit they
+were taken at. Record a run on the same machine before and after a change
+to a hot path and include the history diff in the review; timings more
+than --threshold slower than the previous run are reported as regressions.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+# Per-repository DEBUG logging must not skew the numbers
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+from analysis import (
+    RepoAggregator,
+    get_funny_stats,
+    get_language_distribution,
+    get_milestone_info,
+    get_next_milestone,
+    parse_repo_node,
+)
+from fake_github import make_repo
+
+try:
+    from repo_table import ColumnarAggregator
+except ImportError:
+    ColumnarAggregator = None
+
+HISTORY_PATH = 'benchmark_history.jsonl'
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000)
+
+# Number of repositories the UIs display
+UI_TOP_REPOS = 20
+
+# Repositories per GraphQL page; the folds get pages of this size like production
+PAGE_SIZE = 100
+
+
+def measure(fn, min_time=0.2, repeat=5):
+    """Best per-call time of fn over `repeat` rounds of at least min_time each"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeat or number >= 1 << 20:
+            break
+        number *= 2
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def synthetic_nodes(size, languages=5):
+    return [make_repo(f'bench-{size}', i, languages) for i in range(size)]
+
+
+def cases(sizes):
+    """Yield (name, fn) benchmark cases"""
+    line_samples = [0, 99, 750, 12_345, 260_000, 999_999, 5_000_000]
+    yield 'milestone_info', lambda: [get_milestone_info(lines) for lines in line_samples]
+    yield 'next_milestone', lambda: [get_next_milestone(lines) for lines in line_samples]
+    yield 'funny_stats', lambda: [get_funny_stats(lines, 42) for lines in line_samples]
+
+    for size in sizes:
+        nodes = synthetic_nodes(size)
+        repos = [repo for repo in map(parse_repo_node, nodes) if repo is not None]
+        yield f'language_distribution[{size}]', lambda repos=repos: get_language_distribution(repos)
+        yield f'sort_repos[{size}]', lambda repos=repos: sorted(repos, key=lambda r: r['lines'], reverse=True)
+
+        pages = [nodes[start:start + PAGE_SIZE] for start in range(0, len(nodes), PAGE_SIZE)]
+
+        def fold(pages=pages, top_k=None, aggregator_class=RepoAggregator):
+            aggregator = aggregator_class(top_k)
+            for page in pages:
+                aggregator.add_page(page)
+            return aggregator.result('bench')
+        yield f'fold[{size}]', fold
+        yield f'fold_top{UI_TOP_REPOS}[{size}]', lambda fold=fold: fold(top_k=UI_TOP_REPOS)
+
+        if ColumnarAggregator is not None:
+            yield f'fold_columnar[{size}]', lambda fold=fold: fold(aggregator_class=ColumnarAggregator)
+            yield f'fold_columnar_top{UI_TOP_REPOS}[{size}]', \
+                lambda fold=fold: fold(top_k=UI_TOP_REPOS, aggregator_class=ColumnarAggregator)
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_last_run(path):
+    try:
+        with open(path) as f:
+            lines = [line for line in f if line.strip()]
+    except FileNotFoundError:
+        return None
+    return json.loads(lines[-1]) if lines else None
+
+
+def format_time(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f'{seconds / scale:.2f} {unit}'
+    return f'{seconds / 1e-9:.0f} ns'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the aggregation core')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)), help='comma separated repository counts')
+    parser.add_argument('--only', help='run only cases whose name contains this')
+    parser.add_argument('--history', default=HISTORY_PATH)
+    parser.add_argument('--record', action='store_true', help='append this run to the history file')
+    parser.add_argument('--threshold', type=float, default=0.10, help='slowdown reported as a regression')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    previous = load_last_run(args.history)
+    baseline = previous['results'] if previous else {}
+    if previous:
+        print(f"Comparing with run at {previous.get('commit')} ({previous.get('date')})")
+
+    results = {}
+    regressions = []
+    for name, fn in cases(sizes):
+        if args.only and args.only not in name:
+            continue
+        results[name] = measure(fn)
+        line = f'{name:<36} {format_time(results[name]):>12}'
+        if name in baseline:
+            change = results[name] / baseline[name] - 1
+            line += f'  {change:+7.1%}'
+            if change > args.threshold:
+                line += '  REGRESSION'
+                regressions.append(name)
+        print(line)
+
+    if args.record:
+        entry = {
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': current_commit(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'results': results
+        }
+        with open(args.history, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+        print(f'Recorded run in {args.history}')
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,394 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from redis_client import RedisClient
+
+
+def cache_key(username, api_token=None, org=False):
+    """
+    Build the cache key for an analysis.
+
+    GitHub logins are case-insensitive, so the key is the lower-cased username.
+    Requests made with a caller-supplied token may see private repositories, so
+    they get a separate key derived from a hash of the token. Organization
+    analyses are crawled differently and get an 'org:' prefix.
+    """
+    key = ('org:' if org else '') + username.strip().lower()
+    if api_token:
+        key += ':' + hashlib.sha256(api_token.encode('utf-8')).hexdigest()[:16]
+    return key
+
+
+def estimate_size(value):
+    """Approximate memory footprint of a cached result (size of its JSON encoding)"""
+    return len(json.dumps(value, separators=(',', ':'), ensure_ascii=False))
+
+
+class ResultCache:
+    """
+    Thread-safe in-process cache for analysis results.
+
+    Entries expire after `ttl` seconds and the least recently used entries are
+    evicted once either `max_entries` or `max_bytes` is exceeded. Expired
+    entries are kept for another `stale_ttl` seconds so get_stale() can serve
+    them while a fresh value is computed.
+    """
+
+    def __init__(self, max_entries=256, ttl=600, max_bytes=32 * 1024 * 1024, stale_ttl=0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stale_ttl = stale_ttl
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired"""
+        return self._lookup(key, allow_stale=False)[0]
+
+    def get_stale(self, key):
+        """
+        Return (value, stale) for key.
+
+        stale is True for an entry past its TTL but within the stale window;
+        value is None if the key is missing or past both.
+        """
+        return self._lookup(key, allow_stale=True)
+
+    def _lookup(self, key, allow_stale):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, False
+            expires_at, size, value = entry
+            now = time.monotonic()
+            if expires_at <= now:
+                if expires_at + self.stale_ttl <= now:
+                    self._remove(key)
+                    self.misses += 1
+                    return None, False
+                if not allow_stale:
+                    self.misses += 1
+                    return None, False
+                self.stale_hits += 1
+                return value, True
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value, False
+
+    def expires_in(self, key):
+        """Seconds until key's entry expires (negative while stale), or None if it is gone"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            remaining = entry[0] - time.monotonic()
+            return remaining if remaining + self.stale_ttl > 0 else None
+
+    def set(self, key, value, size=None):
+        """Store value under key, evicting old entries to stay within limits"""
+        if size is None:
+            size = estimate_size(value)
+        if self.max_entries <= 0 or self.ttl <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self._total_bytes += size
+            while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def sibling(self, namespace, max_entries=None, ttl=None, stale_ttl=0):
+        """Another cache of the same kind; namespaces keep shared backends' keys apart"""
+        return ResultCache(max_entries or self.max_entries, ttl or self.ttl, self.max_bytes, stale_ttl)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses
+            }
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._total_bytes -= size
+
+
+class SharedCache:
+    """
+    ResultCache semantics for caches that live outside the process.
+
+    Values are stored as JSON together with their wall-clock expiry, so
+    every process and host agrees on what is fresh, and entries are kept
+    until the end of the stale window. Subclasses store the bytes; hit and
+    miss counters are per process.
+    """
+
+    def __init__(self, namespace, max_entries, ttl, max_bytes, stale_ttl):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stale_ttl = stale_ttl
+        self._counter_lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def _count(self, counter):
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired"""
+        return self._lookup(key, allow_stale=False)[0]
+
+    def get_stale(self, key):
+        """(value, stale) for key, like ResultCache.get_stale"""
+        return self._lookup(key, allow_stale=True)
+
+    def _lookup(self, key, allow_stale):
+        entry = self._read(key)
+        now = time.time()
+        if entry is None or entry[0] + self.stale_ttl <= now:
+            self._count('misses')
+            return None, False
+        expires_at, data = entry
+        stale = expires_at <= now
+        if stale and not allow_stale:
+            self._count('misses')
+            return None, False
+        self._count('stale_hits' if stale else 'hits')
+        return json.loads(data), stale
+
+    def expires_in(self, key):
+        """Seconds until key's entry expires (negative while stale), or None if it is gone"""
+        expires_at = self._expiry(key)
+        if expires_at is None:
+            return None
+        remaining = expires_at - time.time()
+        return remaining if remaining + self.stale_ttl > 0 else None
+
+    def set(self, key, value, size=None):
+        """Store value under key; size is ignored, the stored JSON is what counts"""
+        data = json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        if self.max_entries <= 0 or self.ttl <= 0 or len(data) > self.max_bytes:
+            return
+        self._write(key, time.time() + self.ttl, data)
+
+    def invalidate(self, key):
+        self._delete(key)
+
+    def clear(self):
+        self._clear()
+
+    def stats(self):
+        entries, total_bytes = self._usage()
+        with self._counter_lock:
+            return {
+                'entries': entries,
+                'bytes': total_bytes,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses
+            }
+
+
+class SQLiteCache(SharedCache):
+    """
+    Cache in a SQLite file in WAL mode, shared by every process on a host.
+
+    Namespaces share one table. Writes drop entries past their stale window
+    and then evict the entries closest to expiry while the namespace is over
+    max_entries or max_bytes; reads never write, so hits stay cheap under
+    concurrency.
+    """
+
+    def __init__(self, path='cache.db', namespace='results', max_entries=256, ttl=600,
+                 max_bytes=32 * 1024 * 1024, stale_ttl=0, _db=None):
+        super().__init__(namespace, max_entries, ttl, max_bytes, stale_ttl)
+        self.path = path
+        if _db is None:
+            conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            _db = (conn, threading.Lock())
+            with _db[1], conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=NORMAL')
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS cache_entries (
+                        namespace TEXT NOT NULL,
+                        key TEXT NOT NULL,
+                        expires_at REAL NOT NULL,
+                        stale_until REAL NOT NULL,
+                        size INTEGER NOT NULL,
+                        value BLOB NOT NULL,
+                        PRIMARY KEY (namespace, key)
+                    )
+                ''')
+                conn.execute(
+                    'CREATE INDEX IF NOT EXISTS cache_entries_expiry ON cache_entries (namespace, stale_until)'
+                )
+        self._db = _db
+
+    def sibling(self, namespace, max_entries=None, ttl=None, stale_ttl=0):
+        return SQLiteCache(self.path, namespace, max_entries or self.max_entries, ttl or self.ttl,
+                           self.max_bytes, stale_ttl, _db=self._db)
+
+    def _read(self, key):
+        conn, lock = self._db
+        with lock:
+            return conn.execute(
+                'SELECT expires_at, value FROM cache_entries WHERE namespace = ? AND key = ?',
+                (self.namespace, key)
+            ).fetchone()
+
+    def _expiry(self, key):
+        conn, lock = self._db
+        with lock:
+            row = conn.execute(
+                'SELECT expires_at FROM cache_entries WHERE namespace = ? AND key = ?',
+                (self.namespace, key)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _write(self, key, expires_at, data):
+        conn, lock = self._db
+        now = time.time()
+        with lock, conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO cache_entries (namespace, key, expires_at, stale_until, size, value) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (self.namespace, key, expires_at, expires_at + self.stale_ttl, len(data), data)
+            )
+            conn.execute(
+                'DELETE FROM cache_entries WHERE namespace = ? AND stale_until <= ?', (self.namespace, now)
+            )
+            entries, total_bytes = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?',
+                (self.namespace,)
+            ).fetchone()
+            if entries <= self.max_entries and total_bytes <= self.max_bytes:
+                return
+            evicted = []
+            for evict_key, size in conn.execute(
+                'SELECT key, size FROM cache_entries WHERE namespace = ? ORDER BY stale_until',
+                (self.namespace,)
+            ).fetchall():
+                if entries <= self.max_entries and total_bytes <= self.max_bytes:
+                    break
+                evicted.append((self.namespace, evict_key))
+                entries -= 1
+                total_bytes -= size
+            conn.executemany('DELETE FROM cache_entries WHERE namespace = ? AND key = ?', evicted)
+
+    def _delete(self, key):
+        conn, lock = self._db
+        with lock, conn:
+            conn.execute('DELETE FROM cache_entries WHERE namespace = ? AND key = ?', (self.namespace, key))
+
+    def _clear(self):
+        conn, lock = self._db
+        with lock, conn:
+            conn.execute('DELETE FROM cache_entries WHERE namespace = ?', (self.namespace,))
+
+    def _usage(self):
+        conn, lock = self._db
+        with lock:
+            return tuple(conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?',
+                (self.namespace,)
+            ).fetchone())
+
+
+class RedisCache(SharedCache):
+    """
+    Cache in Redis, shared by every process on every host.
+
+    Each entry is one string key holding its expiry and JSON value, with a
+    Redis TTL covering the stale window. Only the per-value max_bytes limit
+    is enforced here; configure maxmemory with an LRU policy on the server
+    to bound the whole cache.
+    """
+
+    def __init__(self, client, namespace='results', max_entries=256, ttl=600,
+                 max_bytes=32 * 1024 * 1024, stale_ttl=0, prefix='analyzer:cache:'):
+        super().__init__(namespace, max_entries, ttl, max_bytes, stale_ttl)
+        self.client = client
+        self.prefix = f'{prefix}{namespace}:'
+
+    def sibling(self, namespace, max_entries=None, ttl=None, stale_ttl=0):
+        return RedisCache(self.client, namespace, max_entries or self.max_entries, ttl or self.ttl,
+                          self.max_bytes, stale_ttl, prefix=self.prefix[:-len(self.namespace) - 1])
+
+    def _read(self, key):
+        data = self.client.execute('GET', self.prefix + key)
+        if data is None:
+            return None
+        expires_at, _, value = data.partition(b'\n')
+        return float(expires_at), value
+
+    def _expiry(self, key):
+        # The expiry header is the first line; no need to transfer the value
+        header = self.client.execute('GETRANGE', self.prefix + key, 0, 31)
+        return float(header.partition(b'\n')[0]) if header else None
+
+    def _write(self, key, expires_at, data):
+        keep_ms = int((expires_at - time.time() + self.stale_ttl) * 1000)
+        if keep_ms > 0:
+            self.client.execute('SET', self.prefix + key, b'%.3f\n' % expires_at + data, 'PX', keep_ms)
+
+    def _delete(self, key):
+        self.client.execute('DEL', self.prefix + key)
+
+    def _clear(self):
+        keys = list(self.client.scan_iter(self.prefix + '*'))
+        for start in range(0, len(keys), 500):
+            self.client.execute('DEL', *keys[start:start + 500])
+
+    def _usage(self):
+        # Counting would mean scanning the keyspace; the server tracks memory itself
+        return None, None
+
+
+def open_cache(url='memory://', namespace='results', max_entries=256, ttl=600,
+               max_bytes=32 * 1024 * 1024, stale_ttl=0):
+    """
+    Cache for a CACHE_URL.
+
+    memory:// keeps results in the process (the default),
+    sqlite:///path/to/cache.db shares them between the processes on a host
+    and redis://host:6379/0 between every process on every host.
+    """
+    limits = dict(max_entries=max_entries, ttl=ttl, max_bytes=max_bytes, stale_ttl=stale_ttl)
+    scheme, _, rest = url.partition('://')
+    if scheme == 'memory':
+        return ResultCache(**limits)
+    if scheme == 'sqlite':
+        return SQLiteCache(rest[1:] if rest.startswith('/') else rest, namespace, **limits)
+    if scheme == 'redis':
+        return RedisCache(RedisClient.from_url(url), namespace, **limits)
+    raise ValueError(f'Unsupported cache URL: {url}')
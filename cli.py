@@ -0,0 +1,137 @@
+"""
+Headless command-line analysis, for cron jobs and scripts.
+
+Analyzes GitHub users (or organizations) with the same GitHub client and
+aggregation code as the web app, without loading Flask, Quart or Flet.
+Usernames come from the arguments, a file or stdin (one per line, '#'
+comments allowed); results are written as JSON Lines in the order they
+complete, one object per username.
+
+    python cli.py octocat torvalds
+    python cli.py -f users.txt --workers 8 -o results.jsonl
+    cat users.txt | python cli.py --summary > results.jsonl
+
+Failures are written as {"success": false, "username": ..., "error": ...,
+"status_code": ...} lines, and make the exit status 1.
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import ExitStack
+
+# Users analyzed at once
+CLI_WORKERS = int(os.environ.get('CLI_WORKERS', 4))
+
+
+def read_usernames(lines):
+    """Yield usernames from lines, skipping blanks and '#' comments"""
+    for line in lines:
+        username = line.split('#', 1)[0].strip()
+        if username:
+            yield username
+
+
+def analyze_user(username, api_token=None, top_k=None):
+    """Fetch and aggregate one user's repositories; returns (result, error_msg, status_code)"""
+    from analysis import new_aggregator
+    from github_client import iter_repo_pages
+
+    aggregator = new_aggregator(top_k)
+    for repos, error_msg, status_code in iter_repo_pages(username, api_token):
+        if repos is None:
+            return None, error_msg, status_code
+        aggregator.add_page(repos)
+    return aggregator.result(username), None, 200
+
+
+def analyze_org(org, api_token=None, top_k=None):
+    """Crawl and aggregate one organization's repositories; returns (result, error_msg, status_code)"""
+    from analysis import build_result
+    from github_client import fetch_org_repos
+
+    repos, error_msg, status_code = fetch_org_repos(org, api_token)
+    if repos is None:
+        return None, error_msg, status_code
+    return build_result(org, repos, top_k), None, 200
+
+
+def run(username, analyze, api_token, top_k, summary):
+    """One output record for username; never raises"""
+    try:
+        result, error_msg, status_code = analyze(username, api_token, top_k)
+    except Exception as e:
+        result, error_msg, status_code = None, f"{type(e).__name__}: {e}", 500
+    if result is None:
+        return {'success': False, 'username': username, 'error': error_msg, 'status_code': status_code}
+    if summary:
+        from results import summarize
+        result = summarize(result)
+    return result
+
+
+def analyze_all(usernames, analyze, output, workers=CLI_WORKERS, api_token=None, top_k=None, summary=False):
+    """
+    Analyze usernames on `workers` threads and write each record to output
+    as it completes.
+
+    At most twice as many users as workers are queued at a time, so a long
+    input is read as it is consumed. Returns the number of failures.
+    """
+    failures = 0
+    window = max(1, workers) * 2
+    usernames = iter(usernames)
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='cli') as executor:
+        pending = set()
+        while True:
+            for username in usernames:
+                pending.add(executor.submit(run, username, analyze, api_token, top_k, summary))
+                if len(pending) >= window:
+                    break
+            if not pending:
+                return failures
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                record = future.result()
+                failures += not record.get('success')
+                output.write(json.dumps(record, ensure_ascii=False) + '\n')
+                output.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Count lines of code of GitHub users, writing JSON Lines')
+    parser.add_argument('usernames', nargs='*', help='users to analyze (default: read from --file or stdin)')
+    parser.add_argument('-f', '--file', help="file with one username per line ('-' for stdin)")
+    parser.add_argument('-o', '--output', help='write JSON Lines here instead of stdout')
+    parser.add_argument('--workers', type=int, default=CLI_WORKERS, help=f'users analyzed at once (default {CLI_WORKERS})')
+    parser.add_argument('--org', action='store_true', help='analyze organizations instead of users')
+    parser.add_argument('--top', type=int, default=0, help='keep only the N largest repositories per result')
+    parser.add_argument('--summary', action='store_true', help='leave out the per-repository list')
+    parser.add_argument('--token', help='GitHub token for every request (default: the GITHUB_TOKEN/GITHUB_TOKENS pool)')
+    args = parser.parse_args(argv)
+
+    with ExitStack() as files:
+        if args.usernames:
+            usernames = iter(args.usernames)
+        elif args.file and args.file != '-':
+            usernames = read_usernames(files.enter_context(open(args.file, encoding='utf-8')))
+        elif args.file == '-' or not sys.stdin.isatty():
+            usernames = read_usernames(sys.stdin)
+        else:
+            parser.error('no usernames given')
+
+        # Imported only now so --help and argument errors stay instant
+        from logging_config import configure_logging
+        configure_logging(stream=sys.stderr)
+
+        output = files.enter_context(open(args.output, 'w', encoding='utf-8')) if args.output else sys.stdout
+        failures = analyze_all(
+            usernames, analyze_org if args.org else analyze_user, output,
+            args.workers, args.token, args.top or None, args.summary
+        )
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,343 @@
+"""
+Offline stand-in for the GitHub GraphQL API, for load tests and local runs.
+
+Answers the repository queries github_client sends (single-user pages,
+aliased batch queries and the organization search slices) with
+deterministic synthetic users and organizations, and can inject latency,
+error responses and rate limit exhaustion.
+
+    python fake_github.py --port 8081 --latency-ms 80 --error-rate 0.01
+    GITHUB_GRAPHQL_URL=http://127.0.0.1:8081/graphql python main.py
+
+A login ending in -r<repos> or -r<repos>-l<languages> (for example
+"load-17-r1200-l8") gets that many repositories and languages; any other
+login gets the --repos/--languages defaults. Logins starting with "ghost"
+do not exist, and tokens starting with "revoked" get a 401. Any other login also works as an organization whose
+repositories were created ever more densely towards the present.
+"""
+import argparse
+import bisect
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LANGUAGES = [
+    'Python', 'JavaScript', 'TypeScript', 'Go', 'Rust', 'Java', 'C', 'C++', 'C#', 'Ruby',
+    'PHP', 'Kotlin', 'Swift', 'Shell', 'HTML', 'CSS', 'Scala', 'Haskell', 'Lua', 'Dart'
+]
+
+LOGIN_SHAPE = re.compile(r'-r(\d+)(?:-l(\d+))?$')
+
+SEARCH_ORG = re.compile(r'\borg:(\S+)')
+SEARCH_CREATED = re.compile(r'\bcreated:(\S+)\.\.(\S+)')
+
+# Newest synthetic repository; older ones are spaced an hour apart
+EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def user_shape(login, default_repos, default_languages):
+    """(repository count, languages per repository) for a login"""
+    match = LOGIN_SHAPE.search(login)
+    if not match:
+        return default_repos, default_languages
+    languages = int(match.group(2)) if match.group(2) else default_languages
+    return int(match.group(1)), max(1, min(languages, len(LANGUAGES)))
+
+
+def make_repo(login, index, languages):
+    """Deterministic repository node for the index-th newest repository of a login"""
+    seed = int(hashlib.md5(f'{login}/{index}'.encode()).hexdigest()[:8], 16)
+    rng = random.Random(seed)
+    names = rng.sample(LANGUAGES, languages)
+    sizes = sorted((rng.randint(1_000, 2_000_000) for _ in names), reverse=True)
+    return {
+        'name': f'repo-{index}',
+        'url': f'https://github.com/{login}/repo-{index}',
+        'stargazerCount': rng.randint(0, 500),
+        'updatedAt': (EPOCH - timedelta(hours=index)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'languages': {
+            'edges': [{'size': size, 'node': {'name': name}} for name, size in zip(names, sizes)]
+        }
+    }
+
+
+def created_at(index):
+    """Creation time of the index-th newest repository of an organization, in whole seconds"""
+    return EPOCH - timedelta(seconds=int(3600 * (index + index * index / 400)))
+
+
+def format_time(moment):
+    return moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def parse_time(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+class FakeGitHub:
+    """Synthetic data, fault injection and per-token rate limits shared by all handler threads"""
+
+    def __init__(self, repos=250, languages=5, latency_ms=0, jitter_ms=0, error_rate=0.0,
+                 error_statuses=(502,), rate_limit=5000, rate_limit_window=3600):
+        self.repos = repos
+        self.languages = languages
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self._lock = threading.Lock()
+        self._budgets = {}
+        self.requests = 0
+
+    def spend(self, token, cost=1):
+        """Charge a token and return (remaining, reset_epoch), or None when exhausted"""
+        now = time.time()
+        with self._lock:
+            self.requests += 1
+            remaining, reset = self._budgets.get(token, (self.rate_limit, now + self.rate_limit_window))
+            if now >= reset:
+                remaining, reset = self.rate_limit, now + self.rate_limit_window
+            if remaining < cost:
+                self._budgets[token] = (0, reset)
+                return None, reset
+            remaining -= cost
+            self._budgets[token] = (remaining, reset)
+            return remaining, reset
+
+    def delay(self):
+        delay_ms = self.latency_ms + (random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+    def injected_error(self):
+        if self.error_rate and random.random() < self.error_rate:
+            return random.choice(self.error_statuses)
+        return None
+
+    def repositories(self, login, first, after, languages):
+        """The repositories connection for one page of a login, or None if the user does not exist"""
+        if login.lower().startswith('ghost'):
+            return None
+        total, per_repo = user_shape(login, self.repos, self.languages)
+        start = int(after) if after else 0
+        end = min(start + first, total)
+        nodes = [make_repo(login, i, per_repo) for i in range(start, end)]
+        for node in nodes:
+            node['languages']['edges'] = node['languages']['edges'][:languages]
+        return {
+            'pageInfo': {'hasNextPage': end < total, 'endCursor': str(end) if nodes else None},
+            'nodes': nodes
+        }
+
+    def organization(self, login):
+        """The organization object of ORG_QUERY, or None if it does not exist"""
+        if login.lower().startswith('ghost'):
+            return None
+        total, _ = user_shape(login, self.repos, self.languages)
+        oldest = created_at(total - 1) if total else EPOCH
+        return {'createdAt': format_time(oldest - timedelta(days=1)), 'repositories': {'totalCount': total}}
+
+    def search(self, query, first=0, after=None, languages=20):
+        """The search connection for an org:/created: repository search, oldest first"""
+        org = SEARCH_ORG.search(query)
+        created = SEARCH_CREATED.search(query)
+        if org is None or org.group(1).lower().startswith('ghost'):
+            return {'repositoryCount': 0, 'pageInfo': {'hasNextPage': False, 'endCursor': None}, 'nodes': []}
+        login = org.group(1)
+        total, per_repo = user_shape(login, self.repos, self.languages)
+        # Creation times fall as the index grows, so the range is a run of indices
+        newest, oldest = 0, total
+        if created:
+            age = lambda index: EPOCH - created_at(index)
+            newest = bisect.bisect_left(range(total), EPOCH - parse_time(created.group(2)), key=age)
+            oldest = bisect.bisect_right(range(total), EPOCH - parse_time(created.group(1)), key=age)
+        matches = range(oldest - 1, newest - 1, -1)
+        start = int(after) if after else 0
+        end = min(start + first, len(matches))
+        nodes = [make_repo(login, index, per_repo) for index in matches[start:end]]
+        for node in nodes:
+            node['languages']['edges'] = node['languages']['edges'][:languages]
+        return {
+            'repositoryCount': len(matches),
+            'pageInfo': {'hasNextPage': end < len(matches), 'endCursor': str(end) if nodes else None},
+            'nodes': nodes
+        }
+
+    def cost(self, variables):
+        """
+        Rate limit points of a query, counted the way GitHub does: one request
+        per connection (each repository page plus the languages connection of
+        every repository on it), divided by 100, at least 1.
+        """
+        first = min(int(variables.get('first') or 100), 100)
+        if 'org' in variables:
+            connections = 1
+        elif 'q' in variables or 'username' in variables:
+            connections = 1 + first
+        elif 'q0' in variables:
+            connections = sum(1 for name in variables if name.startswith('q'))
+        else:
+            connections = sum(1 for name in variables if name.startswith('login')) * (1 + first)
+        return max(1, round(connections / 100))
+
+    def answer(self, variables):
+        """Build the response body for a user, batch, organization or search query"""
+        first = min(int(variables.get('first') or 100), 100)
+        languages = int(variables.get('languages') or 20)
+        data = {}
+        errors = []
+        if 'org' in variables:
+            data['organization'] = self.organization(variables['org'])
+            if data['organization'] is None:
+                errors.append({
+                    'type': 'NOT_FOUND',
+                    'path': ['organization'],
+                    'message': f"Could not resolve to an Organization with the login of '{variables['org']}'."
+                })
+            return data, errors
+        if 'q' in variables:
+            data['search'] = self.search(variables['q'], first, variables.get('cursor'), languages)
+            return data, errors
+        if 'q0' in variables:
+            for i in range(len(variables)):
+                if f'q{i}' not in variables:
+                    break
+                data[f'c{i}'] = {'repositoryCount': self.search(variables[f'q{i}'])['repositoryCount']}
+            return data, errors
+        if 'username' in variables:
+            targets = [('user', variables['username'], variables.get('cursor'))]
+        else:
+            targets = [
+                (f'u{i}', variables[f'login{i}'], variables.get(f'cursor{i}'))
+                for i in range(len(variables))
+                if f'login{i}' in variables
+            ]
+        for alias, login, cursor in targets:
+            connection = self.repositories(login, first, cursor, languages)
+            if connection is None:
+                data[alias] = None
+                errors.append({
+                    'type': 'NOT_FOUND',
+                    'path': [alias],
+                    'message': f"Could not resolve to a User with the login of '{login}'."
+                })
+            else:
+                data[alias] = {'repositories': connection}
+        return data, errors
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, status, payload, headers=None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, str(value))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            try:
+                payload = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                self.send_json(400, {'message': 'Problems parsing JSON'})
+                return
+
+            fake.delay()
+            status = fake.injected_error()
+            if status is not None:
+                self.send_json(status, {'message': f'Injected failure ({status})'},
+                               {'Retry-After': 1} if status == 429 else None)
+                return
+
+            token = self.headers.get('Authorization') or 'anonymous'
+            if token.startswith('Bearer revoked'):
+                self.send_json(401, {'message': 'Bad credentials'})
+                return
+            variables = payload.get('variables') or {}
+            cost = fake.cost(variables)
+            remaining, reset = fake.spend(token, cost)
+            rate_headers = {
+                'x-ratelimit-limit': fake.rate_limit,
+                'x-ratelimit-remaining': remaining or 0,
+                'x-ratelimit-reset': int(reset)
+            }
+            if remaining is None:
+                self.send_json(403, {
+                    'errors': [{'type': 'RATE_LIMITED', 'message': 'API rate limit exceeded'}]
+                }, rate_headers)
+                return
+
+            data, errors = fake.answer(variables)
+            data['rateLimit'] = {
+                'cost': cost,
+                'limit': fake.rate_limit,
+                'remaining': remaining,
+                'resetAt': datetime.fromtimestamp(reset, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+            }
+            body = {'data': data}
+            if errors:
+                body['errors'] = errors
+            self.send_json(200, body, rate_headers)
+
+    return Handler
+
+
+def serve(fake, host='127.0.0.1', port=8081):
+    """Start the stand-in on a background thread and return the server"""
+    server = ThreadingHTTPServer((host, port), make_handler(fake))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline GitHub GraphQL stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--repos', type=int, default=250, help='repositories per user by default')
+    parser.add_argument('--languages', type=int, default=5, help='languages per repository by default')
+    parser.add_argument('--latency-ms', type=float, default=0, help='added to every response')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='uniform +/- jitter on the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests that fail')
+    parser.add_argument('--error-status', default='502', help='comma separated statuses for failures, e.g. 403,429,500,502,503')
+    parser.add_argument('--rate-limit', type=int, default=5000, help='points per token per window')
+    parser.add_argument('--rate-limit-window', type=int, default=3600, help='seconds until a token resets')
+    args = parser.parse_args()
+
+    fake = FakeGitHub(
+        repos=args.repos,
+        languages=args.languages,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_statuses=[int(status) for status in args.error_status.split(',') if status],
+        rate_limit=args.rate_limit,
+        rate_limit_window=args.rate_limit_window
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(fake))
+    server.daemon_threads = True
+    print(f"Fake GitHub GraphQL API on http://{args.host}:{args.port}/graphql")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,333 @@
+"""
+Offline stand-in for a Redis server, for local runs and multi-process tests.
+
+Speaks the Redis protocol and implements the commands the shared cache and
+snapshot backends use: strings with expiry, hashes, sorted sets, key scans,
+RENAME and MULTI/EXEC. Data lives in memory and is lost on exit.
+
+    python fake_redis.py --port 6380
+    CACHE_URL=redis://127.0.0.1:6380/0 SNAPSHOT_DB_PATH=redis://127.0.0.1:6380/0 python main.py
+"""
+import argparse
+import fnmatch
+import socketserver
+import threading
+import time
+
+from redis_client import RedisError, read_reply
+
+
+class Status(str):
+    """A simple-string reply such as OK"""
+
+
+class ZSet(dict):
+    """Sorted set as {member: score}"""
+
+
+OK = Status('OK')
+QUEUED = Status('QUEUED')
+WRONGTYPE = RedisError('WRONGTYPE Operation against a key holding the wrong kind of value')
+
+
+def encode_reply(value):
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, RedisError):
+        return b'-%s\r\n' % str(value).encode('utf-8')
+    if isinstance(value, bool):
+        return b':%d\r\n' % int(value)
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, Status):
+        return b'+%s\r\n' % value.encode('utf-8')
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    if isinstance(value, bytes):
+        return b'$%d\r\n%s\r\n' % (len(value), value)
+    return b'*%d\r\n' % len(value) + b''.join(encode_reply(item) for item in value)
+
+
+class FakeRedis:
+    """Keyspaces, expiry and command implementations shared by all connections"""
+
+    def __init__(self, databases=16):
+        self._lock = threading.RLock()
+        self._dbs = [{} for _ in range(databases)]
+        self._expires = [{} for _ in range(databases)]
+        self.commands = 0
+
+    def _live(self, db, key):
+        expires_at = self._expires[db].get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._dbs[db].pop(key, None)
+            self._expires[db].pop(key, None)
+        return self._dbs[db].get(key)
+
+    def _typed(self, db, key, kind, create=False):
+        value = self._live(db, key)
+        if value is None:
+            if not create:
+                return None
+            value = self._dbs[db][key] = kind()
+        if not isinstance(value, kind):
+            raise WRONGTYPE
+        return value
+
+    def _delete(self, db, key):
+        self._expires[db].pop(key, None)
+        return self._dbs[db].pop(key, None) is not None
+
+    def call(self, db, args):
+        """Run one command against database db and return its reply"""
+        name = args[0].decode().upper()
+        handler = getattr(self, 'cmd_' + name.lower(), None)
+        if handler is None:
+            return RedisError(f"ERR unknown command '{name}'")
+        with self._lock:
+            self.commands += 1
+            try:
+                return handler(db, *args[1:])
+            except RedisError as e:
+                return e
+            except (TypeError, ValueError, IndexError):
+                return RedisError(f"ERR wrong number or type of arguments for '{name.lower()}' command")
+
+    # Connection and keyspace
+
+    def cmd_ping(self, db, message=None):
+        return message if message is not None else Status('PONG')
+
+    def cmd_auth(self, db, *credentials):
+        return OK
+
+    def cmd_dbsize(self, db):
+        return sum(1 for key in list(self._dbs[db]) if self._live(db, key) is not None)
+
+    def cmd_flushdb(self, db):
+        self._dbs[db].clear()
+        self._expires[db].clear()
+        return OK
+
+    def cmd_del(self, db, *keys):
+        return sum(self._delete(db, key) for key in keys)
+
+    def cmd_exists(self, db, *keys):
+        return sum(self._live(db, key) is not None for key in keys)
+
+    def cmd_pexpire(self, db, key, ms):
+        if self._live(db, key) is None:
+            return 0
+        self._expires[db][key] = time.monotonic() + int(ms) / 1000
+        return 1
+
+    def cmd_expire(self, db, key, seconds):
+        return self.cmd_pexpire(db, key, int(seconds) * 1000)
+
+    def cmd_persist(self, db, key):
+        return int(self._live(db, key) is not None and self._expires[db].pop(key, None) is not None)
+
+    def cmd_pttl(self, db, key):
+        if self._live(db, key) is None:
+            return -2
+        expires_at = self._expires[db].get(key)
+        return -1 if expires_at is None else max(0, int((expires_at - time.monotonic()) * 1000))
+
+    def cmd_rename(self, db, source, target):
+        value = self._live(db, source)
+        if value is None:
+            return RedisError('ERR no such key')
+        expires_at = self._expires[db].pop(source, None)
+        del self._dbs[db][source]
+        self._delete(db, target)
+        self._dbs[db][target] = value
+        if expires_at is not None:
+            self._expires[db][target] = expires_at
+        return OK
+
+    def cmd_scan(self, db, cursor, *options):
+        match, count = '*', 10
+        for option, value in zip(options[::2], options[1::2]):
+            if option.upper() == b'MATCH':
+                match = value.decode()
+            elif option.upper() == b'COUNT':
+                count = int(value)
+        keys = sorted(self._dbs[db])
+        start = int(cursor)
+        batch = keys[start:start + count]
+        end = start + len(batch)
+        found = [key for key in batch if self._live(db, key) is not None and fnmatch.fnmatchcase(key.decode(), match)]
+        return [str(end if end < len(keys) else 0), found]
+
+    # Strings
+
+    def cmd_get(self, db, key):
+        return self._typed(db, key, bytes)
+
+    def cmd_getrange(self, db, key, start, end):
+        value = self._typed(db, key, bytes) or b''
+        start, end = int(start), int(end)
+        start = max(start + len(value) if start < 0 else start, 0)
+        end = end + len(value) if end < 0 else end
+        return value[start:end + 1]
+
+    def cmd_mget(self, db, *keys):
+        return [self._typed(db, key, bytes) for key in keys]
+
+    def cmd_set(self, db, key, value, *options):
+        flags = set()
+        ttl_ms = None
+        options = iter(options)
+        for option in options:
+            option = option.upper()
+            if option in (b'EX', b'PX'):
+                ttl_ms = int(next(options)) * (1000 if option == b'EX' else 1)
+            else:
+                flags.add(option)
+        exists = self._live(db, key) is not None
+        if (b'NX' in flags and exists) or (b'XX' in flags and not exists):
+            return None
+        self._delete(db, key)
+        self._dbs[db][key] = value
+        if ttl_ms is not None:
+            self._expires[db][key] = time.monotonic() + ttl_ms / 1000
+        return OK
+
+    # Hashes
+
+    def cmd_hset(self, db, key, *pairs):
+        if not pairs or len(pairs) % 2:
+            raise ValueError
+        fields = self._typed(db, key, dict, create=True)
+        added = 0
+        for field, value in zip(pairs[::2], pairs[1::2]):
+            added += field not in fields
+            fields[field] = value
+        return added
+
+    def cmd_hget(self, db, key, field):
+        return (self._typed(db, key, dict) or {}).get(field)
+
+    def cmd_hmget(self, db, key, *fields):
+        values = self._typed(db, key, dict) or {}
+        return [values.get(field) for field in fields]
+
+    def cmd_hdel(self, db, key, *fields):
+        values = self._typed(db, key, dict) or {}
+        removed = sum(values.pop(field, None) is not None for field in fields)
+        if not values:
+            self._delete(db, key)
+        return removed
+
+    def cmd_hlen(self, db, key):
+        return len(self._typed(db, key, dict) or {})
+
+    def cmd_hgetall(self, db, key):
+        return [item for pair in (self._typed(db, key, dict) or {}).items() for item in pair]
+
+    # Sorted sets
+
+    def cmd_zadd(self, db, key, *pairs):
+        if not pairs or len(pairs) % 2:
+            raise ValueError
+        members = self._typed(db, key, ZSet, create=True)
+        added = 0
+        for score, member in zip(pairs[::2], pairs[1::2]):
+            added += member not in members
+            members[member] = float(score)
+        return added
+
+    def cmd_zrem(self, db, key, *members):
+        values = self._typed(db, key, ZSet) or ZSet()
+        removed = sum(values.pop(member, None) is not None for member in members)
+        if not values:
+            self._delete(db, key)
+        return removed
+
+    def cmd_zcard(self, db, key):
+        return len(self._typed(db, key, ZSet) or ())
+
+    def _zrange(self, db, key, start, stop, reverse):
+        members = self._typed(db, key, ZSet) or ZSet()
+        ordered = sorted(members.items(), key=lambda item: (item[1], item[0]), reverse=reverse)
+        start, stop = int(start), int(stop)
+        length = len(ordered)
+        start = max(start + length if start < 0 else start, 0)
+        stop = stop + length if stop < 0 else stop
+        return [member for member, _ in ordered[start:stop + 1]]
+
+    def cmd_zrange(self, db, key, start, stop):
+        return self._zrange(db, key, start, stop, reverse=False)
+
+    def cmd_zrevrange(self, db, key, start, stop):
+        return self._zrange(db, key, start, stop, reverse=True)
+
+
+def make_handler(fake):
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            db = 0
+            queued = None
+            while True:
+                try:
+                    command = read_reply(self.rfile)
+                except (ConnectionError, OSError, ValueError):
+                    return
+                if not isinstance(command, list) or not command:
+                    return
+                name = command[0].decode().upper()
+                if name == 'SELECT':
+                    db = int(command[1])
+                    reply = OK
+                elif name == 'MULTI':
+                    queued = []
+                    reply = OK
+                elif name == 'EXEC':
+                    if queued is None:
+                        reply = RedisError('ERR EXEC without MULTI')
+                    else:
+                        # Commands of a transaction run without interleaving
+                        with fake._lock:
+                            reply = [fake.call(db, args) for args in queued]
+                        queued = None
+                elif name == 'DISCARD':
+                    queued = None
+                    reply = OK
+                elif queued is not None:
+                    queued.append(command)
+                    reply = QUEUED
+                else:
+                    reply = fake.call(db, command)
+                self.wfile.write(encode_reply(reply))
+
+    return Handler
+
+
+class Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def serve(fake, host='127.0.0.1', port=6380):
+    """Start the stand-in on a background thread and return the server"""
+    server = Server((host, port), make_handler(fake))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline Redis stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6380)
+    args = parser.parse_args()
+
+    server = Server((args.host, args.port), make_handler(FakeRedis()))
+    print(f"Fake Redis on redis://{args.host}:{args.port}/0")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+"""
+Lines authored by given identities, from local git history.
+
+Complements local_count.py: where that counts what a repository contains,
+this sums what particular people wrote, from `git log --numstat`. Commits
+are listed with git rev-list and their numstat is parsed as a stream, a
+batch at a time, so memory stays bounded however long the history is.
+Each commit's per-language additions and deletions are cached by commit id
+in the LOCAL_COUNT_CACHE database, so a rerun only parses commits it has
+not seen before.
+
+    python local_count.py ~/src --author me@example.com --author "My Name"
+"""
+import json
+import logging
+import os
+import sqlite3
+import subprocess
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from analysis import language_distribution_from_totals
+from local_count import LOCAL_COUNT_CACHE, chunks, find_repositories, is_bare_repo, is_checkout, language_for, repo_name
+
+log = logging.getLogger('analyzer.history')
+
+# Commits looked up in the cache and parsed per git log run
+HISTORY_BATCH_SIZE = int(os.environ.get('HISTORY_BATCH_SIZE', 1000))
+
+# Marks the start of each commit's header in git log output
+COMMIT_FORMAT = '--format=%x00%H%x09%aE%x09%aN'
+
+
+class CommitCache:
+    """
+    SQLite cache of each commit's author and per-language numstat.
+
+    Commit ids name immutable content, so entries never go stale and are
+    shared by every repository (and fork) containing the commit.
+    """
+
+    def __init__(self, path=LOCAL_COUNT_CACHE):
+        self.path = path
+        self._lock = threading.Lock()
+        # Worker processes write to the same file; wait for each other's transactions
+        self._conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS commit_numstat (
+                    sha TEXT PRIMARY KEY,
+                    author_email TEXT,
+                    author_name TEXT,
+                    languages TEXT NOT NULL,
+                    parsed_at REAL NOT NULL
+                )
+            ''')
+
+    def get_many(self, shas):
+        """{sha: (email, name, {language: [added, deleted]})} for the cached commits among shas"""
+        found = {}
+        with self._lock:
+            for chunk in chunks(list(shas), 500):
+                rows = self._conn.execute(
+                    'SELECT sha, author_email, author_name, languages FROM commit_numstat '
+                    f'WHERE sha IN ({",".join("?" * len(chunk))})', chunk
+                )
+                for sha, email, name, languages in rows:
+                    found[sha] = (email, name, json.loads(languages))
+        return found
+
+    def put_many(self, commits):
+        """Store {sha: (email, name, languages)} in one transaction"""
+        now = time.time()
+        rows = [(sha, email, name, json.dumps(languages), now) for sha, (email, name, languages) in commits.items()]
+        with self._lock, self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO commit_numstat VALUES (?, ?, ?, ?, ?)', rows)
+
+    def close(self):
+        self._conn.close()
+
+
+def git_command(repo):
+    """git invocation prefix for a checkout or a bare repository"""
+    if is_bare_repo(repo):
+        return ['git', '--git-dir', str(repo)]
+    return ['git', '-C', str(repo)]
+
+
+def numstat_path(path):
+    """The new path of a numstat entry, resolving 'old => new' and 'dir/{old => new}/file' renames"""
+    if ' => ' not in path:
+        return path
+    if '{' in path:
+        prefix, _, rest = path.partition('{')
+        renamed, _, suffix = rest.partition('}')
+        new = renamed.split(' => ', 1)[1]
+        return (prefix + new + suffix).replace('//', '/')
+    return path.split(' => ', 1)[1]
+
+
+def iter_lines(stream):
+    """Decoded lines of a git output stream, without line endings"""
+    for raw in stream:
+        yield raw.decode('utf-8', 'surrogateescape').rstrip('\n')
+
+
+def iter_commit_ids(repo):
+    """Yield the id of every non-merge commit reachable from HEAD, streaming from git rev-list"""
+    process = subprocess.Popen(
+        [*git_command(repo), 'rev-list', '--no-merges', 'HEAD'],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    try:
+        for line in iter_lines(process.stdout):
+            if line:
+                yield line
+    finally:
+        process.stdout.close()
+        process.wait()
+
+
+def parse_numstat(lines):
+    """
+    Yield (sha, email, name, {language: [added, deleted]}) per commit of
+    git log --numstat output in COMMIT_FORMAT.
+
+    Binary files ('-' counts) and files of unknown language are left out.
+    """
+    commit = None
+    for line in lines:
+        if line.startswith('\0'):
+            if commit is not None:
+                yield commit
+            sha, email, name = (line[1:].split('\t', 2) + ['', ''])[:3]
+            commit = (sha, email, name, {})
+            continue
+        if commit is None or not line:
+            continue
+        parts = line.split('\t', 2)
+        if len(parts) != 3 or parts[0] == '-':
+            continue
+        language = language_for(numstat_path(parts[2]))
+        if language:
+            stats = commit[3].setdefault(language, [0, 0])
+            stats[0] += int(parts[0])
+            stats[1] += int(parts[1])
+    if commit is not None:
+        yield commit
+
+
+def iter_numstat(repo, shas):
+    """Parse the numstat of the given commits, streaming one git log run"""
+    if not shas:
+        # With no revisions on stdin git log would walk HEAD instead
+        return
+    process = subprocess.Popen(
+        [*git_command(repo), '-c', 'core.quotepath=off', 'log', '--no-walk=unsorted', '--stdin',
+         '--numstat', COMMIT_FORMAT],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    # git reads every revision from stdin before it writes any output
+    process.stdin.write(''.join(sha + '\n' for sha in shas).encode('ascii'))
+    process.stdin.close()
+    try:
+        yield from parse_numstat(iter_lines(process.stdout))
+    finally:
+        process.stdout.close()
+        process.wait()
+
+
+def authored_in_repo(repo, identities, cache_path=LOCAL_COUNT_CACHE, batch_size=HISTORY_BATCH_SIZE):
+    """
+    Worker task: lines a repository's history credits to identities.
+
+    identities are lower-cased author emails or names. Returns a dict with
+    the matching commit count, lines added and deleted, additions per
+    language, and how many commits had to be parsed.
+    """
+    identities = set(identities)
+    totals = {'commits': 0, 'added': 0, 'deleted': 0, 'languages': {}, 'parsed': 0}
+    cache = CommitCache(cache_path) if cache_path else None
+
+    def add(email, name, languages):
+        if email.lower() not in identities and name.lower() not in identities:
+            return
+        totals['commits'] += 1
+        for language, (added, deleted) in languages.items():
+            totals['added'] += added
+            totals['deleted'] += deleted
+            totals['languages'][language] = totals['languages'].get(language, 0) + added
+
+    try:
+        for batch in chunks_of(iter_commit_ids(repo), batch_size):
+            known = cache.get_many(batch) if cache is not None else {}
+            for email, name, languages in known.values():
+                add(email, name, languages)
+            parsed = {}
+            for sha, email, name, languages in iter_numstat(repo, [sha for sha in batch if sha not in known]):
+                parsed[sha] = (email, name, languages)
+                add(email, name, languages)
+            if parsed and cache is not None:
+                cache.put_many(parsed)
+            totals['parsed'] += len(parsed)
+    finally:
+        if cache is not None:
+            cache.close()
+    return totals
+
+
+def chunks_of(iterable, size):
+    """Lists of up to size items from any iterable, consumed lazily"""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def authored_summary(root, authors, workers=None, cache_path=LOCAL_COUNT_CACHE):
+    """
+    Lines authored by any of authors (emails or names, case-insensitive)
+    across the git repositories under root, one repository per worker.
+
+    Returns the 'authored' section of a local result, with per-repository
+    additions under 'repos'.
+    """
+    identities = sorted({author.strip().lower() for author in authors if author.strip()})
+    repos = [repo for repo in find_repositories(root) if is_checkout(repo) or is_bare_repo(repo)]
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [(repo, pool.submit(authored_in_repo, repo, identities, cache_path)) for repo in repos]
+        per_repo = [(repo, future.result()) for repo, future in futures]
+
+    languages = {}
+    for _, totals in per_repo:
+        for language, added in totals['languages'].items():
+            languages[language] = languages.get(language, 0) + added
+    log.info(
+        "Scanned the history of %s repositories in %.2fs, parsing %s new commits",
+        len(repos), time.perf_counter() - started, sum(totals['parsed'] for _, totals in per_repo)
+    )
+    return {
+        'authors': identities,
+        'commits': sum(totals['commits'] for _, totals in per_repo),
+        'lines_added': sum(totals['added'] for _, totals in per_repo),
+        'lines_deleted': sum(totals['deleted'] for _, totals in per_repo),
+        'language_distribution': language_distribution_from_totals(languages),
+        'repos': {repo_name(repo): totals['added'] for repo, totals in per_repo if totals['commits']}
+    }
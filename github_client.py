@@ -0,0 +1,894 @@
+import contextvars
+import math
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import logging
+import metrics
+from token_pool import TokenPool, parse_reset_at, token_label
+
+# GitHub GraphQL API endpoint
+GITHUB_GRAPHQL_URL = os.environ.get("GITHUB_GRAPHQL_URL", "https://api.github.com/graphql")
+
+# Get GitHub API key from environment variable
+GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN', None)
+
+# Server-side tokens (GITHUB_TOKENS plus GITHUB_TOKEN), used whenever a
+# request does not bring its own token
+token_pool = TokenPool.from_env()
+metrics.registry.add_collector(metrics.token_pool_collector(token_pool))
+
+log = logging.getLogger('analyzer.github')
+
+# Connection pool and timeouts for requests to GitHub
+GITHUB_CONNECT_TIMEOUT = float(os.environ.get('GITHUB_CONNECT_TIMEOUT', 5))
+GITHUB_READ_TIMEOUT = float(os.environ.get('GITHUB_READ_TIMEOUT', 30))
+GITHUB_POOL_SIZE = int(os.environ.get('GITHUB_POOL_SIZE', 32))
+GITHUB_ASYNC_POOL_SIZE = int(os.environ.get('GITHUB_ASYNC_POOL_SIZE', 100))
+
+# Number of users packed into one aliased batch query
+GITHUB_BATCH_SIZE = int(os.environ.get('GITHUB_BATCH_SIZE', 10))
+
+# Organization mode: repositories per created-date slice (GitHub search returns
+# at most 1000 per query), slices crawled at once and slices counted per request
+ORG_SLICE_REPOS = min(int(os.environ.get('GITHUB_ORG_SLICE_REPOS', 200)), 1000)
+ORG_CRAWL_WORKERS = int(os.environ.get('GITHUB_ORG_CRAWL_WORKERS', 8))
+ORG_COUNT_BATCH = int(os.environ.get('GITHUB_ORG_COUNT_BATCH', 20))
+
+# Languages fetched per repository. Every page shape asks for all of them:
+# dropping languages would under-count results that then get cached.
+LANGUAGES_PER_REPO = 20
+
+# Repositories per page, from largest to smallest. Smaller pages are used as a
+# token's rate limit budget runs low, but only for queries whose page costs
+# more than GitHub's 1 point minimum; otherwise they just cost more requests.
+PAGE_SHAPES = {
+    'full': 100,
+    'reduced': 50,
+    'minimal': 25,
+}
+
+# Budget fractions (remaining / limit) below which the smaller shapes kick in
+BUDGET_REDUCED_BELOW = float(os.environ.get('GITHUB_BUDGET_REDUCED_BELOW', 0.2))
+BUDGET_MINIMAL_BELOW = float(os.environ.get('GITHUB_BUDGET_MINIMAL_BELOW', 0.05))
+
+# Fields of every repository node, languages largest first
+REPOSITORY_FIELDS = """
+        name
+        url
+        stargazerCount
+        updatedAt
+        languages(first: $languages, orderBy: {field: SIZE, direction: DESC}) {
+          edges {
+            size
+            node {
+              name
+            }
+          }
+        }
+"""
+
+# Repository selection for one user; CURSOR is replaced by the cursor variable
+REPOSITORIES_SELECTION = """
+    repositories(
+      first: $first
+      after: CURSOR
+      ownerAffiliations: OWNER
+      isFork: false
+      orderBy: {field: UPDATED_AT, direction: DESC}
+    ) {
+      pageInfo {
+        hasNextPage
+        endCursor
+      }
+      nodes {""" + REPOSITORY_FIELDS + """      }
+    }
+"""
+
+RATE_LIMIT_SELECTION = """
+  rateLimit {
+    cost
+    limit
+    remaining
+    resetAt
+  }
+"""
+
+# GraphQL query to fetch repos with languages
+REPOS_QUERY = (
+    "query($username: String!, $cursor: String, $first: Int!, $languages: Int!) {\n"
+    "  user(login: $username) {"
+    + REPOSITORIES_SELECTION.replace('CURSOR', '$cursor')
+    + "  }"
+    + RATE_LIMIT_SELECTION
+    + "}\n"
+)
+
+# Organization creation date and size, the starting point for slicing
+ORG_QUERY = """
+query($org: String!) {
+  organization(login: $org) {
+    createdAt
+    repositories(isFork: false) {
+      totalCount
+    }
+  }
+""" + RATE_LIMIT_SELECTION + "}\n"
+
+# One page of one created-date slice of an organization's repositories
+ORG_SLICE_QUERY = """
+query($q: String!, $cursor: String, $first: Int!, $languages: Int!) {
+  search(query: $q, type: REPOSITORY, first: $first, after: $cursor) {
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+    nodes {
+      ... on Repository {""" + REPOSITORY_FIELDS + """      }
+    }
+  }
+""" + RATE_LIMIT_SELECTION + "}\n"
+
+@lru_cache(maxsize=32)
+def build_batch_query(count):
+    """
+    Build a query fetching one page for each of `count` users.
+
+    User i is selected under the alias u<i> with its own $login<i> and
+    $cursor<i> variables, so every alias paginates independently. The page
+    shape ($first, $languages) is shared by all aliases.
+    """
+    params = ', '.join(f"$login{i}: String!, $cursor{i}: String" for i in range(count))
+    params += ", $first: Int!, $languages: Int!"
+    selections = ''.join(
+        f"  u{i}: user(login: $login{i}) {{" + REPOSITORIES_SELECTION.replace('CURSOR', f'$cursor{i}') + "  }\n"
+        for i in range(count)
+    )
+    return f"query({params}) {{\n" + selections + RATE_LIMIT_SELECTION + "}\n"
+
+@lru_cache(maxsize=8)
+def build_slice_count_query(count):
+    """Query counting the repositories of `count` search strings $q0.. under aliases c0.."""
+    params = ', '.join(f"$q{i}: String!" for i in range(count))
+    selections = ''.join(
+        f"  c{i}: search(query: $q{i}, type: REPOSITORY, first: 0) {{ repositoryCount }}\n"
+        for i in range(count)
+    )
+    return f"query({params}) {{\n" + selections + RATE_LIMIT_SELECTION + "}\n"
+
+def query_cost(first, aliases=1):
+    """
+    Rate limit points GitHub charges for a page of `first` repositories under
+    each of `aliases` aliases.
+
+    GitHub counts one request per connection: the repository connection plus
+    the languages connection of each of its repositories, divided by 100 and
+    rounded, with a minimum of 1 point per query.
+    """
+    return max(1, round(aliases * (1 + first) / 100))
+
+def choose_page_shape(remaining=None, limit=None, aliases=1):
+    """
+    Pick a query shape name for the given rate limit budget.
+
+    An unknown budget is treated as healthy, and so is any query whose full
+    page already costs the minimum point.
+    """
+    if remaining is None or not limit or query_cost(PAGE_SHAPES['full'], aliases) <= 1:
+        return 'full'
+    budget = remaining / limit
+    if budget < BUDGET_MINIMAL_BELOW:
+        return 'minimal'
+    if budget < BUDGET_REDUCED_BELOW:
+        return 'reduced'
+    return 'full'
+
+class QueryBudget:
+    """
+    Rate limit accounting for the requests of one analysis.
+
+    Chooses each request's page shape from the budget of the token that will
+    serve it (the pool's best token, or the last rateLimit reported for a
+    caller-supplied token) and sums the points GitHub charged.
+    """
+
+    def __init__(self, label, token=None, since=None):
+        self.label = label
+        self.token = token
+        self.requests = 0
+        self.points = 0
+        self.remaining = None
+        self.limit = None
+        # Incremental refreshes usually touch a handful of repos, so start small
+        self.incremental = bool(since)
+
+    def next_variables(self, aliases=1):
+        """Choose the shape for the next request of `aliases` aliased connections and return its query variables"""
+        if self.token is None and len(token_pool):
+            remaining, limit = token_pool.headroom()
+        else:
+            remaining, limit = self.remaining, self.limit
+        shape = choose_page_shape(remaining, limit, aliases)
+        first = PAGE_SHAPES[shape]
+        if self.incremental and self.requests == 0:
+            first = min(first, PAGE_SHAPES['minimal'])
+        self.requests += 1
+        budget = f"{remaining}/{limit}" if remaining is not None else "unknown"
+        log.debug("%s request %s: shape=%s (first=%s, cost=%s), budget=%s", self.label, self.requests, shape, first, query_cost(first, aliases), budget)
+        return {"first": first, "languages": LANGUAGES_PER_REPO}
+
+    def record(self, data):
+        """Account for the rateLimit block of a successful response"""
+        rate_limit = (data or {}).get('rateLimit') or {}
+        cost = rate_limit.get('cost')
+        if cost is not None:
+            self.points += cost
+        if rate_limit.get('remaining') is not None:
+            self.remaining = rate_limit['remaining']
+        if rate_limit.get('limit') is not None:
+            self.limit = rate_limit['limit']
+
+    def log_summary(self):
+        log.info("%s: %s requests, %s rate limit points", self.label, self.requests, self.points)
+
+_session = None
+_session_lock = threading.Lock()
+
+# httpx.AsyncClient instances are bound to the event loop that created them
+_async_clients = weakref.WeakKeyDictionary()
+
+def get_session():
+    """Return the process-wide keep-alive session used for all GitHub requests"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=GITHUB_POOL_SIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+@lru_cache(maxsize=64)
+def build_headers(token):
+    """Request headers for a token (or None for unauthenticated requests)"""
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return headers
+
+def _pool_exhausted():
+    """Error tuple for when every pooled token is parked"""
+    if token_pool.all_rejected():
+        log.warning("Error: GitHub rejected every pooled token (401)")
+        return None, "GitHub API authentication failed. Please check the server's GitHub tokens.", 401
+    reset = token_pool.next_reset()
+    reset_msg = f" Resets at: {datetime.fromtimestamp(reset, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}" if reset else ""
+    log.warning("Error: every pooled GitHub token is rate limited")
+    return None, f"GitHub API rate limit reached. Please try again later.{reset_msg}", 403
+
+def _record_rate_limit(token, response, result):
+    """
+    Update the token pool from a response.
+
+    Returns True when the token turned out to be rate limited or rejected,
+    in which case it has been parked and the request should be retried with
+    another token.
+    """
+    headers = response.headers
+    remaining = headers.get('x-ratelimit-remaining')
+    reset = headers.get('x-ratelimit-reset')
+    if remaining is not None:
+        token_pool.update(token, remaining, reset, limit=headers.get('x-ratelimit-limit'))
+
+    data, _, status_code = result
+    if data is not None and data.get('rateLimit'):
+        rate_limit = data['rateLimit']
+        token_pool.update(token, rate_limit.get('remaining'), rate_limit.get('resetAt'),
+                          limit=rate_limit.get('limit'), cost=rate_limit.get('cost'))
+
+    if status_code in (403, 429):
+        retry_after = headers.get('retry-after')
+        until = None
+        if retry_after is not None:
+            until = time.time() + float(retry_after)
+        elif remaining == '0':
+            until = parse_reset_at(reset)
+        token_pool.park(token, until)
+        log.warning("Token %s rate limited (%s), parked", token_label(token), status_code)
+        return True
+    if status_code == 401:
+        # Revoked or expired: keep it out of rotation instead of failing every request routed to it
+        token_pool.reject(token)
+        log.warning("Token %s rejected (401), parked", token_label(token))
+        return True
+    return False
+
+def execute_graphql(query, variables, token=None, partial=False):
+    """
+    POST a GraphQL query to GitHub over the shared session.
+
+    Returns a (data, error_msg, status_code) tuple where data is the 'data'
+    object of the response, or None on any HTTP, GraphQL or rate limit error.
+    With partial=True, errors scoped to a single field (for example one
+    alias of a batch query) are tolerated and that field is left null.
+
+    Without an explicit token the request goes to the pooled token with the
+    most headroom; a rate-limited token is parked and the request retried
+    on the next one.
+    """
+    pooled = token is None and len(token_pool) > 0
+    result = None
+
+    for _ in range(len(token_pool) if pooled else 1):
+        if pooled:
+            token = token_pool.acquire()
+            if token is None:
+                return _pool_exhausted()
+
+        start = time.perf_counter()
+        try:
+            response = get_session().post(
+                GITHUB_GRAPHQL_URL,
+                json={"query": query, "variables": variables},
+                headers=build_headers(token),
+                timeout=(GITHUB_CONNECT_TIMEOUT, GITHUB_READ_TIMEOUT)
+            )
+        except requests.exceptions.Timeout as e:
+            log.warning("GraphQL request timed out: %s", e)
+            metrics.github_responses.inc('timeout')
+            return None, "GitHub API request timed out. Please try again later.", 504
+        except requests.exceptions.RequestException as e:
+            log.warning("Network error in GraphQL request: %s", e)
+            metrics.github_responses.inc('network_error')
+            return None, f"Network error: {str(e)}", 500
+        finally:
+            metrics.github_request_seconds.observe(time.perf_counter() - start)
+
+        result = handle_graphql_response(response, partial)
+        if not pooled or not _record_rate_limit(token, response, result):
+            return result
+
+    return result
+
+def handle_graphql_response(response, partial=False):
+    """
+    Interpret a GraphQL HTTP response from either requests or httpx.
+
+    Returns the same (data, error_msg, status_code) tuple as execute_graphql.
+    """
+    log.debug("GraphQL response status: %s", response.status_code)
+    metrics.github_responses.inc(str(response.status_code))
+
+    # Handle HTTP status code errors first
+    if response.status_code == 401:
+        log.warning("Error: GitHub API authentication failed (401)")
+        return None, "GitHub API authentication failed. Please check your API token if using one.", 401
+    elif response.status_code == 403:
+        log.warning("Error: GitHub API rate limit reached (403)")
+        return None, "GitHub API rate limit reached. Please try again later. The limit resets hourly.", 403
+    elif response.status_code == 429:
+        log.warning("Error: GitHub API rate limit exceeded (429)")
+        return None, "Too many requests. GitHub API rate limit exceeded. Please wait a few minutes and try again.", 429
+    elif response.status_code == 500:
+        log.warning("Error: GitHub API server error (500)")
+        return None, "GitHub API server error. Please try again later.", 500
+    elif response.status_code == 503:
+        log.warning("Error: GitHub API service unavailable (503)")
+        return None, "GitHub API service is temporarily unavailable. Please try again later.", 503
+    elif response.status_code != 200:
+        error_msg = f"GraphQL request failed with status {response.status_code}"
+        log.warning("Error: %s", error_msg)
+        # Try to get error message from response
+        try:
+            error_data = response.json()
+            if 'message' in error_data:
+                error_msg = error_data['message']
+        except:
+            pass
+        return None, f"GitHub API error ({response.status_code}): {error_msg}", response.status_code
+
+    # Parse JSON response
+    try:
+        data = response.json()
+    except ValueError as e:
+        log.warning("Error: Failed to parse JSON response: %s", e)
+        return None, "Invalid response from GitHub API. Please try again.", 500
+
+    # Field-scoped errors in a batch only null out the affected alias
+    if (partial and data.get('errors') and data.get('data')
+            and all(err.get('path') for err in data['errors'])):
+        for err in data['errors']:
+            log.warning("GraphQL error for %s: %s", err['path'][0], err.get('message', 'Unknown error'))
+        data = {'data': data['data']}
+
+    # Check for GraphQL errors in response body (GraphQL returns 200 even with errors)
+    if 'errors' in data:
+        error_messages = [err.get('message', 'Unknown error') for err in data['errors']]
+        error_msg = '; '.join(error_messages)
+        error_type = data['errors'][0].get('type', '') if data['errors'] else ''
+        log.warning("GraphQL errors: %s (Type: %s)", error_msg, error_type)
+
+        # Check if user not found
+        if any('Could not resolve to a User' in msg or 'NOT_FOUND' in msg or 'User' in error_type for msg in error_messages):
+            return None, "User not found! Please check the username and try again.", 404
+
+        # Check for rate limit in GraphQL errors
+        if any('rate limit' in msg.lower() or 'RATE_LIMITED' in error_type for msg in error_messages):
+            return None, "GitHub API rate limit reached. Please try again later. The limit resets hourly.", 403
+
+        return None, f"GitHub API error: {error_msg}", 500
+
+    if 'data' not in data or data['data'] is None:
+        return None, "Invalid response structure from GitHub API", 500
+
+    # The page is valid even if it used up the last point; the token pool
+    # parks the token from this rateLimit block before its next request
+    if 'rateLimit' in data['data']:
+        rate_limit = data['data']['rateLimit'] or {}
+        log.debug("Rate limit remaining: %s", rate_limit.get('remaining'))
+
+    return data['data'], None, 200
+
+def read_repos_page(data, since=None):
+    """
+    Pull one page of repository nodes out of a REPOS_QUERY response.
+
+    Returns (repos, next_cursor, error_msg, status_code). next_cursor is None
+    on the last page, or once a repository older than `since` is reached.
+    """
+    # Extract repositories
+    if 'user' not in data:
+        return None, None, "Invalid response structure from GitHub API", 500
+
+    user_data = data['user']
+
+    if user_data is None:
+        return None, None, "User not found! Please check the username and try again.", 404
+
+    repos_data = user_data.get('repositories', {})
+    repos = repos_data.get('nodes', [])
+    page_info = repos_data.get('pageInfo', {})
+
+    log.debug("Fetched %s repositories in this page", len(repos))
+
+    next_cursor = page_info.get('endCursor') if page_info.get('hasNextPage', False) else None
+
+    if since:
+        newer = [repo for repo in repos if (repo.get('updatedAt') or '') >= since]
+        if len(newer) < len(repos):
+            log.info("Reached snapshot high-water mark (%s), stopping pagination", since)
+            next_cursor = None
+        repos = newer
+
+    if next_cursor:
+        log.debug("More pages available, continuing...")
+
+    return repos, next_cursor, None, 200
+
+def _log_token_usage(username, token):
+    if token:
+        log.info("Using GraphQL API with authentication for user: %s", username)
+    elif len(token_pool):
+        log.info("Using GraphQL API with a pool of %s tokens for user: %s", len(token_pool), username)
+    else:
+        log.info("Using GraphQL API (unauthenticated) for user: %s", username)
+        log.debug("Note: Using API key increases rate limit from 60 to 5000 requests/hour")
+
+def iter_repo_pages(username, api_token=None, since=None):
+    """
+    Yield a user's repositories one GraphQL page at a time.
+
+    Each item is a (repos, error_msg, status_code) tuple. A failing page
+    yields (None, error_msg, status_code) and ends the iteration.
+    Arguments are the same as for fetch_repos_with_graphql.
+    """
+    # Use provided token or fall back to the server's token pool
+    token = api_token
+    _log_token_usage(username, token)
+
+    cursor = None
+    page_count = 0
+    budget = QueryBudget(f"Repositories of {username}", token, since)
+
+    while True:
+        page_count += 1
+        log.debug("Fetching page %s of repositories...", page_count)
+
+        try:
+            data, error_msg, status_code = execute_graphql(
+                REPOS_QUERY,
+                dict(budget.next_variables(), username=username, cursor=cursor),
+                token
+            )
+            if data is None:
+                yield None, error_msg, status_code
+                return
+            budget.record(data)
+
+            repos, cursor, error_msg, status_code = read_repos_page(data, since)
+            if repos is None:
+                yield None, error_msg, status_code
+                return
+
+        except Exception as e:
+            log.exception("Error processing GraphQL response: %s", e)
+            yield None, f"Error processing response: {str(e)}", 500
+            return
+
+        yield repos, None, 200
+
+        if not cursor:
+            budget.log_summary()
+            metrics.pages_per_crawl.observe(page_count)
+            return
+
+def fetch_repos_with_graphql(username, api_token=None, since=None):
+    """
+    Fetch user repositories and their languages using GitHub GraphQL API.
+    This is much more efficient than REST API as it requires only 1-2 requests.
+
+    Args:
+        username: GitHub username to analyze
+        api_token: Optional GitHub API token for authenticated requests (increases rate limit)
+        since: Optional updatedAt high-water mark. Repositories are ordered by
+            UPDATED_AT DESC, so pagination stops at the first page containing an
+            older repository and only repositories updated at or after it are returned.
+    """
+    all_repos = []
+
+    for repos, error_msg, status_code in iter_repo_pages(username, api_token, since):
+        if repos is None:
+            return None, error_msg, status_code
+        all_repos.extend(repos)
+
+    log.info("Total repositories fetched: %s", len(all_repos))
+    return all_repos, None, 200
+
+def fetch_repos_batch(usernames, api_token=None, since=None, batch_size=None):
+    """
+    Fetch repositories for many users with aliased batch queries.
+
+    Up to batch_size users share each GraphQL request; each alias keeps its
+    own cursor and a slot is refilled with the next pending user as soon as
+    its user finishes, so every round trip stays full.
+
+    Args:
+        usernames: GitHub usernames to fetch
+        api_token: Optional GitHub API token (falls back to the token pool)
+        since: Optional dict of username -> updatedAt high-water mark
+        batch_size: Users per request (defaults to GITHUB_BATCH_SIZE)
+
+    Returns a dict of username -> (repos, error_msg, status_code).
+    """
+    token = api_token
+    batch_size = max(1, batch_size or GITHUB_BATCH_SIZE)
+    since = since or {}
+
+    pending = list(dict.fromkeys(usernames))
+    pending.reverse()
+    active = []
+    results = {}
+    request_count = 0
+    budget = QueryBudget("Batch", token)
+
+    while pending or active:
+        while pending and len(active) < batch_size:
+            active.append({'username': pending.pop(), 'cursor': None, 'repos': []})
+
+        variables = budget.next_variables(len(active))
+        for i, state in enumerate(active):
+            variables[f'login{i}'] = state['username']
+            variables[f'cursor{i}'] = state['cursor']
+
+        request_count += 1
+        log.debug("Batch request %s: %s users", request_count, len(active))
+
+        try:
+            data, error_msg, status_code = execute_graphql(build_batch_query(len(active)), variables, token, partial=True)
+            budget.record(data)
+        except Exception as e:
+            log.warning("Error processing GraphQL response: %s", e)
+            data, error_msg, status_code = None, f"Error processing response: {str(e)}", 500
+
+        if data is None:
+            # Request-level failures (rate limit, auth, network) apply to every user left
+            for state in active:
+                results[state['username']] = (None, error_msg, status_code)
+            for username in pending:
+                results[username] = (None, error_msg, status_code)
+            break
+
+        still_active = []
+        for i, state in enumerate(active):
+            username = state['username']
+            repos, cursor, error_msg, status_code = read_repos_page({'user': data.get(f'u{i}')}, since.get(username))
+            if repos is None:
+                results[username] = (None, error_msg, status_code)
+                continue
+            state['repos'].extend(repos)
+            if cursor:
+                state['cursor'] = cursor
+                still_active.append(state)
+            else:
+                results[username] = (state['repos'], None, 200)
+        active = still_active
+
+    log.info("Batch fetched %s users in %s requests", len(results), request_count)
+    budget.log_summary()
+    return results
+
+def format_timestamp(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def org_slice_query(org, start, end):
+    """Search string for an organization's non-fork repositories created in [start, end) (epoch seconds)"""
+    return f"org:{org} fork:false created:{format_timestamp(start)}..{format_timestamp(end - 1)} sort:created-asc"
+
+def split_range(start, end, parts):
+    """Split [start, end) into at most `parts` contiguous whole-second ranges"""
+    parts = max(1, min(parts, end - start))
+    bounds = [start + (end - start) * i // parts for i in range(parts + 1)]
+    return list(zip(bounds, bounds[1:]))
+
+def count_org_slices(org, ranges, token=None):
+    """Repository counts of (start, end) ranges with one aliased query; returns (counts, error_msg, status_code)"""
+    variables = {f'q{i}': org_slice_query(org, start, end) for i, (start, end) in enumerate(ranges)}
+    data, error_msg, status_code = execute_graphql(build_slice_count_query(len(ranges)), variables, token)
+    if data is None:
+        return None, error_msg, status_code
+    return [(data.get(f'c{i}') or {}).get('repositoryCount', 0) for i in range(len(ranges))], None, 200
+
+def _in_context(executor, fn, *args):
+    """Submit fn to executor in a copy of the current context, so its logs keep the request id"""
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+def plan_org_slices(org, token=None, slice_repos=ORG_SLICE_REPOS, executor=None):
+    """
+    Partition an organization's repositories into disjoint created-date slices.
+
+    The organization's lifetime is first split evenly by its repository
+    count; slices that still hold more than slice_repos repositories are
+    split again until every slice fits. Each round counts ORG_COUNT_BATCH
+    slices per request, with the requests of a round run on executor when
+    one is given. Returns (slices, error_msg, status_code) where slices is a
+    list of (start, end, count) with start and end in epoch seconds.
+    """
+    data, error_msg, status_code = execute_graphql(ORG_QUERY, {'org': org}, token, partial=True)
+    if data is None:
+        return None, error_msg, status_code
+    organization = data.get('organization')
+    if organization is None:
+        return None, "Organization not found! Please check the name and try again.", 404
+
+    total = organization['repositories']['totalCount']
+    start = int(parse_reset_at(organization['createdAt']))
+    # Leave room for repositories created while the crawl runs
+    end = int(time.time()) + 24 * 3600
+    pending = split_range(start, end, math.ceil(total / slice_repos)) if total else []
+    slices = []
+    count_requests = 0
+
+    while pending:
+        batches = [pending[i:i + ORG_COUNT_BATCH] for i in range(0, len(pending), ORG_COUNT_BATCH)]
+        if executor is not None:
+            futures = [_in_context(executor, count_org_slices, org, batch, token) for batch in batches]
+            counted = [future.result() for future in futures]
+        else:
+            counted = [count_org_slices(org, batch, token) for batch in batches]
+        count_requests += len(batches)
+
+        pending = []
+        for batch, (counts, error_msg, status_code) in zip(batches, counted):
+            if counts is None:
+                return None, error_msg, status_code
+            for (a, b), count in zip(batch, counts):
+                if count == 0:
+                    continue
+                if count <= slice_repos or b - a <= 1:
+                    slices.append((a, b, count))
+                else:
+                    # Repositories are rarely spread evenly, so split a little finer than needed
+                    pending.extend(split_range(a, b, math.ceil(count / slice_repos) + 1))
+
+    slices.sort()
+    log.debug("Planned %s slices for %s with %s count requests", len(slices), org, count_requests)
+    return slices, None, 200
+
+def fetch_org_slice(org, start, end, token=None, budget=None):
+    """
+    Fetch every repository of one created-date slice, following its search cursor.
+
+    Returns (repos, error_msg, status_code) like fetch_repos_with_graphql.
+    """
+    query = org_slice_query(org, start, end)
+    budget = budget or QueryBudget(f"Slice {format_timestamp(start)} of {org}", token)
+    repos = []
+    cursor = None
+
+    while True:
+        try:
+            data, error_msg, status_code = execute_graphql(
+                ORG_SLICE_QUERY,
+                dict(budget.next_variables(), q=query, cursor=cursor),
+                token
+            )
+            if data is None:
+                return None, error_msg, status_code
+            budget.record(data)
+            search = data.get('search') or {}
+        except Exception as e:
+            log.exception("Error processing GraphQL response: %s", e)
+            return None, f"Error processing response: {str(e)}", 500
+
+        # Search can return other node types; those come back as empty objects
+        repos.extend(node for node in search.get('nodes', []) if node)
+        page_info = search.get('pageInfo', {})
+        if not page_info.get('hasNextPage') or not page_info.get('endCursor'):
+            return repos, None, 200
+        cursor = page_info['endCursor']
+
+def fetch_org_repos(org, api_token=None, workers=None):
+    """
+    Fetch an organization's repositories by crawling created-date slices in parallel.
+
+    The slices from plan_org_slices are crawled by up to `workers` threads
+    (ORG_CRAWL_WORKERS by default), each following its own cursor, so wall
+    clock time depends on the largest slice rather than the total page
+    count. Results are merged, deduplicated by URL and ordered by updatedAt
+    like fetch_repos_with_graphql, whose return value this matches.
+    """
+    token = api_token
+    _log_token_usage(org, token)
+
+    merged = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers or ORG_CRAWL_WORKERS), thread_name_prefix='org-crawl') as executor:
+        slices, error_msg, status_code = plan_org_slices(org, token, executor=executor)
+        if slices is None:
+            return None, error_msg, status_code
+        log.info("Crawling %s repositories of organization %s in %s slices",
+                 sum(slice[2] for slice in slices), org, len(slices))
+
+        budgets = [QueryBudget(f"Slice {format_timestamp(start)} of {org}", token) for start, _, _ in slices]
+        futures = [
+            _in_context(executor, fetch_org_slice, org, start, end, token, budget)
+            for (start, end, _), budget in zip(slices, budgets)
+        ]
+        for future in futures:
+            repos, error_msg, status_code = future.result()
+            if repos is None:
+                for pending in futures:
+                    pending.cancel()
+                return None, error_msg, status_code
+            for repo in repos:
+                merged.setdefault(repo.get('url') or repo.get('name'), repo)
+
+    pages = sum(budget.requests for budget in budgets)
+    metrics.pages_per_crawl.observe(pages)
+    log.info("Organization %s: %s repositories in %s pages, %s rate limit points",
+             org, len(merged), pages, sum(budget.points for budget in budgets))
+    return sorted(merged.values(), key=lambda repo: repo.get('updatedAt') or '', reverse=True), None, 200
+
+def get_async_client():
+    """
+    Return the httpx.AsyncClient for the running event loop.
+
+    httpx and asyncio are imported lazily so the synchronous entry points
+    (and the Flet web build) neither need httpx installed nor pay for loading
+    either at startup.
+    """
+    import asyncio
+
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=GITHUB_ASYNC_POOL_SIZE,
+                max_keepalive_connections=GITHUB_ASYNC_POOL_SIZE
+            ),
+            timeout=httpx.Timeout(GITHUB_READ_TIMEOUT, connect=GITHUB_CONNECT_TIMEOUT)
+        )
+        _async_clients[loop] = client
+    return client
+
+async def execute_graphql_async(query, variables, token=None, partial=False):
+    """Async counterpart of execute_graphql using the per-loop httpx client"""
+    import httpx
+
+    pooled = token is None and len(token_pool) > 0
+    result = None
+
+    for _ in range(len(token_pool) if pooled else 1):
+        if pooled:
+            token = token_pool.acquire()
+            if token is None:
+                return _pool_exhausted()
+
+        start = time.perf_counter()
+        try:
+            response = await get_async_client().post(
+                GITHUB_GRAPHQL_URL,
+                json={"query": query, "variables": variables},
+                headers=build_headers(token)
+            )
+        except httpx.TimeoutException as e:
+            log.warning("GraphQL request timed out: %s", e)
+            metrics.github_responses.inc('timeout')
+            return None, "GitHub API request timed out. Please try again later.", 504
+        except httpx.HTTPError as e:
+            log.warning("Network error in GraphQL request: %s", e)
+            metrics.github_responses.inc('network_error')
+            return None, f"Network error: {str(e)}", 500
+        finally:
+            metrics.github_request_seconds.observe(time.perf_counter() - start)
+
+        result = handle_graphql_response(response, partial)
+        if not pooled or not _record_rate_limit(token, response, result):
+            return result
+
+    return result
+
+async def iter_repo_pages_async(username, api_token=None, since=None):
+    """Async counterpart of iter_repo_pages"""
+    token = api_token
+    _log_token_usage(username, token)
+
+    cursor = None
+    page_count = 0
+    budget = QueryBudget(f"Repositories of {username}", token, since)
+
+    while True:
+        page_count += 1
+        log.debug("Fetching page %s of repositories...", page_count)
+
+        try:
+            data, error_msg, status_code = await execute_graphql_async(
+                REPOS_QUERY,
+                dict(budget.next_variables(), username=username, cursor=cursor),
+                token
+            )
+            if data is None:
+                yield None, error_msg, status_code
+                return
+            budget.record(data)
+
+            repos, cursor, error_msg, status_code = read_repos_page(data, since)
+            if repos is None:
+                yield None, error_msg, status_code
+                return
+
+        except Exception as e:
+            log.exception("Error processing GraphQL response: %s", e)
+            yield None, f"Error processing response: {str(e)}", 500
+            return
+
+        yield repos, None, 200
+
+        if not cursor:
+            budget.log_summary()
+            metrics.pages_per_crawl.observe(page_count)
+            return
+
+async def fetch_repos_with_graphql_async(username, api_token=None, since=None):
+    """Async counterpart of fetch_repos_with_graphql; same arguments and return value"""
+    all_repos = []
+
+    async for repos, error_msg, status_code in iter_repo_pages_async(username, api_token, since):
+        if repos is None:
+            return None, error_msg, status_code
+        all_repos.extend(repos)
+
+    log.info("Total repositories fetched: %s", len(all_repos))
+    return all_repos, None, 200
@@ -0,0 +1,152 @@
+"""
+Load generator for the /analyze endpoint.
+
+Drives a running server at one or more concurrency levels and reports
+latency percentiles and throughput per level. Pair it with fake_github.py
+so no real rate limit is spent:
+
+    python fake_github.py --latency-ms 80 &
+    GITHUB_GRAPHQL_URL=http://127.0.0.1:8081/graphql SNAPSHOT_DB_PATH= python main.py &
+    python loadtest.py --concurrency 1,10,50 --requests 200 --save baseline.json
+    python loadtest.py --concurrency 1,10,50 --requests 200 --compare baseline.json
+
+By default every request asks for a distinct synthetic user so the result
+cache is never hit; --users N cycles through N users instead.
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def run_level(url, concurrency, total, username_for, refresh=False, timeout=120):
+    """Send `total` requests with `concurrency` workers and summarize them"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    counter = iter(range(total))
+    counter_lock = threading.Lock()
+    latencies = []
+    statuses = Counter()
+    cache = Counter()
+    results_lock = threading.Lock()
+
+    def worker():
+        while True:
+            with counter_lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            body = {'username': username_for(index)}
+            if refresh:
+                body['refresh'] = True
+            start = time.perf_counter()
+            try:
+                response = session.post(url, json=body, timeout=timeout)
+                status = response.status_code
+                cache_status = response.headers.get('X-Cache', '-')
+            except requests.exceptions.RequestException as e:
+                status = type(e).__name__
+                cache_status = '-'
+            elapsed = time.perf_counter() - start
+            with results_lock:
+                latencies.append(elapsed)
+                statuses[status] += 1
+                cache[cache_status] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'concurrency': concurrency,
+        'requests': total,
+        'seconds': round(wall, 3),
+        'rps': round(total / wall, 2) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 1) if latencies else 0.0,
+        'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        'cache': dict(cache)
+    }
+
+
+def format_delta(current, baseline, lower_is_better=True):
+    if not baseline:
+        return ''
+    change = (current - baseline) / baseline * 100
+    better = change < 0 if lower_is_better else change > 0
+    return f" ({change:+.1f}%{' better' if better else ''})"
+
+
+def print_report(levels, baseline=None):
+    baseline = {level['concurrency']: level for level in (baseline or [])}
+    print(f"{'conc':>5} {'reqs':>6} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  statuses")
+    for level in levels:
+        print(f"{level['concurrency']:>5} {level['requests']:>6} {level['rps']:>9} "
+              f"{level['p50_ms']:>9} {level['p95_ms']:>9} {level['p99_ms']:>9}  {level['statuses']}")
+        previous = baseline.get(level['concurrency'])
+        if previous:
+            print(f"{'':>5} vs baseline: rps{format_delta(level['rps'], previous['rps'], lower_is_better=False)}"
+                  f", p50{format_delta(level['p50_ms'], previous['p50_ms'])}"
+                  f", p95{format_delta(level['p95_ms'], previous['p95_ms'])}"
+                  f", p99{format_delta(level['p99_ms'], previous['p99_ms'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test /analyze')
+    parser.add_argument('--url', default='http://127.0.0.1:5000/analyze')
+    parser.add_argument('--concurrency', default='1,10,50', help='comma separated concurrency levels')
+    parser.add_argument('--requests', type=int, default=200, help='requests per level')
+    parser.add_argument('--users', type=int, default=0, help='cycle through this many users (0 = a new user per request)')
+    parser.add_argument('--user-shape', default='r250', help='synthetic user suffix understood by fake_github, e.g. r1000-l8')
+    parser.add_argument('--refresh', action='store_true', help='ask the server to bypass its result cache')
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file written by --save')
+    args = parser.parse_args()
+
+    run_id = int(time.time())
+    levels = []
+    for concurrency in [int(level) for level in args.concurrency.split(',') if level]:
+        def username_for(index, concurrency=concurrency):
+            n = index % args.users if args.users else index
+            prefix = 'load' if args.users else f'load{run_id}-c{concurrency}'
+            return f'{prefix}-{n}-{args.user_shape}'
+        levels.append(run_level(args.url, concurrency, args.requests, username_for, args.refresh, args.timeout))
+        print(f"concurrency {concurrency}: {levels[-1]['rps']} req/s, p99 {levels[-1]['p99_ms']} ms")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['levels']
+    print()
+    print_report(levels, baseline)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'url': args.url, 'user_shape': args.user_shape, 'levels': levels}, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,445 @@
+"""
+Exact line counts for local checkouts.
+
+GitHub's languages API reports bytes per language, which is what the web
+analysis calls "lines". This mode counts real newlines in repositories on
+disk instead: point it at a directory of checkouts and/or bare repositories
+(or a single one) and it produces the same result as /analyze, built with
+the same milestone, language distribution and stats functions.
+
+    python local_count.py ~/src --name my-team --workers 8
+
+Files are mapped to GitHub's language names by extension, read through
+memory-mapped chunks and counted on a process pool. Checkouts count their
+tracked files (git ls-files); bare repositories count the blobs of HEAD
+through git cat-file; plain directories are walked.
+
+Line counts of git files are cached by blob id in LOCAL_COUNT_CACHE, so a
+rerun only reads blobs it has not seen before, and a file vendored into
+several repositories is counted once.
+"""
+import argparse
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from analysis import build_result
+
+log = logging.getLogger('analyzer.local')
+
+# Bytes per memory-mapped read; smaller files are read in one go
+MMAP_CHUNK_SIZE = int(os.environ.get('LOCAL_MMAP_CHUNK_SIZE', 4 * 1024 * 1024))
+MMAP_MIN_SIZE = int(os.environ.get('LOCAL_MMAP_MIN_SIZE', 256 * 1024))
+
+# Files handed to a worker process per task
+FILES_PER_TASK = int(os.environ.get('LOCAL_FILES_PER_TASK', 256))
+
+# SQLite file caching line counts by git blob id ('' disables the cache)
+LOCAL_COUNT_CACHE = os.environ.get('LOCAL_COUNT_CACHE', 'line_counts.db')
+
+# Blob ids per cache query or write transaction
+CACHE_CHUNK_SIZE = 500
+
+# Directories never descended into when walking plain directories
+SKIP_DIRS = {'.git', '.hg', '.svn', 'node_modules', 'vendor', '__pycache__', '.venv', 'venv', '.tox', 'dist', 'build'}
+
+# Extension (or exact file name) to the language name GitHub reports, for
+# the programming and markup languages GitHub includes in its language stats
+EXTENSION_LANGUAGES = {
+    '.py': 'Python', '.pyi': 'Python', '.pyx': 'Cython',
+    '.js': 'JavaScript', '.mjs': 'JavaScript', '.cjs': 'JavaScript', '.jsx': 'JavaScript',
+    '.ts': 'TypeScript', '.tsx': 'TypeScript', '.mts': 'TypeScript', '.cts': 'TypeScript',
+    '.go': 'Go', '.rs': 'Rust', '.java': 'Java', '.kt': 'Kotlin', '.kts': 'Kotlin',
+    '.scala': 'Scala', '.groovy': 'Groovy', '.clj': 'Clojure', '.cljs': 'Clojure',
+    '.c': 'C', '.h': 'C',
+    '.cc': 'C++', '.cpp': 'C++', '.cxx': 'C++', '.hh': 'C++', '.hpp': 'C++', '.hxx': 'C++',
+    '.cs': 'C#', '.fs': 'F#', '.vb': 'Visual Basic .NET',
+    '.m': 'Objective-C', '.mm': 'Objective-C++', '.swift': 'Swift',
+    '.rb': 'Ruby', '.php': 'PHP', '.pl': 'Perl', '.pm': 'Perl', '.lua': 'Lua', '.r': 'R', '.R': 'R',
+    '.jl': 'Julia', '.ex': 'Elixir', '.exs': 'Elixir', '.erl': 'Erlang', '.hs': 'Haskell',
+    '.ml': 'OCaml', '.mli': 'OCaml', '.dart': 'Dart', '.zig': 'Zig', '.nim': 'Nim',
+    '.sh': 'Shell', '.bash': 'Shell', '.zsh': 'Shell', '.ps1': 'PowerShell', '.bat': 'Batchfile',
+    '.html': 'HTML', '.htm': 'HTML', '.css': 'CSS', '.scss': 'SCSS', '.sass': 'Sass', '.less': 'Less',
+    '.vue': 'Vue', '.svelte': 'Svelte', '.tex': 'TeX', '.vim': 'Vim Script', '.el': 'Emacs Lisp',
+    '.sql': 'PLpgSQL', '.proto': 'Protocol Buffer', '.cmake': 'CMake', '.tf': 'HCL', '.sol': 'Solidity',
+    'Makefile': 'Makefile', 'makefile': 'Makefile', 'GNUmakefile': 'Makefile',
+    'Dockerfile': 'Dockerfile', 'CMakeLists.txt': 'CMake',
+}
+
+
+def language_for(path):
+    """GitHub language name for a file path, or None if it is not counted"""
+    name = path.rsplit('/', 1)[-1]
+    if name in EXTENSION_LANGUAGES:
+        return EXTENSION_LANGUAGES[name]
+    dot = name.rfind('.')
+    if dot <= 0:
+        return None
+    extension = name[dot:]
+    return EXTENSION_LANGUAGES.get(extension) or EXTENSION_LANGUAGES.get(extension.lower())
+
+
+def count_buffer_lines(data):
+    """Newlines in a bytes-like object, plus one for an unterminated last line"""
+    lines = data.count(b'\n')
+    if data and data[-1:] != b'\n':
+        lines += 1
+    return lines
+
+
+def count_file_lines(path, chunk_size=MMAP_CHUNK_SIZE, mmap_min_size=MMAP_MIN_SIZE):
+    """Lines of one file; large files are scanned through memory-mapped chunks"""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return 0
+        if size < mmap_min_size:
+            return count_buffer_lines(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            lines = 0
+            for offset in range(0, size, chunk_size):
+                lines += mapped[offset:offset + chunk_size].count(b'\n')
+            if mapped[size - 1:size] != b'\n':
+                lines += 1
+            return lines
+
+
+def count_files(files):
+    """
+    Worker task: {key: lines} over (key, path) pairs.
+
+    Unreadable files (broken symlinks, permission errors, files deleted
+    since they were listed) are left out.
+    """
+    counts = {}
+    for key, path in files:
+        try:
+            counts[key] = count_file_lines(path)
+        except (OSError, ValueError):
+            continue
+    return counts
+
+
+def count_blobs(git_dir, shas):
+    """Worker task: {sha: lines} over blob ids of a repository"""
+    counts = {}
+    process = subprocess.Popen(
+        ['git', '--git-dir', git_dir, 'cat-file', '--batch'],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE
+    )
+    try:
+        # One request, one response: a blob is read before the next is asked for
+        for sha in shas:
+            process.stdin.write(sha.encode('ascii') + b'\n')
+            process.stdin.flush()
+            header = process.stdout.readline().split()
+            if len(header) < 3 or header[1] != b'blob':
+                continue
+            counts[sha] = count_buffer_lines(process.stdout.read(int(header[2]) + 1)[:-1])
+    finally:
+        process.stdin.close()
+        process.wait()
+    return counts
+
+
+class BlobLineCache:
+    """
+    SQLite cache of line counts by git blob id.
+
+    A blob id is a hash of the file's contents, so an entry never goes
+    stale: the same id always has the same number of lines. Languages are
+    not cached: they follow the path a blob is checked out at, which can
+    differ between repositories holding the same blob.
+    """
+
+    def __init__(self, path=LOCAL_COUNT_CACHE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS blob_lines (
+                    sha TEXT PRIMARY KEY,
+                    lines INTEGER NOT NULL,
+                    counted_at REAL NOT NULL
+                )
+            ''')
+
+    def get_many(self, shas):
+        """{sha: lines} for the cached blob ids among shas"""
+        shas = list(shas)
+        found = {}
+        with self._lock:
+            for chunk in chunks(shas, CACHE_CHUNK_SIZE):
+                rows = self._conn.execute(
+                    f'SELECT sha, lines FROM blob_lines WHERE sha IN ({",".join("?" * len(chunk))})', chunk
+                )
+                found.update(rows)
+        return found
+
+    def put_many(self, entries):
+        """Store (sha, lines) entries"""
+        now = time.time()
+        rows = [(sha, lines, now) for sha, lines in entries]
+        with self._lock:
+            for chunk in chunks(rows, CACHE_CHUNK_SIZE):
+                with self._conn:
+                    self._conn.executemany('INSERT OR REPLACE INTO blob_lines (sha, lines, counted_at) VALUES (?, ?, ?)', chunk)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM blob_lines').fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+def is_bare_repo(path):
+    return (path / 'HEAD').is_file() and (path / 'objects').is_dir() and (path / 'refs').is_dir()
+
+
+def is_checkout(path):
+    return (path / '.git').exists()
+
+
+def find_repositories(root):
+    """Checkouts and bare repositories directly under root, or root itself if it is one"""
+    root = Path(root)
+    if is_checkout(root) or is_bare_repo(root):
+        return [root]
+    repos = sorted(child for child in root.iterdir() if child.is_dir() and (is_checkout(child) or is_bare_repo(child)))
+    return repos or [root]
+
+
+def git_lines(args):
+    """NUL-separated output of a git command as a list of strings"""
+    output = subprocess.run(['git', *args], capture_output=True, check=True).stdout
+    return [item for item in output.decode('utf-8', 'surrogateescape').split('\0') if item]
+
+
+def parse_git_entries(entries, root=None):
+    """
+    (sha, path, language) for regular files in ls-files -s ('mode sha stage')
+    or ls-tree ('mode type sha') output, skipping symlinks, submodules and
+    files of unknown language.
+
+    Paths are joined to root for checkouts and None for bare repositories.
+    """
+    files = []
+    for entry in entries:
+        meta, _, path = entry.partition('\t')
+        fields = meta.split()
+        mode, sha = fields[0], fields[2] if fields[1] == 'blob' else fields[1]
+        language = language_for(path)
+        if mode in ('100644', '100755') and language:
+            files.append((sha, str(root / path) if root is not None else None, language))
+    return files
+
+
+def list_checkout_files(repo):
+    """
+    (sha, path, language) for every tracked file of a checkout with a known
+    language. Files modified since they were staged have no sha: the index's
+    blob id no longer describes what is on disk.
+    """
+    try:
+        staged = git_lines(['-C', str(repo), 'ls-files', '-s', '-z'])
+        modified = git_lines(['-C', str(repo), 'ls-files', '-m', '-z'])
+    except (OSError, subprocess.CalledProcessError):
+        return list_directory_files(repo)
+    modified = {str(repo / path) for path in modified}
+    return [
+        (None if path in modified else sha, path, language)
+        for sha, path, language in parse_git_entries(staged, repo)
+    ]
+
+
+def list_directory_files(root):
+    """(None, path, language) for every file with a known language, skipping VCS and dependency dirs"""
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [name for name in dirnames if name not in SKIP_DIRS]
+        for filename in filenames:
+            language = language_for(filename)
+            if language:
+                files.append((None, os.path.join(dirpath, filename), language))
+    return files
+
+
+def list_bare_files(repo):
+    """(sha, None, language) for every file in HEAD of a bare repository"""
+    try:
+        entries = git_lines(['--git-dir', str(repo), 'ls-tree', '-r', '-z', 'HEAD'])
+    except (OSError, subprocess.CalledProcessError):
+        # Empty repositories have no HEAD commit yet
+        return []
+    return parse_git_entries(entries)
+
+
+def list_files(repo):
+    if is_bare_repo(repo):
+        return list_bare_files(repo)
+    if is_checkout(repo):
+        return list_checkout_files(repo)
+    return list_directory_files(repo)
+
+
+def repo_name(repo):
+    name = repo.name
+    return name[:-4] if name.endswith('.git') else name
+
+
+def repo_node(repo, languages):
+    """A repository in the GraphQL node shape, with line counts as language sizes"""
+    return {
+        'name': repo_name(repo),
+        'url': repo.resolve().as_uri(),
+        'stargazerCount': 0,
+        'updatedAt': None,
+        'languages': {
+            'edges': [
+                {'size': lines, 'node': {'name': language}}
+                for language, lines in sorted(languages.items(), key=lambda item: item[1], reverse=True)
+            ]
+        }
+    }
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def count_repositories(root, workers=None, cache=None):
+    """
+    Count every repository under root on a process pool.
+
+    Each distinct blob is counted once, from a working file when a checkout
+    has one and through git cat-file otherwise, and skipped entirely when
+    cache already knows it. Work is split into FILES_PER_TASK tasks so large
+    repositories spread across all workers. Returns a list of repository
+    nodes in the shape build_result consumes.
+    """
+    started = time.perf_counter()
+    listings = {repo: list_files(repo) for repo in find_repositories(root)}
+
+    shas = {sha for files in listings.values() for sha, _, _ in files if sha}
+    counts = cache.get_many(shas) if cache is not None else {}
+    cached = len(counts)
+
+    # Where to read each uncounted blob from: a working file if any checkout
+    # has one, otherwise the object store of a repository that has it
+    paths, blobs = {}, {}
+    for repo, files in listings.items():
+        for sha, path, _ in files:
+            key = sha or path
+            if key in counts or key in paths:
+                continue
+            if path is not None:
+                paths[key] = path
+                blobs.pop(key, None)
+            elif key not in blobs:
+                blobs[key] = repo
+
+    blobs_by_repo = {}
+    for sha, repo in blobs.items():
+        blobs_by_repo.setdefault(repo, []).append(sha)
+
+    tasks = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for batch in chunks(list(paths.items()), FILES_PER_TASK):
+            tasks.append(pool.submit(count_files, batch))
+        for repo, repo_shas in blobs_by_repo.items():
+            for batch in chunks(repo_shas, FILES_PER_TASK):
+                tasks.append(pool.submit(count_blobs, str(repo), batch))
+        for future in tasks:
+            counts.update(future.result())
+
+    if cache is not None:
+        counted = [key for key in (*paths, *blobs) if key in shas and key in counts]
+        cache.put_many((sha, counts[sha]) for sha in counted)
+
+    nodes = []
+    for repo, files in listings.items():
+        totals = {}
+        for sha, path, language in files:
+            lines = counts.get(sha or path)
+            if lines is not None:
+                totals[language] = totals.get(language, 0) + lines
+        nodes.append(repo_node(repo, totals))
+    log.info(
+        "Counted %s repositories: %s files, %s distinct blobs cached, %s files read in %s tasks in %.2fs",
+        len(listings), sum(len(files) for files in listings.values()), cached,
+        len(paths) + len(blobs), len(tasks), time.perf_counter() - started
+    )
+    return nodes
+
+
+def analyze_local(root, name=None, workers=None, top_k=None, cache_path=LOCAL_COUNT_CACHE, authors=None):
+    """
+    The /analyze result for the repositories under root, with exact line counts.
+
+    With authors (emails or names), the result also gets an 'authored'
+    section from git history, and each repository its 'authored_lines'.
+    """
+    cache = BlobLineCache(cache_path) if cache_path else None
+    try:
+        result = build_result(name or Path(root).resolve().name, count_repositories(root, workers, cache), top_k)
+    finally:
+        if cache is not None:
+            cache.close()
+    if authors:
+        from git_history import authored_summary
+        authored = authored_summary(root, authors, workers, cache_path)
+        for repo in result['repos']:
+            repo['authored_lines'] = authored['repos'].get(repo['name'], 0)
+        result['authored'] = authored
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Count lines of code in local repositories')
+    parser.add_argument('root', help='a checkout, a bare repository, or a directory containing them')
+    parser.add_argument('--name', help='name to report the result under (default: the directory name)')
+    parser.add_argument('--workers', type=int, help='worker processes (default: CPU count)')
+    parser.add_argument('--top', type=int, default=20, help='repositories to list (0 lists all)')
+    parser.add_argument('--json', action='store_true', help='print the full result as JSON')
+    parser.add_argument('--cache', default=LOCAL_COUNT_CACHE,
+                        help="SQLite file caching line counts by blob id ('' disables it)")
+    parser.add_argument('--author', action='append', default=[],
+                        help='also count lines this author email or name added (repeatable)')
+    args = parser.parse_args()
+
+    from logging_config import configure_logging
+    # stdout is for the result, so --json output can be piped
+    configure_logging(stream=sys.stderr)
+
+    result = analyze_local(args.root, args.name, args.workers, args.top or None, args.cache, args.author)
+    if args.json:
+        json.dump(result, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+        return
+
+    print(f"{result['username']}: {result['total_lines']:,} lines in {result['repo_count']} repositories")
+    print(f"{result['milestone']['title']} - {result['milestone']['subtitle']}")
+    for language in result['language_distribution'][:10]:
+        print(f"  {language['name']:<20} {language['lines']:>12,}  {language['percentage']:>6}%")
+    if 'authored' in result:
+        authored = result['authored']
+        print(f"Authored by {', '.join(authored['authors'])}: +{authored['lines_added']:,} "
+              f"-{authored['lines_deleted']:,} in {authored['commits']:,} commits")
+    for repo in result['repos']:
+        print(f"  {repo['name']:<40} {repo['lines']:>12,}")
+
+
+if __name__ == '__main__':
+    main()
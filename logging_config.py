@@ -0,0 +1,95 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+import uuid
+
+# Id of the request being served, attached to every log record
+request_id = contextvars.ContextVar('request_id', default='-')
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+_listener = None
+
+
+def new_request_id(incoming=None):
+    """Use the caller's X-Request-ID when it looks sane, otherwise mint one"""
+    if incoming and len(incoming) <= 64 and incoming.isprintable():
+        rid = incoming
+    else:
+        rid = uuid.uuid4().hex[:12]
+    request_id.set(rid)
+    return rid
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; fields passed with extra={...} are included"""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'request_id': getattr(record, 'request_id', '-'),
+            'msg': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('[LOG] %(asctime)s %(levelname)s [%(request_id)s] %(message)s')
+
+    def formatTime(self, record, datefmt=None):
+        return time.strftime('%H:%M:%S', time.localtime(record.created)) + f'.{int(record.msecs):03d}'
+
+
+def configure_logging(level=None, fmt=None, stream=None):
+    """
+    Route the 'analyzer' loggers through a non-blocking queue.
+
+    Request threads only enqueue records; a background listener thread
+    formats and writes them to stream (default stdout). LOG_LEVEL (default INFO) and
+    LOG_FORMAT ('text' or 'json') are read from the environment. Safe to
+    call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    level = (level or os.environ.get('LOG_LEVEL', 'INFO')).upper()
+    fmt = (fmt or os.environ.get('LOG_FORMAT', 'text')).lower()
+
+    stream_handler = logging.StreamHandler(stream or sys.stdout)
+    stream_handler.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    # The request id is a context variable, so it has to be read on the
+    # request's thread before the record is queued
+    queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger('analyzer')
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
@@ -1,484 +1,518 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, g, render_template, request, jsonify, stream_with_context
 import requests
+import json
+import logging
+import time
 from datetime import datetime
 import os
+import metrics
+from analysis import build_result, new_aggregator
+from cache import cache_key, open_cache
+from github_client import GITHUB_TOKEN, fetch_org_repos, fetch_repos_batch, fetch_repos_with_graphql, iter_repo_pages, token_pool
+from singleflight import SingleFlight
+from logging_config import configure_logging, new_request_id
+from refresher import WATCHLIST, Refresher, Watchlist, parse_watchlist
+from results import ResultStore, page_repos, parse_fields, render_result
+from snapshot_store import open_snapshot_store, plan_refresh
+
+configure_logging()
+log = logging.getLogger('analyzer.main')
 
 app = Flask(__name__)
 
-# GitHub GraphQL API endpoint
-GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
-
-# Get GitHub API key from environment variable
-GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN', None)
-
-def get_milestone_info(lines):
-    milestones = [
-        (0, "🐣 Hatchling Coder", "You're just getting started!", "#4a9eff", 
-         "Fun Fact: That's like writing a shopping list!", "hatchling"),
-        (100, "🌱 Code Sprout", "Nice! You've planted the seed!", "#5cb85c",
-         "Fun Fact: That's about 1 SMS message worth of code!", "sprout"),
-        (500, "🔥 Keyboard Warrior", "You're on fire!", "#ff6b6b",
-         "Fun Fact: You've written more code than lines in a children's book!", "warrior"),
-        (1000, "⚡ Code Ninja", "Sneaky fast coding!", "#f39c12",
-         "Fun Fact: That's enough to crash a small website!", "ninja"),
-        (5000, "🎯 Bug Creator Pro", "With great code comes great bugs!", "#9b59b6",
-         "Fun Fact: Statistically, you've introduced 50 bugs by now!", "bug"),
-        (10000, "🏆 Code Veteran", "Impressive! You've seen some things...", "#e74c3c",
-         "Fun Fact: That's about 200 pages of a novel!", "veteran"),
-        (25000, "💎 Diamond Developer", "You're precious!", "#3498db",
-         "Fun Fact: You've typed more than Shakespeare's Hamlet!", "diamond"),
-        (50000, "🌟 Code Wizard", "Magic happens at your fingertips!", "#f1c40f",
-         "Fun Fact: You could print this and use it as a weapon!", "wizard"),
-        (100000, "🚀 Code Astronaut", "You're in orbit now!", "#16a085",
-         "Fun Fact: This is like writing 4 full textbooks!", "astronaut"),
-        (250000, "👑 Code Monarch", "You rule the codebase!", "#8e44ad",
-         "Fun Fact: That's enough code to confuse any code reviewer!", "monarch"),
-        (500000, "🦸 Code Superhero", "Not all heroes wear capes!", "#c0392b",
-         "Fun Fact: You've written more lines than the original Linux kernel!", "superhero"),
-        (1000000, "🌌 Code Legend", "LEGENDARY STATUS ACHIEVED!", "#d35400",
-         "Fun Fact: You've basically written the next operating system!", "legend"),
-    ]
-    
-    for i in range(len(milestones) - 1, -1, -1):
-        if lines >= milestones[i][0]:
-            return {
-                'title': milestones[i][1],
-                'subtitle': milestones[i][2],
-                'color': milestones[i][3],
-                'fact': milestones[i][4],
-                'class': milestones[i][5]
-            }
-    return {
-        'title': milestones[0][1],
-        'subtitle': milestones[0][2],
-        'color': milestones[0][3],
-        'fact': milestones[0][4],
-        'class': milestones[0][5]
-    }
+# Cache of analysis results, keyed by username. CACHE_URL picks where it
+# lives: memory:// (this process), sqlite:///cache.db (every process on this
+# host) or redis://host:6379/0 (every process on every host). Expired results
+# are served for another RESULT_CACHE_STALE_TTL seconds while they refresh.
+CACHE_URL = os.environ.get('CACHE_URL', 'memory://')
+result_cache = open_cache(
+    CACHE_URL,
+    max_entries=int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', 256)),
+    ttl=int(os.environ.get('RESULT_CACHE_TTL', 600)),
+    max_bytes=int(os.environ.get('RESULT_CACHE_MAX_BYTES', 32 * 1024 * 1024)),
+    stale_ttl=int(os.environ.get('RESULT_CACHE_STALE_TTL', 3600))
+)
 
-def get_next_milestone(lines):
-    """Calculate progress to next milestone"""
-    milestones = [0, 100, 500, 1000, 5000, 10000, 25000, 50000, 100000, 250000, 500000, 1000000]
-    current_milestone = 0
-    next_milestone = 100
-    
-    if lines >= milestones[-1]:
-        current_milestone = milestones[-1]
-        next_milestone = milestones[-1] * 2  # Double the last milestone
-    else:
-        for i in range(len(milestones) - 1):
-            if milestones[i] <= lines < milestones[i + 1]:
-                current_milestone = milestones[i]
-                next_milestone = milestones[i + 1]
-                break
-    
-    progress = ((lines - current_milestone) / (next_milestone - current_milestone)) * 100 if next_milestone > current_milestone else 100
-    remaining = next_milestone - lines
-    
-    return {
-        'current': current_milestone,
-        'next': next_milestone,
-        'progress': min(100, max(0, progress)),
-        'remaining': max(0, remaining),
-        'percentage': round(progress, 1)
+# Persistent per-user repository snapshots used for incremental refreshes:
+# a SQLite path (shared by the processes on this host) or a redis:// URL
+SNAPSHOT_DB_PATH = os.environ.get('SNAPSHOT_DB_PATH', 'snapshots.db')
+snapshot_store = open_snapshot_store(SNAPSHOT_DB_PATH) if SNAPSHOT_DB_PATH else None
+
+# Walk every page at least this often so deleted or renamed repos drop out
+SNAPSHOT_FULL_CRAWL_INTERVAL = int(os.environ.get('SNAPSHOT_FULL_CRAWL_INTERVAL', 24 * 3600))
+
+metrics.registry.add_collector(metrics.cache_collector(result_cache))
+
+# Result ids, id reuse for unchanged results and pre-encoded response bodies
+result_store = ResultStore(result_cache)
+
+# Deduplicates concurrent analyses of the same username
+analysis_flights = SingleFlight()
+
+# Keep only the N largest repositories in results (0 keeps all). Bounds the
+# memory of analyzing organization-sized accounts; totals still cover every repo,
+# and the kept ones are paged through /results/<id>/repos.
+RESULT_TOP_REPOS = int(os.environ.get('RESULT_TOP_REPOS', 100)) or None
+
+# Upper bound on usernames accepted by /analyze/batch
+BATCH_MAX_USERS = int(os.environ.get('BATCH_MAX_USERS', 500))
+
+def wants_org():
+    """Check whether the client asked for organization mode"""
+    body = request.get_json(silent=True) or {}
+    return bool(body.get('org')) or request.args.get('org', '').lower() in ('1', 'true', 'yes')
+
+def wants_refresh():
+    """Check whether the client asked to bypass the result cache"""
+    body = request.get_json(silent=True) or {}
+    if body.get('refresh') or request.args.get('refresh', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'no-cache' in request.headers.get('Cache-Control', '').lower()
+
+# Endpoints whose latency is recorded when the response is returned; the
+# streaming endpoint records its own once the stream ends
+TIMED_ENDPOINTS = {'analyze', 'analyze_batch', 'analyze_get'}
+
+def view_options():
+    """view= and fields= options from the query string or JSON body"""
+    body = request.get_json(silent=True) or {}
+    view = request.args.get('view') or body.get('view')
+    fields = parse_fields(request.args.get('fields') or body.get('fields'))
+    return view, fields
+
+def encoded_response(encoded, cache_status):
+    """304 for a matching If-None-Match, otherwise the pre-encoded body for the request's Accept-Encoding"""
+    body, coding, etag = encoded.select(request.headers.get('Accept-Encoding'))
+    headers = {
+        'ETag': etag,
+        'Vary': 'Accept-Encoding',
+        'Cache-Control': 'no-cache',
+        'X-Cache': cache_status
     }
+    if encoded.matches(request.headers.get('If-None-Match')):
+        return Response(status=304, headers=headers)
+    if coding is not None:
+        headers['Content-Encoding'] = coding
+    return Response(body, content_type='application/json', headers=headers)
 
-def get_language_distribution(repos):
-    """Calculate language distribution across all repos"""
-    lang_total = {}
-    total_lines = 0
-    
-    for repo in repos:
-        for lang, size in repo.get('languages', {}).items():
-            lang_total[lang] = lang_total.get(lang, 0) + size
-            total_lines += size
+@app.before_request
+def start_request():
+    g.request_started = time.perf_counter()
+    g.request_id = new_request_id(request.headers.get('X-Request-ID'))
+
+@app.after_request
+def finish_request(response):
+    if request.endpoint in TIMED_ENDPOINTS and 'request_started' in g:
+        cache_status = response.headers.get('X-Cache') or ('ERROR' if response.status_code >= 400 else 'NONE')
+        # The route pattern, not the path: /analyze/<username> must stay one series
+        metrics.analyze_seconds.observe(time.perf_counter() - g.request_started, request.url_rule.rule, cache_status)
+    if 'request_id' in g:
+        response.headers['X-Request-ID'] = g.request_id
+    return response
+
+@app.route('/')
+def index():
+    return render_template('index.html')
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus text exposition of request, GitHub and cache metrics"""
+    return Response(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
+
+def iter_analysis(username, api_token=None, refresh=False):
+    """
+    Fetch a user's repositories and fold them into an aggregator page by page.
     
-    # Calculate percentages and sort
-    lang_dist = []
-    for lang, size in sorted(lang_total.items(), key=lambda x: x[1], reverse=True):
-        percentage = (size / total_lines * 100) if total_lines > 0 else 0
-        lang_dist.append({
-            'name': lang,
-            'lines': size,
-            'percentage': round(percentage, 2)
-        })
+    Yields (aggregator, error_msg, status_code) after every page; a failure
+    yields (None, error_msg, status_code) and ends the iteration. Pages are
+    discarded once folded, and a full crawl is streamed into the snapshot
+    store as it goes, so no raw nodes outlive their page.
     
-    return lang_dist
-
-def get_funny_stats(lines, repos):
-    stats = []
-    coffee = lines // 1000
-    stats.append({'icon': '☕', 'label': 'Coffee cups needed', 'value': f'{coffee:,}'})
+    A snapshot refreshed within the result cache TTL is used as is (unless
+    refresh is set), otherwise only repositories updated since the snapshot's
+    high-water mark are fetched and merged into it.
+    """
+    aggregator = new_aggregator(RESULT_TOP_REPOS)
     
-    keyboards = lines // 5000
-    stats.append({'icon': '⌨️', 'label': 'Keyboards destroyed', 'value': f'{keyboards:,}'})
+    if snapshot_store is None:
+        for repos, error_msg, status_code in iter_repo_pages(username, api_token):
+            if repos is None:
+                yield None, error_msg, status_code
+                return
+            aggregator.add_page(repos)
+            yield aggregator, None, 200
+        return
     
-    so_visits = lines // 500
-    stats.append({'icon': '🔍', 'label': 'Stack Overflow visits', 'value': f'{so_visits:,}+'})
+    key = cache_key(username, api_token)
+    snapshot = snapshot_store.load(key)
+    plan = plan_refresh(snapshot, result_cache.ttl, SNAPSHOT_FULL_CRAWL_INTERVAL, refresh)
     
-    bugs = lines // 150
-    stats.append({'icon': '🐛', 'label': 'Bugs created', 'value': f'~{bugs:,}'})
+    if plan == 'fresh':
+        log.info("Using stored snapshot for user '%s' (%s repositories)", username, snapshot['repo_count'])
+        aggregator.add_page(snapshot_store.iter_nodes(key))
+        yield aggregator, None, 200
+        return
     
-    hours = lines // 300
-    stats.append({'icon': '⏰', 'label': 'Hours of coding', 'value': f'~{hours:,}h'})
+    if plan == 'incremental':
+        log.info("Incremental refresh for user '%s' since %s", username, snapshot['high_water'])
+        new_repos, error_msg, status_code = fetch_repos_with_graphql(username, api_token, since=snapshot['high_water'])
+        if new_repos is None:
+            yield None, error_msg, status_code
+            return
+        snapshot_store.upsert(key, new_repos)
+        log.info("Merged %s updated repositories into snapshot of %s", len(new_repos), snapshot['repo_count'])
+        aggregator.add_page(snapshot_store.iter_nodes(key))
+        yield aggregator, None, 200
+        return
     
-    # More creative stats
-    commits = lines // 150
-    stats.append({'icon': '💾', 'label': 'Estimated commits', 'value': f'~{commits:,}'})
+    writer = snapshot_store.writer(key, full_crawl=True)
+    committed = False
+    try:
+        for repos, error_msg, status_code in iter_repo_pages(username, api_token):
+            if repos is None:
+                yield None, error_msg, status_code
+                return
+            aggregator.add_page(repos)
+            writer.add(repos)
+            yield aggregator, None, 200
+        writer.commit()
+        committed = True
+    finally:
+        if not committed:
+            writer.discard()
+
+def run_analysis(username, api_token=None, refresh=False):
+    """
+    Fetch and aggregate a user's repositories into the /analyze result.
     
-    if lines > 0:
-        avg_repo = lines // max(repos, 1)
-        stats.append({'icon': '📦', 'label': 'Avg lines per repo', 'value': f'{avg_repo:,}'})
+    Returns a (result, error_msg, status_code) tuple. Successful results are
+    stored in the result cache.
+    """
+    aggregator = None
+    for aggregator, error_msg, status_code in iter_analysis(username, api_token, refresh):
+        if aggregator is None:
+            return None, error_msg, status_code
     
-    if lines > 50000:
-        stats.append({'icon': '🌌', 'label': 'Code density', 'value': 'Matrix Level'})
-    elif lines > 10000:
-        stats.append({'icon': '⚡', 'label': 'Code density', 'value': 'High'})
-    else:
-        stats.append({'icon': '💫', 'label': 'Code density', 'value': 'Growing'})
+    result = aggregator.result(username)
+    log.debug("Found %s total repositories", aggregator.scanned)
+    log.debug("Milestone determined: %s", result['milestone'].get('title', 'Unknown'))
+    log.debug("Progress to next milestone: %s%%", result['milestone_progress']['percentage'])
+    log.debug("Language distribution calculated: %s languages", len(result['language_distribution']))
+    log.info(
+        "Analysis complete for user '%s': %d lines in %d repositories", username, result['total_lines'], result['repo_count'],
+        extra={'username': username, 'total_lines': result['total_lines'], 'repo_count': result['repo_count']}
+    )
+    result_store.store(cache_key(username, api_token), result)
+    return result, None, 200
+
+def run_org_analysis(org, api_token=None, refresh=False):
+    """
+    Crawl an organization's repositories in parallel slices and aggregate them.
     
-    if lines > 100000:
-        stats.append({'icon': '📚', 'label': 'Equivalent to', 'value': f'{lines // 25000} novels'})
-    elif lines > 10000:
-        stats.append({'icon': '📖', 'label': 'Equivalent to', 'value': f'{lines // 2500} short stories'})
-    else:
-        stats.append({'icon': '📝', 'label': 'Equivalent to', 'value': f'{lines // 50} blog posts'})
+    Returns the same (result, error_msg, status_code) tuple as run_analysis.
+    Organizations are not snapshotted: every run is a full (parallel) crawl.
+    """
+    repos, error_msg, status_code = fetch_org_repos(org, api_token)
+    if repos is None:
+        return None, error_msg, status_code
+    result = build_result(org, repos, RESULT_TOP_REPOS)
+    log.info(
+        "Analysis complete for organization '%s': %d lines in %d repositories", org, result['total_lines'], result['repo_count'],
+        extra={'username': org, 'total_lines': result['total_lines'], 'repo_count': result['repo_count']}
+    )
+    result_store.store(cache_key(org, api_token, org=True), result)
+    return result, None, 200
+
+def refresh_analysis(username, api_token=None):
+    """Recompute a cached result in the background, joining any in-flight analysis of the same key"""
+    return analysis_flights.do(cache_key(username, api_token), run_analysis, username, api_token, True)[0]
+
+# Background refreshes of stale results and of the WATCHLIST users
+refresher = Refresher(refresh_analysis, token_pool)
+watchlist = Watchlist(parse_watchlist(WATCHLIST), result_cache, refresher)
+watchlist.start()
+
+def cached_result(username, api_token=None):
+    """
+    (result, 'HIT' or 'STALE') from the result cache, or (None, None).
     
-    # Code complexity metrics
-    if lines > 1000000:
-        stats.append({'icon': '👑', 'label': 'Status', 'value': 'Code Deity'})
-    elif lines > 500000:
-        stats.append({'icon': '🚀', 'label': 'Status', 'value': 'Code Legend'})
-    elif lines > 100000:
-        stats.append({'icon': '⭐', 'label': 'Status', 'value': 'Code Master'})
-    elif lines > 50000:
-        stats.append({'icon': '🔥', 'label': 'Status', 'value': 'Code Warrior'})
-    else:
-        stats.append({'icon': '🌱', 'label': 'Status', 'value': 'Code Sprout'})
+    A stale result is returned as is and refreshed in the background.
+    """
+    result, stale = result_cache.get_stale(cache_key(username, api_token))
+    if result is None:
+        return None, None
+    if stale:
+        log.info("Serving stale result for user '%s' while it refreshes", username)
+        refresher.submit(username, api_token)
+        return result, 'STALE'
+    return result, 'HIT'
+
+def stream_analysis(username, api_token=None, refresh=False, view=None, fields=None):
+    """
+    Generate NDJSON events for a streaming analysis.
     
-    # Add typing speed estimate
-    wpm = 60  # average typing speed
-    chars_per_line = 50  # average
-    typing_hours = (lines * chars_per_line) / (wpm * 5 * 60)  # 5 chars per word
-    stats.append({'icon': '⌨️', 'label': 'Typing time (est)', 'value': f'{int(typing_hours):,}h'})
+    A 'progress' event with the running total, milestone and top languages
+    follows every fetched page; the last event is either 'result' carrying
+    the full /analyze result or 'error'.
+    """
+    def event(payload):
+        return json.dumps(payload) + '\n'
     
-    return stats
+    started = time.perf_counter()
+    cache_status = 'ERROR'
+    try:
+        key = cache_key(username, api_token)
+        if not refresh:
+            cached, status = cached_result(username, api_token)
+            if cached is not None:
+                cache_status = status
+                yield event(dict(render_result(cached, view, fields), type='result'))
+                return
+        
+        aggregator = None
+        page = 0
+        for aggregator, error_msg, status_code in iter_analysis(username, api_token, refresh):
+            if aggregator is None:
+                yield event({'type': 'error', 'error': error_msg, 'status': status_code})
+                return
+            page += 1
+            yield event(dict(aggregator.progress(), type='progress', page=page))
+        
+        result = aggregator.result(username)
+        result_store.store(key, result)
+        log.info("Streamed analysis complete for user '%s' in %s pages", username, page)
+        cache_status = 'MISS'
+        yield event(dict(render_result(result, view, fields), type='result'))
+    finally:
+        metrics.analyze_seconds.observe(time.perf_counter() - started, '/analyze/stream', cache_status)
 
-@app.route('/')
-def index():
-    return render_template('index.html')
+@app.route('/analyze/stream', methods=['POST'])
+def analyze_stream():
+    """Streaming variant of /analyze that emits NDJSON partial results per page"""
+    body = request.get_json(silent=True) or {}
+    username = (body.get('username') or '').strip()
+    log.info("Streaming analyze request received for: %s", username)
+    
+    if not username:
+        return jsonify({'error': 'Please enter a GitHub username'}), 400
+    
+    api_token = (body.get('api_token') or '').strip() or None
+    response = Response(
+        stream_with_context(stream_analysis(username, api_token, wants_refresh(), *view_options())),
+        mimetype='application/x-ndjson'
+    )
+    # Ask reverse proxies not to buffer the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
-def fetch_repos_with_graphql(username, api_token=None):
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
     """
-    Fetch user repositories and their languages using GitHub GraphQL API.
-    This is much more efficient than REST API as it requires only 1-2 requests.
+    Analyze many users at once.
     
-    Args:
-        username: GitHub username to analyze
-        api_token: Optional GitHub API token for authenticated requests (increases rate limit)
+    Users missing from the result cache are fetched together with aliased
+    batch queries. Returns per-user results in the /analyze format under
+    'results' and per-user failures under 'errors'.
     """
-    # Use provided token or fall back to environment variable
-    token = api_token or GITHUB_TOKEN
+    body = request.get_json(silent=True) or {}
+    usernames = body.get('usernames')
+    if not isinstance(usernames, list) or not usernames:
+        return jsonify({'error': 'Please provide a list of GitHub usernames'}), 400
     
-    if token:
-        print(f"[LOG] Using GraphQL API with authentication for user: {username}")
-    else:
-        print(f"[LOG] Using GraphQL API (unauthenticated) for user: {username}")
-        print("[LOG] Note: Using API key increases rate limit from 60 to 5000 requests/hour")
+    # Drop blanks and case-insensitive duplicates, keeping the first spelling
+    unique = {}
+    for username in usernames:
+        if isinstance(username, str) and username.strip():
+            unique.setdefault(username.strip().lower(), username.strip())
+    usernames = list(unique.values())
+    if not usernames:
+        return jsonify({'error': 'Please provide a list of GitHub usernames'}), 400
+    if len(usernames) > BATCH_MAX_USERS:
+        return jsonify({'error': f'Too many usernames. At most {BATCH_MAX_USERS} can be analyzed per batch.'}), 400
     
-    # GraphQL query to fetch repos with languages
-    query_template = """
-    query($username: String!, $cursor: String) {
-      user(login: $username) {
-        repositories(
-          first: 100
-          after: $cursor
-          ownerAffiliations: OWNER
-          isFork: false
-          orderBy: {field: UPDATED_AT, direction: DESC}
-        ) {
-          pageInfo {
-            hasNextPage
-            endCursor
-          }
-          nodes {
-            name
-            url
-            stargazerCount
-            languages(first: 20) {
-              edges {
-                size
-                node {
-                  name
-                }
-              }
-            }
-          }
-        }
-      }
-      rateLimit {
-        remaining
-        resetAt
-      }
-    }
-    """
+    api_token = (body.get('api_token') or '').strip() or None
+    refresh = wants_refresh()
+    view, fields = view_options()
+    log.info("Batch analyze request received for %s users", len(usernames))
     
-    all_repos = []
-    cursor = None
-    has_next_page = True
-    page_count = 0
+    results = {}
+    errors = {}
+    to_fetch = []
+    since = {}
     
-    while has_next_page:
-        page_count += 1
-        print(f"[LOG] Fetching page {page_count} of repositories...")
-        
-        variables = {
-            "username": username,
-            "cursor": cursor
-        }
+    for username in usernames:
+        key = cache_key(username, api_token)
+        if not refresh:
+            cached, _ = cached_result(username, api_token)
+            if cached is not None:
+                results[username] = cached
+                continue
         
-        payload = {
-            "query": query_template,
-            "variables": variables
-        }
+        if snapshot_store is not None:
+            snapshot = snapshot_store.load(key)
+            plan = plan_refresh(snapshot, result_cache.ttl, SNAPSHOT_FULL_CRAWL_INTERVAL, refresh)
+            if plan == 'fresh':
+                results[username] = result_store.store(key, build_result(username, snapshot_store.iter_nodes(key), RESULT_TOP_REPOS))
+                continue
+            if plan == 'incremental':
+                since[username] = snapshot['high_water']
+        to_fetch.append(username)
+    
+    log.info("%s users served from cache, fetching %s", len(usernames) - len(to_fetch), len(to_fetch))
+    fetched = fetch_repos_batch(to_fetch, api_token, since) if to_fetch else {}
+    
+    for username, (repos, error_msg, status_code) in fetched.items():
+        if repos is None:
+            errors[username] = {'error': error_msg, 'status': status_code}
+            continue
         
-        # Prepare headers with authentication if token is available
-        headers = {"Content-Type": "application/json"}
-        if token:
-            headers["Authorization"] = f"Bearer {token}"
-            print("[LOG] Using authenticated request with API token")
+        key = cache_key(username, api_token)
+        if snapshot_store is not None:
+            if username in since:
+                snapshot_store.upsert(key, repos)
+                repos = snapshot_store.iter_nodes(key)
+            else:
+                snapshot_store.save(key, repos, full_crawl=True)
         
-        try:
-            response = requests.post(
-                GITHUB_GRAPHQL_URL,
-                json=payload,
-                headers=headers
-            )
-            
-            print(f"[LOG] GraphQL response status: {response.status_code}")
-            
-            # Handle HTTP status code errors first
-            if response.status_code == 401:
-                print("[LOG] Error: GitHub API authentication failed (401)")
-                return None, "GitHub API authentication failed. Please check your API token if using one.", 401
-            elif response.status_code == 403:
-                print("[LOG] Error: GitHub API rate limit reached (403)")
-                return None, "GitHub API rate limit reached. Please try again later. The limit resets hourly.", 403
-            elif response.status_code == 429:
-                print("[LOG] Error: GitHub API rate limit exceeded (429)")
-                return None, "Too many requests. GitHub API rate limit exceeded. Please wait a few minutes and try again.", 429
-            elif response.status_code == 500:
-                print("[LOG] Error: GitHub API server error (500)")
-                return None, "GitHub API server error. Please try again later.", 500
-            elif response.status_code == 503:
-                print("[LOG] Error: GitHub API service unavailable (503)")
-                return None, "GitHub API service is temporarily unavailable. Please try again later.", 503
-            elif response.status_code != 200:
-                error_msg = f"GraphQL request failed with status {response.status_code}"
-                print(f"[LOG] Error: {error_msg}")
-                # Try to get error message from response
-                try:
-                    error_data = response.json()
-                    if 'message' in error_data:
-                        error_msg = error_data['message']
-                except:
-                    pass
-                return None, f"GitHub API error ({response.status_code}): {error_msg}", response.status_code
-            
-            # Parse JSON response
-            try:
-                data = response.json()
-            except ValueError as e:
-                print(f"[LOG] Error: Failed to parse JSON response: {str(e)}")
-                return None, "Invalid response from GitHub API. Please try again.", 500
-            
-            # Check for GraphQL errors in response body (GraphQL returns 200 even with errors)
-            if 'errors' in data:
-                error_messages = [err.get('message', 'Unknown error') for err in data['errors']]
-                error_msg = '; '.join(error_messages)
-                error_type = data['errors'][0].get('type', '') if data['errors'] else ''
-                print(f"[LOG] GraphQL errors: {error_msg} (Type: {error_type})")
-                
-                # Check if user not found
-                if any('Could not resolve to a User' in msg or 'NOT_FOUND' in msg or 'User' in error_type for msg in error_messages):
-                    return None, "User not found! Please check the username and try again.", 404
-                
-                # Check for rate limit in GraphQL errors
-                if any('rate limit' in msg.lower() or 'RATE_LIMITED' in error_type for msg in error_messages):
-                    return None, "GitHub API rate limit reached. Please try again later. The limit resets hourly.", 403
-                
-                return None, f"GitHub API error: {error_msg}", 500
-            
-            # Check rate limit from rateLimit field
-            if 'data' in data and 'rateLimit' in data['data']:
-                rate_limit = data['data']['rateLimit']
-                remaining = rate_limit.get('remaining', 0)
-                print(f"[LOG] Rate limit remaining: {remaining}")
-                
-                if remaining == 0:
-                    reset_at = rate_limit.get('resetAt', 'unknown')
-                    return None, f"GitHub API rate limit reached. Please try again later. Resets at: {reset_at}", 403
-            
-            # Extract repositories
-            if 'data' not in data or 'user' not in data['data']:
-                return None, "Invalid response structure from GitHub API", 500
-            
-            user_data = data['data']['user']
-            
-            if user_data is None:
-                return None, "User not found! Please check the username and try again.", 404
-            
-            repos_data = user_data.get('repositories', {})
-            repos = repos_data.get('nodes', [])
-            page_info = repos_data.get('pageInfo', {})
-            
-            print(f"[LOG] Fetched {len(repos)} repositories in this page")
-            all_repos.extend(repos)
-            
-            has_next_page = page_info.get('hasNextPage', False)
-            cursor = page_info.get('endCursor')
-            
-            if has_next_page:
-                print(f"[LOG] More pages available, continuing...")
-            
-        except requests.exceptions.RequestException as e:
-            print(f"[LOG] Network error in GraphQL request: {str(e)}")
-            return None, f"Network error: {str(e)}", 500
-        except Exception as e:
-            print(f"[LOG] Error processing GraphQL response: {str(e)}")
-            import traceback
-            print(f"[LOG] Traceback: {traceback.format_exc()}")
-            return None, f"Error processing response: {str(e)}", 500
+        results[username] = result_store.store(key, build_result(username, repos, RESULT_TOP_REPOS))
     
-    print(f"[LOG] Total repositories fetched: {len(all_repos)}")
-    return all_repos, None, 200
+    return jsonify({
+        'success': True,
+        'requested': len(usernames),
+        'results': {username: render_result(result, view, fields) for username, result in results.items()},
+        'errors': errors
+    })
 
 @app.route('/analyze', methods=['POST'])
 def analyze():
     try:
-        print("[LOG] Analyze request received")
+        log.info("Analyze request received")
         username = request.json.get('username', '').strip()
-        print(f"[LOG] Username extracted: {username}")
+        log.debug("Username extracted: %s", username)
         
         if not username:
-            print("[LOG] Error: Empty username provided")
+            log.warning("Error: Empty username provided")
             return jsonify({'error': 'Please enter a GitHub username'}), 400
         
         # Get API token from request (optional) or use environment variable
         api_token = request.json.get('api_token', '').strip() or None
         if api_token:
-            print("[LOG] API token provided in request")
+            log.debug("API token provided in request")
         elif GITHUB_TOKEN:
-            print("[LOG] Using API token from environment variable")
+            log.debug("Using API token from environment variable")
         
-        # Fetch repos using GraphQL API
-        repos, error_msg, status_code = fetch_repos_with_graphql(username, api_token)
+        # Organizations are crawled as parallel slices and skip stale serving
+        org = wants_org()
+        key = cache_key(username, api_token, org)
+        refresh = wants_refresh()
+        if refresh:
+            log.info("Cache refresh requested for user '%s'", username)
+        else:
+            cached, cache_status = (result_cache.get(key), 'HIT') if org else cached_result(username, api_token)
+            if cached is not None:
+                if cache_status == 'HIT':
+                    log.info("Cache hit for user '%s'", username)
+                response = jsonify(render_result(cached, *view_options()))
+                response.headers['X-Cache'] = cache_status
+                return response
         
-        if repos is None:
+        # Concurrent requests for the same key share a single fetch
+        analysis = run_org_analysis if org else run_analysis
+        (result, error_msg, status_code), shared = analysis_flights.do(key, analysis, username, api_token, refresh)
+        if shared:
+            log.info("Joined in-flight analysis for user '%s'", username)
+        
+        if result is None:
             # Handle specific error cases - use error_msg from GraphQL function which has detailed messages
             if status_code == 404:
-                print(f"[LOG] Error: User '{username}' not found")
+                log.warning("Error: User '%s' not found", username)
                 return jsonify({'error': error_msg}), 404
             elif status_code == 401:
-                print("[LOG] Error: GitHub API authentication failed (401)")
+                log.warning("Error: GitHub API authentication failed (401)")
                 return jsonify({'error': error_msg}), 401
             elif status_code == 403:
-                print("[LOG] Error: GitHub API rate limit reached (403)")
+                log.warning("Error: GitHub API rate limit reached (403)")
                 return jsonify({'error': error_msg}), 403
             elif status_code == 429:
-                print("[LOG] Error: GitHub API rate limit exceeded (429)")
+                log.warning("Error: GitHub API rate limit exceeded (429)")
                 return jsonify({'error': error_msg}), 429
             elif status_code == 500:
-                print("[LOG] Error: GitHub API server error (500)")
+                log.warning("Error: GitHub API server error (500)")
                 return jsonify({'error': error_msg}), 500
             elif status_code == 503:
-                print("[LOG] Error: GitHub API service unavailable (503)")
+                log.warning("Error: GitHub API service unavailable (503)")
                 return jsonify({'error': error_msg}), 503
             else:
-                print(f"[LOG] Error: {error_msg} (Status: {status_code})")
+                log.warning("Error: %s (Status: %s)", error_msg, status_code)
                 return jsonify({'error': error_msg if error_msg else 'An unexpected error occurred. Please try again later.'}), status_code if status_code else 500
         
-        print(f"[LOG] Found {len(repos)} total repositories")
-        total_lines = 0
-        repo_data = []
-        
-        for idx, repo in enumerate(repos):
-            repo_name = repo.get('name', 'Unknown')
-            print(f"[LOG] Processing repo {idx + 1}/{len(repos)}: {repo_name}")
-            
-            # Extract languages from GraphQL response
-            languages_edges = repo.get('languages', {}).get('edges', [])
-            languages = {}
-            repo_lines = 0
-            
-            for lang_edge in languages_edges:
-                lang_name = lang_edge.get('node', {}).get('name', '')
-                lang_size = lang_edge.get('size', 0)
-                if lang_name:
-                    languages[lang_name] = lang_size
-                    repo_lines += lang_size
-            
-            if repo_lines > 0:
-                total_lines += repo_lines
-                print(f"[LOG] Repository '{repo_name}': {repo_lines:,} lines of code")
-                
-                repo_data.append({
-                    'name': repo_name,
-                    'lines': repo_lines,
-                    'languages': languages,
-                    'stars': repo.get('stargazerCount', 0),
-                    'url': repo.get('url', '')
-                })
-            else:
-                print(f"[LOG] Repository '{repo_name}': No code found (empty or binary only)")
-        
-        print(f"[LOG] Total lines of code: {total_lines:,}")
-        print(f"[LOG] Processed {len(repo_data)} original repositories")
-        
-        # Sort repos by lines
-        repo_data.sort(key=lambda x: x['lines'], reverse=True)
-        print("[LOG] Repositories sorted by lines of code")
-        
-        milestone = get_milestone_info(total_lines)
-        print(f"[LOG] Milestone determined: {milestone.get('title', 'Unknown')}")
-        
-        milestone_progress = get_next_milestone(total_lines)
-        print(f"[LOG] Progress to next milestone: {milestone_progress['percentage']}%")
-        
-        language_distribution = get_language_distribution(repo_data)
-        print(f"[LOG] Language distribution calculated: {len(language_distribution)} languages")
-        
-        funny_stats = get_funny_stats(total_lines, len(repo_data))
-        print(f"[LOG] Generated {len(funny_stats)} funny stats")
-        
-        print(f"[LOG] Analysis complete for user '{username}'")
-        return jsonify({
-            'success': True,
-            'username': username,
-            'total_lines': total_lines,
-            'repo_count': len(repo_data),
-            'repos': repo_data,
-            'milestone': milestone,
-            'milestone_progress': milestone_progress,
-            'language_distribution': language_distribution,
-            'funny_stats': funny_stats
-        })
+        response = jsonify(render_result(result, *view_options()))
+        response.headers['X-Cache'] = 'SHARED' if shared else 'MISS'
+        return response
         
     except requests.exceptions.RequestException as e:
-        print(f"[LOG] Network error occurred: {str(e)}")
+        log.warning("Network error occurred: %s", e)
         return jsonify({'error': f'Network error: Unable to connect to GitHub API. Please check your internet connection and try again.'}), 500
     except ValueError as e:
-        print(f"[LOG] JSON parsing error: {str(e)}")
+        log.warning("JSON parsing error: %s", e)
         return jsonify({'error': f'Data parsing error: {str(e)}. Please try again.'}), 500
     except KeyError as e:
-        print(f"[LOG] Missing key error: {str(e)}")
+        log.warning("Missing key error: %s", e)
         return jsonify({'error': f'Data structure error: Missing expected data field. Please try again.'}), 500
     except Exception as e:
-        print(f"[LOG] Unexpected error: {type(e).__name__}: {str(e)}")
-        import traceback
-        print(f"[LOG] Traceback: {traceback.format_exc()}")
+        log.exception("Unexpected error: %s: %s", type(e).__name__, e)
         return jsonify({'error': f'An unexpected error occurred: {str(e)}. Please try again later.'}), 500
 
+@app.route('/analyze/<username>', methods=['GET'])
+def analyze_get(username):
+    """
+    Cacheable GET form of /analyze for dashboards that poll the same users.
+    
+    Uses the server's tokens only. The response is served from bytes that
+    were serialized and compressed once per result, with a strong ETag;
+    If-None-Match gets a 304. Accepts the same view= and fields= options.
+    """
+    username = username.strip()
+    key = cache_key(username)
+    refresh = wants_refresh()
+    result, cache_status = (None, None) if refresh else cached_result(username)
+    if result is None:
+        (result, error_msg, status_code), shared = analysis_flights.do(key, run_analysis, username, None, refresh)
+        if result is None:
+            return jsonify({'error': error_msg if error_msg else 'An unexpected error occurred. Please try again later.'}), status_code if status_code else 500
+        cache_status = 'SHARED' if shared else 'MISS'
+    return encoded_response(result_store.encode(result, *view_options()), cache_status)
+
+@app.route('/results/<result_id>')
+def get_result(result_id):
+    """A stored result by id, with the same view= and fields= options as /analyze"""
+    result = result_store.lookup(result_id)
+    if result is None:
+        return jsonify({'error': 'Result not found or expired. Please run the analysis again.'}), 404
+    return jsonify(render_result(result, *view_options()))
+
+@app.route('/results/<result_id>/repos')
+def get_result_repos(result_id):
+    """
+    Cursor-paginated repositories of a stored result, largest first.
+    
+    Query parameters: cursor (next_cursor of the previous page), limit and
+    fields (repository fields to include, e.g. fields=name,lines,url).
+    """
+    result = result_store.lookup(result_id)
+    if result is None:
+        return jsonify({'error': 'Result not found or expired. Please run the analysis again.'}), 404
+    page, error_msg = page_repos(
+        result,
+        request.args.get('cursor'),
+        request.args.get('limit'),
+        parse_fields(request.args.get('fields'))
+    )
+    if page is None:
+        return jsonify({'error': error_msg}), 400
+    return jsonify(page)
+
 if __name__ == '__main__':
     print("✨ GitHub Code Analyzer is starting...")
     print("🌐 Open your browser and go to: http://127.0.0.1:5000")
@@ -0,0 +1,203 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from cache-speed responses to slow crawls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed buckets, optionally split by labels.
+
+    observe() is a bisect plus three additions under a lock, cheap enough to
+    call once per request or page.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Per-bucket counts (last slot is +Inf), then sum
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        """Observe the wall time of the with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def samples(self):
+        with self._lock:
+            series = {labels: (list(counts), total) for labels, (counts, total) in self._series.items()}
+        for labels, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield self.name + '_bucket', _format_labels(self.labelnames, labels, [('le', _format_value(float(bound)))]), cumulative
+            yield self.name + '_sum', _format_labels(self.labelnames, labels), total
+            yield self.name + '_count', _format_labels(self.labelnames, labels), cumulative
+
+
+class Registry:
+    """
+    Set of metrics rendered in the Prometheus text exposition format.
+
+    Collectors are callables run at scrape time that return
+    (name, kind, help, [(labels_dict, value), ...]) tuples, for values such
+    as cache statistics that are cheaper to read than to track.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help_text, labelnames=()):
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+        return collector
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {_format_value(value)}')
+        for collector in self._collectors:
+            for name, kind, help_text, values in collector():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in values:
+                    lines.append(f'{name}{_format_labels(tuple(labels), tuple(labels.values()))} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+# Content type of the text exposition format served by /metrics
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+analyze_seconds = registry.histogram(
+    'analyzer_request_seconds', 'Latency of analysis endpoints', ('route', 'cache')
+)
+github_request_seconds = registry.histogram(
+    'analyzer_github_request_seconds', 'Latency of GitHub GraphQL requests (one per page or batch round)'
+)
+github_responses = registry.counter(
+    'analyzer_github_responses_total', 'GitHub GraphQL responses by HTTP status', ('status',)
+)
+pages_per_crawl = registry.histogram(
+    'analyzer_pages_per_crawl', 'GitHub pages fetched per repository crawl',
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100, 200)
+)
+repos_per_analysis = registry.histogram(
+    'analyzer_repos_per_analysis', 'Repositories scanned per analysis',
+    buckets=(10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000)
+)
+background_refreshes = registry.counter(
+    'analyzer_background_refreshes_total', 'Background result refreshes by trigger and outcome', ('source', 'outcome')
+)
+aggregation_seconds = registry.histogram(
+    'analyzer_aggregation_seconds', 'Time spent building result sections', ('stage',),
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1)
+)
+
+
+def cache_collector(cache):
+    """Collector exposing a ResultCache's hit/miss counters and size"""
+    def collect():
+        stats = cache.stats()
+        lookups = stats['hits'] + stats['misses']
+        return [
+            ('analyzer_result_cache_hits_total', 'counter', 'Result cache hits', [({}, stats['hits'])]),
+            ('analyzer_result_cache_stale_hits_total', 'counter', 'Expired results served while refreshing',
+             [({}, stats['stale_hits'])]),
+            ('analyzer_result_cache_misses_total', 'counter', 'Result cache misses', [({}, stats['misses'])]),
+            ('analyzer_result_cache_hit_ratio', 'gauge', 'Result cache hits / lookups since start',
+             [({}, round(stats['hits'] / lookups, 4) if lookups else 0)]),
+            # Shared backends that cannot count their entries cheaply report None
+            ('analyzer_result_cache_entries', 'gauge', 'Entries in the result cache',
+             [({}, stats['entries'])] if stats['entries'] is not None else []),
+            ('analyzer_result_cache_bytes', 'gauge', 'Estimated size of the result cache',
+             [({}, stats['bytes'])] if stats['bytes'] is not None else [])
+        ]
+    return collect
+
+
+def token_pool_collector(pool):
+    """Collector exposing each pooled token's rate limit state"""
+    def collect():
+        status = pool.status()
+        return [
+            ('analyzer_github_rate_limit_remaining', 'gauge', 'Remaining GitHub rate limit points per token',
+             [({'token': label}, state['remaining']) for label, state in status.items()]),
+            ('analyzer_github_rate_limit_points_used_total', 'counter', 'GitHub rate limit points spent per token',
+             [({'token': label}, state['points_used']) for label, state in status.items()])
+        ]
+    return collect
@@ -0,0 +1,151 @@
+"""
+Minimal Redis protocol (RESP2) client.
+
+Only what the shared cache and snapshot backends need: commands are sent
+as arrays of bulk strings, several at a time when pipelined, over one
+connection per thread. Works against Redis, its protocol-compatible
+forks and the fake_redis.py stand-in.
+"""
+import socket
+import threading
+from urllib.parse import unquote, urlparse
+
+
+class RedisError(Exception):
+    """An error reply from the server"""
+
+
+def encode_command(args):
+    parts = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        if isinstance(arg, bytes):
+            data = arg
+        elif isinstance(arg, str):
+            data = arg.encode('utf-8')
+        else:
+            data = str(arg).encode('utf-8')
+        parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+    return b''.join(parts)
+
+
+def read_reply(stream):
+    """Read one reply; error replies are returned as RedisError instances"""
+    line = stream.readline()
+    if not line.endswith(b'\r\n'):
+        raise ConnectionError('Connection closed by Redis server')
+    kind, payload = line[:1], line[1:-2]
+    if kind == b'+':
+        return payload.decode('utf-8')
+    if kind == b'-':
+        return RedisError(payload.decode('utf-8'))
+    if kind == b':':
+        return int(payload)
+    if kind == b'$':
+        length = int(payload)
+        if length < 0:
+            return None
+        data = stream.read(length + 2)
+        if len(data) != length + 2:
+            raise ConnectionError('Connection closed by Redis server')
+        return data[:-2]
+    if kind == b'*':
+        count = int(payload)
+        if count < 0:
+            return None
+        return [read_reply(stream) for _ in range(count)]
+    raise ConnectionError(f'Unexpected reply from Redis server: {line[:32]!r}')
+
+
+class RedisClient:
+    """Connection per thread to one Redis server and database"""
+
+    def __init__(self, host='127.0.0.1', port=6379, db=0, password=None, username=None, timeout=5.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.username = username
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        """Client for redis://[[user]:password@]host[:port][/db]"""
+        parsed = urlparse(url)
+        if parsed.scheme != 'redis':
+            raise ValueError(f'Unsupported Redis URL: {url}')
+        db = parsed.path.strip('/')
+        return cls(
+            host=parsed.hostname or '127.0.0.1',
+            port=parsed.port or 6379,
+            db=int(db) if db else 0,
+            password=unquote(parsed.password) if parsed.password else None,
+            username=unquote(parsed.username) if parsed.username else None,
+            **kwargs
+        )
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._local.sock = sock
+        self._local.stream = sock.makefile('rb')
+        setup = []
+        if self.password:
+            setup.append(('AUTH', self.username, self.password) if self.username else ('AUTH', self.password))
+        if self.db:
+            setup.append(('SELECT', self.db))
+        if setup:
+            self._send(setup)
+
+    def _send(self, commands):
+        self._local.sock.sendall(b''.join(encode_command(args) for args in commands))
+        replies = [read_reply(self._local.stream) for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    def execute(self, *args):
+        """Run one command and return its reply"""
+        return self.pipeline([args])[0]
+
+    def pipeline(self, commands):
+        """
+        Send several commands in one round trip and return their replies.
+
+        A connection that fails is dropped and the batch retried once on a
+        fresh one; an error reply raises RedisError after every reply has
+        been read, so the connection stays usable.
+        """
+        if not commands:
+            return []
+        for attempt in (1, 2):
+            if getattr(self._local, 'sock', None) is None:
+                self._connect()
+            try:
+                return self._send(commands)
+            except (ConnectionError, OSError):
+                self.close()
+                if attempt == 2:
+                    raise
+
+    def scan_iter(self, match, count=500):
+        """Yield every key matching a glob pattern"""
+        cursor = b'0'
+        while True:
+            cursor, keys = self.execute('SCAN', cursor, 'MATCH', match, 'COUNT', count)
+            yield from keys
+            if cursor in (b'0', '0'):
+                return
+
+    def close(self):
+        """Close this thread's connection"""
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            try:
+                self._local.stream.close()
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = None
+        self._local.stream = None
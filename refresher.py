@@ -0,0 +1,261 @@
+"""
+Background refreshes of cached analysis results.
+
+Refresher runs analyses on a small bounded pool so the /analyze endpoints
+can answer from a stale cache entry while a fresh one is computed
+(stale-while-revalidate). Watchlist keeps a fixed set of users warm by
+handing their entries to the refresher shortly before they expire.
+
+    WATCHLIST=alice,bob REFRESH_WORKERS=2 python main.py
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from cache import cache_key
+from logging_config import request_id
+
+log = logging.getLogger('analyzer.refresh')
+
+# Users whose results are kept warm (comma or whitespace separated)
+WATCHLIST = os.environ.get('WATCHLIST', '')
+
+# Seconds between watchlist checks
+WATCHLIST_INTERVAL = float(os.environ.get('WATCHLIST_INTERVAL', 30))
+
+# Refresh a watched entry once less than this fraction of its TTL is left
+REFRESH_AHEAD = float(os.environ.get('REFRESH_AHEAD', 0.2))
+
+# Background analyses running at once, and queued or running at most
+REFRESH_WORKERS = int(os.environ.get('REFRESH_WORKERS', 2))
+REFRESH_MAX_PENDING = int(os.environ.get('REFRESH_MAX_PENDING', 64))
+
+# Background refreshes with the server's tokens are skipped while the best
+# pooled token has less than this fraction of its rate limit left, leaving
+# the rest to interactive requests
+REFRESH_MIN_HEADROOM = float(os.environ.get('REFRESH_MIN_HEADROOM', 0.25))
+
+
+def parse_watchlist(value):
+    """Usernames from a comma or whitespace separated list, dropping case-insensitive duplicates"""
+    unique = {}
+    for username in (value or '').replace(',', ' ').split():
+        unique.setdefault(username.lower(), username)
+    return list(unique.values())
+
+
+class Refresher:
+    """
+    Bounded background analyses with at most one pending per cache key.
+
+    refresh_fn(username, api_token) runs on one of `workers` threads and
+    returns the usual (result, error_msg, status_code) tuple; it is expected
+    to store the result itself.
+    """
+
+    def __init__(self, refresh_fn, pool=None, workers=REFRESH_WORKERS,
+                 max_pending=REFRESH_MAX_PENDING, min_headroom=REFRESH_MIN_HEADROOM):
+        self.refresh_fn = refresh_fn
+        self.pool = pool
+        self.max_pending = max_pending
+        self.min_headroom = min_headroom
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='refresh')
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def has_headroom(self):
+        """Whether the token pool can spare points for background work"""
+        if self.pool is None or not len(self.pool):
+            return True
+        remaining, limit = self.pool.headroom()
+        return bool(limit) and remaining / limit >= self.min_headroom
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _admit(self, key, username, api_token, source):
+        """Reserve the pending slot for key; False when the refresh is skipped"""
+        if api_token is None and not self.has_headroom():
+            log.debug("Skipping background refresh of '%s': low rate limit headroom", username)
+            metrics.background_refreshes.inc(source, 'skipped_rate_limit')
+            return False
+        with self._lock:
+            if key in self._pending:
+                return False
+            if len(self._pending) >= self.max_pending:
+                log.warning("Skipping background refresh of '%s': %s refreshes pending", username, len(self._pending))
+                metrics.background_refreshes.inc(source, 'skipped_queue_full')
+                return False
+            self._pending.add(key)
+        return True
+
+    def _done(self, key, username, source, outcome, error_msg=None, status_code=None):
+        with self._lock:
+            self._pending.discard(key)
+        metrics.background_refreshes.inc(source, outcome)
+        if outcome == 'ok':
+            log.info("Background refresh of '%s' complete (%s)", username, source)
+        elif outcome == 'error':
+            log.warning("Background refresh of '%s' failed: %s (Status: %s)", username, error_msg, status_code)
+
+    def submit(self, username, api_token=None, source='stale'):
+        """Queue a refresh of username's result; returns whether one was queued"""
+        key = cache_key(username, api_token)
+        if not self._admit(key, username, api_token, source):
+            return False
+        self._executor.submit(self._run, key, username, api_token, source)
+        return True
+
+    def _run(self, key, username, api_token, source):
+        request_id.set(f'refresh-{source}')
+        result, error_msg, status_code = None, None, None
+        try:
+            result, error_msg, status_code = self.refresh_fn(username, api_token)
+        except Exception as e:
+            log.exception("Unexpected error refreshing '%s': %s: %s", username, type(e).__name__, e)
+            error_msg = str(e)
+        finally:
+            self._done(key, username, source, 'ok' if result is not None else 'error', error_msg, status_code)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class AsyncRefresher(Refresher):
+    """
+    asyncio counterpart of Refresher for coroutine refresh functions.
+
+    Refreshes run as tasks on the running loop, at most `workers` at a time.
+    """
+
+    def __init__(self, refresh_fn, pool=None, workers=REFRESH_WORKERS,
+                 max_pending=REFRESH_MAX_PENDING, min_headroom=REFRESH_MIN_HEADROOM):
+        self.refresh_fn = refresh_fn
+        self.pool = pool
+        self.max_pending = max_pending
+        self.min_headroom = min_headroom
+        self.workers = max(1, workers)
+        self._semaphore = None
+        self._tasks = set()
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def submit(self, username, api_token=None, source='stale'):
+        """Schedule a refresh on the running loop; returns whether one was scheduled"""
+        key = cache_key(username, api_token)
+        if not self._admit(key, username, api_token, source):
+            return False
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        task = asyncio.get_running_loop().create_task(self._run(key, username, api_token, source))
+        # The loop only keeps weak references to tasks
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _run(self, key, username, api_token, source):
+        request_id.set(f'refresh-{source}')
+        outcome, error_msg, status_code = 'error', None, None
+        try:
+            async with self._semaphore:
+                result, error_msg, status_code = await self.refresh_fn(username, api_token)
+            if result is not None:
+                outcome = 'ok'
+        except asyncio.CancelledError:
+            outcome = 'cancelled'
+            raise
+        except Exception as e:
+            log.exception("Unexpected error refreshing '%s': %s: %s", username, type(e).__name__, e)
+            error_msg = str(e)
+        finally:
+            self._done(key, username, source, outcome, error_msg, status_code)
+
+    def shutdown(self):
+        for task in list(self._tasks):
+            task.cancel()
+
+
+class Watchlist:
+    """
+    Keeps the results of a fixed set of users warm.
+
+    Every `interval` seconds, users whose cached result is missing or has
+    less than `ahead` of its TTL left are handed to the refresher. A user
+    whose refresh failed is retried after the same lead time rather than
+    on every check.
+    """
+
+    def __init__(self, usernames, cache, refresher, interval=WATCHLIST_INTERVAL, ahead=REFRESH_AHEAD):
+        self.usernames = list(usernames)
+        self.cache = cache
+        self.refresher = refresher
+        self.interval = interval
+        self.lead_time = ahead * cache.ttl
+        self._submitted = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def due(self):
+        """Watched users whose result is missing or expires within the lead time"""
+        now = time.monotonic()
+        due = []
+        for username in self.usernames:
+            expires_in = self.cache.expires_in(cache_key(username))
+            if expires_in is not None and expires_in > self.lead_time:
+                continue
+            if now - self._submitted.get(username, float('-inf')) < max(self.lead_time, self.interval):
+                continue
+            due.append(username)
+        return due
+
+    def check(self):
+        """Queue refreshes for every due user and return them"""
+        return self.submit_due(self.due())
+
+    def submit_due(self, due):
+        """Queue refreshes for the given due users and return them"""
+        for username in due:
+            if self.refresher.submit(username, source='watchlist'):
+                self._submitted[username] = time.monotonic()
+        if due:
+            log.debug("Watchlist check queued %s of %s users", len(due), len(self.usernames))
+        return due
+
+    def start(self):
+        """Check on a daemon thread every interval"""
+        if not self.usernames or self._thread is not None:
+            return
+        log.info("Watching %s users, checking every %ss", len(self.usernames), self.interval)
+        self._thread = threading.Thread(target=self._loop, name='watchlist', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while True:
+            try:
+                self.check()
+            except Exception as e:
+                log.exception("Watchlist check failed: %s: %s", type(e).__name__, e)
+            if self._stop.wait(self.interval):
+                return
+
+    async def run(self):
+        """Check every interval on the running event loop, until cancelled"""
+        if not self.usernames:
+            return
+        log.info("Watching %s users, checking every %ss", len(self.usernames), self.interval)
+        while True:
+            try:
+                # Reading expiries from a shared cache blocks; submitting
+                # needs the loop the refresher schedules its tasks on
+                self.submit_due(await asyncio.to_thread(self.due))
+            except Exception as e:
+                log.exception("Watchlist check failed: %s: %s", type(e).__name__, e)
+            await asyncio.sleep(self.interval)
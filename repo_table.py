@@ -0,0 +1,293 @@
+import array
+
+import numpy as np
+
+import metrics
+from analysis import get_funny_stats, get_milestone_info, get_next_milestone
+
+
+def distribution_from_array(lang_names, totals, limit=None):
+    """
+    language_distribution_from_totals for a per-language-id totals array.
+
+    Ties keep first-seen order, matching the stable sort over a dict.
+    """
+    order = np.argsort(-totals, kind='stable')
+    if limit is not None:
+        order = order[:limit]
+    total_lines = int(totals.sum())
+    lang_dist = []
+    for lang_id in order.tolist():
+        size = int(totals[lang_id])
+        percentage = (size / total_lines * 100) if total_lines > 0 else 0
+        lang_dist.append({
+            'name': lang_names[lang_id],
+            'lines': size,
+            'percentage': round(percentage, 2)
+        })
+    return lang_dist
+
+
+def int64_array(values):
+    """array('q') holding the values of a NumPy array"""
+    column = array.array('q')
+    column.frombytes(np.ascontiguousarray(values, dtype=np.int64).tobytes())
+    return column
+
+
+class RepoTableBuilder:
+    """
+    Accumulates repository nodes into compact columns, page by page.
+
+    Per-repository values go into typed arrays instead of one dict per repo,
+    language names are interned to small integer ids, and the (language,
+    size) pairs form a sparse repo x language matrix in compressed-row form:
+    repository i owns entries ends[i - 1] to ends[i].
+    """
+
+    def __init__(self):
+        self.names = []
+        self.urls = []
+        self.stars = array.array('q')
+        self.lines = array.array('q')
+        self.ends = array.array('q')
+        self.lang_ids = {}
+        self.lang_names = []
+        self.entry_lang = array.array('q')
+        self.entry_size = array.array('q')
+        self.scanned = 0
+
+    def __len__(self):
+        return len(self.lines)
+
+    def add_nodes(self, nodes):
+        """Append GraphQL repository nodes; repositories without code are skipped like parse_repo_node does"""
+        lang_ids = self.lang_ids
+        lang_names = self.lang_names
+        append_lang = self.entry_lang.append
+        append_size = self.entry_size.append
+        scanned = 0
+        for node in nodes:
+            scanned += 1
+            edges = []
+            repo_lines = 0
+            for edge in node.get('languages', {}).get('edges', ()):
+                lang_name = edge.get('node', {}).get('name', '')
+                if lang_name:
+                    size = edge.get('size', 0)
+                    edges.append((lang_name, size))
+                    repo_lines += size
+            if repo_lines <= 0:
+                continue
+
+            # Interned only now, so ids follow first appearance in repositories with code
+            for lang_name, size in edges:
+                lang_id = lang_ids.get(lang_name)
+                if lang_id is None:
+                    lang_id = lang_ids[lang_name] = len(lang_names)
+                    lang_names.append(lang_name)
+                append_lang(lang_id)
+                append_size(size)
+            self.names.append(node.get('name', 'Unknown'))
+            self.urls.append(node.get('url', ''))
+            self.stars.append(node.get('stargazerCount', 0))
+            self.lines.append(repo_lines)
+            self.ends.append(len(self.entry_size))
+        self.scanned += scanned
+
+    def retain(self, rows):
+        """Drop every repository except the given rows (ascending), keeping their order"""
+        ends = np.array(self.ends, dtype=np.int64)
+        counts = np.diff(ends, prepend=0)
+        keep_row = np.zeros(len(ends), dtype=bool)
+        keep_row[rows] = True
+        keep_entry = np.repeat(keep_row, counts)
+        row_list = rows.tolist()
+        self.names = [self.names[row] for row in row_list]
+        self.urls = [self.urls[row] for row in row_list]
+        self.stars = int64_array(np.array(self.stars, dtype=np.int64)[rows])
+        self.lines = int64_array(np.array(self.lines, dtype=np.int64)[rows])
+        self.ends = int64_array(np.cumsum(counts[rows]))
+        self.entry_lang = int64_array(np.array(self.entry_lang, dtype=np.int64)[keep_entry])
+        self.entry_size = int64_array(np.array(self.entry_size, dtype=np.int64)[keep_entry])
+
+    def build(self):
+        """Freeze the columns into a RepoTable of NumPy arrays"""
+        return RepoTable(
+            self.names,
+            self.urls,
+            np.array(self.stars, dtype=np.int64),
+            np.array(self.lines, dtype=np.int64),
+            np.array(self.ends, dtype=np.int64),
+            self.lang_names,
+            np.array(self.entry_lang, dtype=np.int64),
+            np.array(self.entry_size, dtype=np.int64)
+        )
+
+
+class RepoTable:
+    """
+    Columnar view of a set of repositories.
+
+    Top-K selection runs over the lines column; repo dicts are only
+    materialized for the rows returned. Entries are stored in repository
+    order, so each repository's languages are the contiguous slice
+    offsets[i]:offsets[i + 1].
+    """
+
+    def __init__(self, names, urls, stars, lines, ends, lang_names, entry_lang, entry_size):
+        self.names = names
+        self.urls = urls
+        self.stars = stars
+        self.lines = lines
+        self.offsets = np.concatenate((np.zeros(1, dtype=np.int64), ends))
+        self.lang_names = lang_names
+        self.entry_lang = entry_lang
+        self.entry_size = entry_size
+
+    def __len__(self):
+        return len(self.lines)
+
+    def top_indices(self, k=None):
+        """Row indices of the k largest repositories, largest first, earlier rows winning ties"""
+        count = len(self.lines)
+        if k is None or k >= count:
+            return np.argsort(-self.lines, kind='stable')
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64)
+        # Every row at or above the k-th largest value, ties included, in row order
+        threshold = np.partition(self.lines, count - k)[count - k]
+        candidates = np.flatnonzero(self.lines >= threshold)
+        return candidates[np.argsort(-self.lines[candidates], kind='stable')[:k]]
+
+    def repos(self, indices):
+        """Repository dicts in the parse_repo_node format for the given rows"""
+        indices = np.asarray(indices, dtype=np.int64)
+        lang_names = self.lang_names
+        if len(indices) * 8 >= len(self.lines):
+            # Most rows wanted: convert every entry once and slice lists per row
+            entry_names = [lang_names[lang_id] for lang_id in self.entry_lang.tolist()]
+            entry_sizes = self.entry_size.tolist()
+        else:
+            entry_names, entry_sizes = None, None
+        names, urls = self.names, self.urls
+        repos = []
+        for index, repo_lines, repo_stars, start, end in zip(
+            indices.tolist(), self.lines[indices].tolist(), self.stars[indices].tolist(),
+            self.offsets[indices].tolist(), self.offsets[indices + 1].tolist()
+        ):
+            if entry_names is not None:
+                languages = dict(zip(entry_names[start:end], entry_sizes[start:end]))
+            else:
+                languages = dict(zip(
+                    [lang_names[lang_id] for lang_id in self.entry_lang[start:end].tolist()],
+                    self.entry_size[start:end].tolist()
+                ))
+            repos.append({
+                'name': names[index],
+                'lines': repo_lines,
+                'languages': languages,
+                'stars': repo_stars,
+                'url': urls[index]
+            })
+        return repos
+
+
+class ColumnarAggregator:
+    """
+    Drop-in replacement for RepoAggregator that keeps repositories in columns.
+
+    Pages are appended to one RepoTableBuilder, so a repository costs a few
+    array slots rather than a dict per repo and per language map. Language
+    totals are folded in with a bincount over the entries added since the
+    last fold. With top_k set, the builder is cut back to its top_k rows
+    whenever it holds COMPACT_ROWS more, which bounds memory like
+    RepoAggregator's heap. Repo dicts are only built in result(), for the
+    rows returned.
+    """
+
+    # Rows beyond top_k collected before the builder is cut back
+    COMPACT_ROWS = 1024
+
+    def __init__(self, top_k=None):
+        self.top_k = top_k
+        self.total_lines = 0
+        self.repo_count = 0
+        self._builder = RepoTableBuilder()
+        self._lang_totals = np.zeros(0, dtype=np.int64)
+        # Entries of the builder already folded into _lang_totals
+        self._folded = 0
+
+    @property
+    def scanned(self):
+        return self._builder.scanned
+
+    @property
+    def languages(self):
+        return dict(zip(self._builder.lang_names, self._language_totals().tolist()))
+
+    def add_page(self, nodes):
+        builder = self._builder
+        start = len(builder)
+        builder.add_nodes(nodes)
+        self.repo_count += len(builder) - start
+        self.total_lines += sum(builder.lines[start:])
+        if self.top_k is not None and len(builder) >= max(self.top_k, 0) + self.COMPACT_ROWS:
+            self._compact()
+
+    def _language_totals(self):
+        """Per-language-id totals over every repository added so far"""
+        builder = self._builder
+        if self._folded < len(builder.entry_size) or len(self._lang_totals) < len(builder.lang_names):
+            totals = np.bincount(
+                np.array(builder.entry_lang[self._folded:], dtype=np.int64),
+                weights=np.array(builder.entry_size[self._folded:], dtype=np.int64),
+                minlength=len(builder.lang_names)
+            ).astype(np.int64)
+            totals[:len(self._lang_totals)] += self._lang_totals
+            self._lang_totals = totals
+            self._folded = len(builder.entry_size)
+        return self._lang_totals
+
+    def _compact(self):
+        """Cut the builder back to its top_k rows; their order (scan order) is kept for tie-breaking"""
+        self._language_totals()
+        table = self._builder.build()
+        self._builder.retain(np.sort(table.top_indices(self.top_k)))
+        self._folded = len(self._builder.entry_size)
+
+    def top_repos(self):
+        """Kept repositories, largest first"""
+        table = self._builder.build()
+        return table.repos(table.top_indices(self.top_k))
+
+    def language_distribution(self, limit=None):
+        return distribution_from_array(self._builder.lang_names, self._language_totals(), limit)
+
+    def progress(self, top_languages=5):
+        return {
+            'repos_scanned': self.scanned,
+            'repo_count': self.repo_count,
+            'total_lines': self.total_lines,
+            'milestone': get_milestone_info(self.total_lines),
+            'milestone_progress': get_next_milestone(self.total_lines),
+            'language_distribution': self.language_distribution(top_languages)
+        }
+
+    def result(self, username):
+        metrics.repos_per_analysis.observe(self.scanned)
+        with metrics.aggregation_seconds.time('language_distribution'):
+            language_distribution = self.language_distribution()
+        with metrics.aggregation_seconds.time('funny_stats'):
+            funny_stats = get_funny_stats(self.total_lines, self.repo_count)
+        return {
+            'success': True,
+            'username': username,
+            'total_lines': self.total_lines,
+            'repo_count': self.repo_count,
+            'repos': self.top_repos(),
+            'milestone': get_milestone_info(self.total_lines),
+            'milestone_progress': get_next_milestone(self.total_lines),
+            'language_distribution': language_distribution,
+            'funny_stats': funny_stats
+        }
@@ -0,0 +1,216 @@
+import gzip
+import hashlib
+import json
+import secrets
+
+from cache import ResultCache
+
+# In requirements.txt; installs without it serve gzip only
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Repositories per page of /results/<id>/repos
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 500
+
+
+def new_result_id():
+    """
+    Random, unguessable id for a stored result.
+
+    Results computed with a caller's token can include private repositories,
+    so the id itself is the capability to read them.
+    """
+    return secrets.token_urlsafe(12)
+
+
+def parse_fields(value):
+    """Split a fields= parameter ('a,b,c' or a list) into a list of names, or None for all fields"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    fields = [field.strip() for field in value if isinstance(field, str) and field.strip()]
+    return fields or None
+
+
+def project(item, fields):
+    """Keep only the requested top-level fields of a dict (all of them when fields is None)"""
+    if fields is None:
+        return item
+    return {field: item[field] for field in fields if field in item}
+
+
+def summarize(result):
+    """
+    Result without the per-repository list.
+
+    The repositories are available page by page from repos_url; repo_count
+    still covers all of them.
+    """
+    summary = {field: value for field, value in result.items() if field != 'repos'}
+    summary['repos_available'] = len(result.get('repos', ()))
+    if 'result_id' in result:
+        summary['repos_url'] = f"/results/{result['result_id']}/repos"
+    return summary
+
+
+def render_result(result, view=None, fields=None):
+    """Apply the view= ('full' or 'summary') and fields= options to a result"""
+    if view == 'summary':
+        result = summarize(result)
+    return project(result, fields)
+
+
+def page_repos(result, cursor=None, limit=None, fields=None):
+    """
+    One page of a stored result's repositories, largest first.
+
+    cursor is the opaque next_cursor of the previous page. Returns
+    (page, error_msg); page is None when the cursor or limit is invalid.
+    """
+    try:
+        offset = int(cursor) if cursor else 0
+        limit = int(limit) if limit else DEFAULT_PAGE_SIZE
+    except (TypeError, ValueError):
+        return None, 'Invalid cursor or limit'
+    if offset < 0 or limit <= 0:
+        return None, 'Invalid cursor or limit'
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    repos = result.get('repos', [])
+    end = offset + limit
+    return {
+        'result_id': result.get('result_id'),
+        'total': len(repos),
+        'repos': [project(repo, fields) for repo in repos[offset:end]],
+        'next_cursor': str(end) if end < len(repos) else None
+    }, None
+
+
+def encode_json(value):
+    """Compact UTF-8 JSON bytes of a value"""
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def parse_accept_encoding(header):
+    """{coding: q} from an Accept-Encoding header"""
+    accepted = {}
+    for part in (header or '').split(','):
+        coding, *params = part.split(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+class EncodedResult:
+    """
+    A rendered result serialized once and compressed once.
+
+    Each content coding gets its own strong ETag (the identity tag plus a
+    suffix); matches() compares on the shared base so a client revalidating
+    any of them gets a 304.
+    """
+
+    __slots__ = ('body', 'gzip', 'br', 'tag')
+
+    def __init__(self, payload):
+        self.body = encode_json(payload)
+        self.tag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.gzip = gzip.compress(self.body, compresslevel=6)
+        self.br = brotli.compress(self.body, quality=5) if brotli is not None else None
+
+    @property
+    def size(self):
+        return len(self.body) + len(self.gzip) + len(self.br or b'')
+
+    def select(self, accept_encoding):
+        """(bytes, content coding or None, etag) for a request's Accept-Encoding"""
+        accepted = parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get('*', 0)
+        if self.br is not None and accepted.get('br', wildcard) > 0:
+            return self.br, 'br', f'"{self.tag}-br"'
+        if accepted.get('gzip', wildcard) > 0:
+            return self.gzip, 'gzip', f'"{self.tag}-gz"'
+        return self.body, None, f'"{self.tag}"'
+
+    def matches(self, if_none_match):
+        """Whether an If-None-Match header names any representation of this result"""
+        for etag in (if_none_match or '').split(','):
+            etag = etag.strip()
+            if etag == '*':
+                return True
+            if etag.startswith('W/'):
+                etag = etag[2:]
+            if etag.strip('"').split('-')[0] == self.tag:
+                return True
+        return False
+
+
+class ResultStore:
+    """
+    Analysis results by cache key and by result id, plus encoded bodies.
+
+    A recomputed result whose contents did not change keeps its result id
+    (remembered for LATEST_TTL_FACTOR cache lifetimes), so ETags stay valid
+    across cache refreshes.
+    """
+
+    LATEST_TTL_FACTOR = 6
+
+    def __init__(self, cache):
+        self.cache = cache
+        # Result id -> cache key, in the same backend as the results so any
+        # process can resolve an id
+        self.ids = cache.sibling('ids', 4 * cache.max_entries, cache.ttl + cache.stale_ttl)
+        # Cache key -> (result id, content digest) of its latest result
+        self.latest = cache.sibling('latest', 4 * cache.max_entries, self.LATEST_TTL_FACTOR * cache.ttl)
+        # Encoded bodies are derived from the results, so each process keeps its own
+        self.encoded = ResultCache(cache.max_entries, cache.ttl, cache.max_bytes)
+
+    def store(self, key, result):
+        """Give a fresh result an id and cache it under key"""
+        result.pop('result_id', None)
+        body = encode_json(result)
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        latest = self.latest.get(key)
+        if latest is not None and latest[1] == digest:
+            result['result_id'] = latest[0]
+        else:
+            result['result_id'] = new_result_id()
+        # The body just serialized doubles as the size estimate
+        self.cache.set(key, result, size=len(body))
+        self.ids.set(result['result_id'], key, size=len(key))
+        self.latest.set(key, (result['result_id'], digest), size=len(key) + 64)
+        return result
+
+    def lookup(self, result_id):
+        """The cached result with this id, or None once it has expired or changed"""
+        key = self.ids.get(result_id)
+        # A stale result is still what its id names; repos_url links of
+        # stale-served summaries must keep working
+        result = self.cache.get_stale(key)[0] if key is not None else None
+        if result is None or result.get('result_id') != result_id:
+            return None
+        return result
+
+    def encode(self, result, view=None, fields=None):
+        """EncodedResult for a view of a stored result, built on first use"""
+        encoded_key = f"{result['result_id']}|{view or ''}|{','.join(fields or ())}"
+        encoded = self.encoded.get(encoded_key)
+        if encoded is None:
+            encoded = EncodedResult(render_result(result, view, fields))
+            self.encoded.set(encoded_key, encoded, size=encoded.size)
+        return encoded
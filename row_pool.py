@@ -0,0 +1,52 @@
+"""
+Pooled, paged rows for the Flet app's result lists.
+
+Kept free of Flet so the paging logic can be used (and tested) without it:
+a row is any object whose set(item) shows item and returns its control.
+"""
+
+
+def fill(pool, items, factory):
+    """
+    Controls showing items, reusing (and growing) pool.
+
+    pool[i] shows items[i]; controls beyond len(items) stay in the pool for
+    the next result instead of being rebuilt.
+    """
+    while len(pool) < len(items):
+        pool.append(factory())
+    return [row.set(item) for row, item in zip(pool, items)]
+
+
+class PagedRows:
+    """
+    Items shown page_size rows at a time from a pool of reusable rows.
+
+    show() starts a new list of items and returns the controls of its first
+    page; more() returns the controls of the next page, or [] once every
+    item is shown. Rows are only created for items that were paged in, and
+    are kept for the next show().
+    """
+
+    def __init__(self, factory, page_size):
+        self.factory = factory
+        self.page_size = page_size
+        self.pool = []
+        self.items = []
+        self.shown = 0
+
+    def show(self, items):
+        self.items = items
+        self.shown = 0
+        return self.more()
+
+    def more(self):
+        start = self.shown
+        page = self.items[start:start + self.page_size]
+        while len(self.pool) < start + len(page):
+            self.pool.append(self.factory())
+        self.shown += len(page)
+        return [row.set(item) for row, item in zip(self.pool[start:], page)]
+
+    def has_more(self):
+        return self.shown < len(self.items)
@@ -0,0 +1,442 @@
+import json
+import logging
+import secrets
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from redis_client import RedisClient
+
+log = logging.getLogger('analyzer.snapshots')
+
+# Rows written per transaction when streaming a snapshot in or out
+CHUNK_SIZE = 500
+
+# High-water mark of a snapshot without repositories. Unlike None (no mark
+# known, walk every page) it lets an empty account be served as fresh.
+EMPTY_HIGH_WATER = ''
+
+# Staged crawls untouched for this long belong to a dead process and are swept
+STAGING_TTL = 3600
+
+
+def node_to_row(user_key, node):
+    edges = node.get('languages', {}).get('edges', [])
+    languages = [(edge.get('node', {}).get('name', ''), edge.get('size', 0)) for edge in edges]
+    return (
+        user_key,
+        node.get('name', 'Unknown'),
+        node.get('url', ''),
+        node.get('stargazerCount', 0),
+        json.dumps(languages),
+        node.get('updatedAt')
+    )
+
+
+def row_to_node(name, url, stars, languages, updated_at):
+    return {
+        'name': name,
+        'url': url,
+        'stargazerCount': stars,
+        'updatedAt': updated_at,
+        'languages': {
+            'edges': [{'size': size, 'node': {'name': lang}} for lang, size in json.loads(languages)]
+        }
+    }
+
+
+class SnapshotStore:
+    """
+    SQLite-backed store of each user's repository nodes.
+
+    Nodes are kept in the same shape the GraphQL API returns them, so a stored
+    snapshot can be fed straight into the existing aggregation code. The newest
+    `updatedAt` seen for a user acts as the high-water mark for incremental
+    refreshes. Reads and writes stream in chunks so a snapshot never has to be
+    held in memory as a whole.
+    """
+
+    def __init__(self, path='snapshots.db'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # Read connection per thread, for iter_nodes
+        self._local = threading.local()
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    user_key TEXT PRIMARY KEY,
+                    high_water TEXT,
+                    full_crawl_at REAL NOT NULL,
+                    refreshed_at REAL NOT NULL
+                )
+            ''')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS repos (
+                    user_key TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    url TEXT,
+                    stars INTEGER,
+                    languages TEXT,
+                    updated_at TEXT,
+                    PRIMARY KEY (user_key, name)
+                )
+            ''')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS staging (
+                    staging_key TEXT PRIMARY KEY,
+                    touched_at REAL NOT NULL
+                )
+            ''')
+        self.sweep_staging()
+
+    def load(self, user_key):
+        """
+        Load a snapshot's metadata.
+
+        Returns a dict with 'high_water', 'full_crawl_at', 'refreshed_at' and
+        'repo_count', or None if the user has never been stored. Use
+        iter_nodes() to read the repositories themselves.
+        """
+        with self._lock:
+            meta = self._conn.execute(
+                'SELECT high_water, full_crawl_at, refreshed_at FROM snapshots WHERE user_key = ?',
+                (user_key,)
+            ).fetchone()
+            if meta is None:
+                return None
+            repo_count = self._conn.execute(
+                'SELECT COUNT(*) FROM repos WHERE user_key = ?', (user_key,)
+            ).fetchone()[0]
+        return {
+            'high_water': meta[0],
+            'full_crawl_at': meta[1],
+            'refreshed_at': meta[2],
+            'repo_count': repo_count
+        }
+
+    def iter_nodes(self, user_key):
+        """Yield a user's stored nodes, newest first, reading CHUNK_SIZE rows at a time"""
+        # A separate read connection lets WAL readers run alongside writers
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path)
+        cursor = conn.execute(
+            'SELECT name, url, stars, languages, updated_at FROM repos '
+            'WHERE user_key = ? ORDER BY updated_at DESC',
+            (user_key,)
+        )
+        try:
+            while True:
+                rows = cursor.fetchmany(CHUNK_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row_to_node(*row)
+        finally:
+            cursor.close()
+
+    def sweep_staging(self, max_age=STAGING_TTL):
+        """Delete crawls staged by writers that have not written for max_age seconds (their process died)"""
+        cutoff = time.time() - max_age
+        with self._lock, self._conn:
+            self._conn.execute(
+                'DELETE FROM repos WHERE user_key IN (SELECT staging_key FROM staging WHERE touched_at < ?)',
+                (cutoff,)
+            )
+            self._conn.execute('DELETE FROM staging WHERE touched_at < ?', (cutoff,))
+
+    def writer(self, user_key, full_crawl=True):
+        """Start replacing a user's snapshot page by page; see SnapshotWriter"""
+        return SnapshotWriter(self, user_key, full_crawl)
+
+    def save(self, user_key, nodes, full_crawl):
+        """
+        Replace the stored snapshot for a user with nodes.
+
+        full_crawl records whether nodes came from walking every page, which
+        bounds how long deleted or renamed repositories can linger.
+        """
+        writer = self.writer(user_key, full_crawl)
+        writer.add(nodes)
+        writer.commit()
+
+    def upsert(self, user_key, nodes):
+        """
+        Merge freshly fetched nodes into an existing snapshot.
+
+        Repositories are matched by name and fetched nodes win. The high-water
+        mark only moves forward.
+        """
+        rows = [node_to_row(user_key, node) for node in nodes]
+        high_water = max((row[5] or '' for row in rows), default='') or None
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO repos (user_key, name, url, stars, languages, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            self._conn.execute(
+                'UPDATE snapshots SET refreshed_at = ?, '
+                'high_water = CASE WHEN high_water IS NULL OR high_water < ? THEN ? ELSE high_water END '
+                'WHERE user_key = ?',
+                (time.time(), high_water or '', high_water, user_key)
+            )
+
+    def delete(self, user_key):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM repos WHERE user_key = ?', (user_key,))
+            self._conn.execute('DELETE FROM snapshots WHERE user_key = ?', (user_key,))
+
+
+class SnapshotWriter:
+    """
+    Streams a replacement snapshot into the store.
+
+    Pages are staged under a private key as they arrive and swapped in by
+    commit(), so a crawl that fails half way leaves the previous snapshot
+    untouched. The staging key is registered with the time of the last write,
+    so rows staged by a process that died are swept after STAGING_TTL.
+    """
+
+    def __init__(self, store, user_key, full_crawl):
+        self.store = store
+        self.user_key = user_key
+        self.full_crawl = full_crawl
+        self.high_water = None
+        # Random so concurrent crawls in other processes never share rows
+        self._staging_key = f'{user_key}\x00staging\x00{secrets.token_hex(8)}'
+        self._rows = []
+        self._count = 0
+        with store._lock, store._conn:
+            store._conn.execute('INSERT INTO staging VALUES (?, ?)', (self._staging_key, time.time()))
+
+    def add(self, nodes):
+        for node in nodes:
+            row = node_to_row(self._staging_key, node)
+            if row[5] and (self.high_water is None or row[5] > self.high_water):
+                self.high_water = row[5]
+            self._rows.append(row)
+            self._count += 1
+            if len(self._rows) >= CHUNK_SIZE:
+                self._flush()
+
+    def commit(self):
+        self._flush()
+        now = time.time()
+        high_water = self.high_water if self._count else EMPTY_HIGH_WATER
+        store = self.store
+        with store._lock, store._conn:
+            if not store._conn.execute('DELETE FROM staging WHERE staging_key = ?', (self._staging_key,)).rowcount:
+                # Swept as abandoned while this crawl stalled: the staged rows are incomplete
+                store._conn.execute('DELETE FROM repos WHERE user_key = ?', (self._staging_key,))
+                log.warning("Staged snapshot of '%s' was swept before commit; keeping the previous one", self.user_key)
+                return
+            previous = store._conn.execute(
+                'SELECT full_crawl_at FROM snapshots WHERE user_key = ?', (self.user_key,)
+            ).fetchone()
+            full_crawl_at = now if self.full_crawl or previous is None else previous[0]
+            store._conn.execute('DELETE FROM repos WHERE user_key = ?', (self.user_key,))
+            store._conn.execute(
+                'UPDATE repos SET user_key = ? WHERE user_key = ?', (self.user_key, self._staging_key)
+            )
+            store._conn.execute(
+                'INSERT OR REPLACE INTO snapshots (user_key, high_water, full_crawl_at, refreshed_at) '
+                'VALUES (?, ?, ?, ?)',
+                (self.user_key, high_water, full_crawl_at, now)
+            )
+        store.sweep_staging()
+
+    def discard(self):
+        self._rows = []
+        with self.store._lock, self.store._conn:
+            self.store._conn.execute('DELETE FROM repos WHERE user_key = ?', (self._staging_key,))
+            self.store._conn.execute('DELETE FROM staging WHERE staging_key = ?', (self._staging_key,))
+
+    def _flush(self):
+        if not self._rows:
+            return
+        with self.store._lock, self.store._conn:
+            self.store._conn.executemany(
+                'INSERT OR REPLACE INTO repos (user_key, name, url, stars, languages, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                self._rows
+            )
+            self.store._conn.execute(
+                'UPDATE staging SET touched_at = ? WHERE staging_key = ?', (time.time(), self._staging_key)
+            )
+        self._rows = []
+
+
+def updated_score(updated_at):
+    """Sort score for an ISO 8601 updatedAt timestamp (0 when missing)"""
+    if not updated_at:
+        return 0.0
+    return datetime.fromisoformat(updated_at.replace('Z', '+00:00')).timestamp()
+
+
+class RedisSnapshotStore:
+    """
+    SnapshotStore kept in Redis, shared by every process on every host.
+
+    Per user there is a metadata string, a hash of repository name to
+    stored node and a sorted set of names by updatedAt, so iter_nodes() can
+    stream newest first in CHUNK_SIZE pieces. Full crawls are staged under
+    expiring keys and swapped in with RENAME inside MULTI/EXEC.
+    """
+
+    # Staged crawls that are never committed disappear after this long
+    STAGING_TTL_MS = 3600 * 1000
+
+    def __init__(self, client, prefix='analyzer:snapshot:'):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url):
+        return cls(RedisClient.from_url(url))
+
+    def _keys(self, user_key):
+        base = self.prefix + user_key
+        return base, base + ':repos', base + ':order'
+
+    def load(self, user_key):
+        """Snapshot metadata like SnapshotStore.load, or None"""
+        meta_key, repos_key, _ = self._keys(user_key)
+        meta, repo_count = self.client.pipeline([('GET', meta_key), ('HLEN', repos_key)])
+        if meta is None:
+            return None
+        return dict(json.loads(meta), repo_count=repo_count)
+
+    def iter_nodes(self, user_key):
+        """Yield a user's stored nodes, newest first, CHUNK_SIZE at a time"""
+        _, repos_key, order_key = self._keys(user_key)
+        start = 0
+        while True:
+            names = self.client.execute('ZREVRANGE', order_key, start, start + CHUNK_SIZE - 1)
+            if not names:
+                return
+            for name, stored in zip(names, self.client.execute('HMGET', repos_key, *names)):
+                if stored is not None:
+                    yield row_to_node(name.decode('utf-8'), *json.loads(stored))
+            start += CHUNK_SIZE
+
+    def _add_commands(self, repos_key, order_key, nodes):
+        """HSET/ZADD commands for nodes, plus the newest updatedAt among them"""
+        fields = []
+        scores = []
+        high_water = None
+        for node in nodes:
+            _, name, url, stars, languages, updated_at = node_to_row(None, node)
+            fields += [name, json.dumps([url, stars, languages, updated_at])]
+            scores += [updated_score(updated_at), name]
+            if updated_at and (high_water is None or updated_at > high_water):
+                high_water = updated_at
+        if not fields:
+            return [], high_water
+        return [('HSET', repos_key, *fields), ('ZADD', order_key, *scores)], high_water
+
+    def writer(self, user_key, full_crawl=True):
+        """Start replacing a user's snapshot page by page; see RedisSnapshotWriter"""
+        return RedisSnapshotWriter(self, user_key, full_crawl)
+
+    def save(self, user_key, nodes, full_crawl):
+        writer = self.writer(user_key, full_crawl)
+        writer.add(nodes)
+        writer.commit()
+
+    def upsert(self, user_key, nodes):
+        """Merge freshly fetched nodes into an existing snapshot; see SnapshotStore.upsert"""
+        meta_key, repos_key, order_key = self._keys(user_key)
+        nodes = list(nodes)
+        for start in range(0, len(nodes), CHUNK_SIZE):
+            commands, _ = self._add_commands(repos_key, order_key, nodes[start:start + CHUNK_SIZE])
+            self.client.pipeline(commands)
+        high_water = max((node.get('updatedAt') or '' for node in nodes), default='') or None
+        meta = self.client.execute('GET', meta_key)
+        if meta is None:
+            return
+        meta = json.loads(meta)
+        if high_water and (not meta['high_water'] or meta['high_water'] < high_water):
+            meta['high_water'] = high_water
+        meta['refreshed_at'] = time.time()
+        self.client.execute('SET', meta_key, json.dumps(meta))
+
+    def delete(self, user_key):
+        self.client.execute('DEL', *self._keys(user_key))
+
+
+class RedisSnapshotWriter:
+    """SnapshotWriter for RedisSnapshotStore"""
+
+    def __init__(self, store, user_key, full_crawl):
+        self.store = store
+        self.user_key = user_key
+        self.full_crawl = full_crawl
+        self.high_water = None
+        _, repos_key, order_key = store._keys(f'{user_key}:staging:{secrets.token_hex(8)}')
+        self._staging = (repos_key, order_key)
+        self._staged = False
+
+    def add(self, nodes):
+        nodes = list(nodes)
+        for start in range(0, len(nodes), CHUNK_SIZE):
+            commands, high_water = self.store._add_commands(*self._staging, nodes[start:start + CHUNK_SIZE])
+            if not commands:
+                continue
+            if high_water and (self.high_water is None or high_water > self.high_water):
+                self.high_water = high_water
+            self.store.client.pipeline(commands + [
+                ('PEXPIRE', key, self.store.STAGING_TTL_MS) for key in self._staging
+            ])
+            self._staged = True
+
+    def commit(self):
+        client = self.store.client
+        meta_key, repos_key, order_key = self.store._keys(self.user_key)
+        now = time.time()
+        previous = client.execute('GET', meta_key)
+        full_crawl_at = now if self.full_crawl or previous is None else json.loads(previous)['full_crawl_at']
+        high_water = self.high_water if self._staged else EMPTY_HIGH_WATER
+        meta = json.dumps({'high_water': high_water, 'full_crawl_at': full_crawl_at, 'refreshed_at': now})
+        commands = [('MULTI',), ('DEL', repos_key, order_key)]
+        if self._staged:
+            staged_repos, staged_order = self._staging
+            commands += [
+                ('RENAME', staged_repos, repos_key), ('PERSIST', repos_key),
+                ('RENAME', staged_order, order_key), ('PERSIST', order_key)
+            ]
+        commands += [('SET', meta_key, meta), ('EXEC',)]
+        client.pipeline(commands)
+
+    def discard(self):
+        if self._staged:
+            self.store.client.execute('DEL', *self._staging)
+            self._staged = False
+
+
+def open_snapshot_store(location):
+    """RedisSnapshotStore for a redis:// URL, otherwise a SnapshotStore at that SQLite path"""
+    if location.startswith('redis://'):
+        return RedisSnapshotStore.from_url(location)
+    return SnapshotStore(location)
+
+
+def plan_refresh(snapshot, max_age, full_crawl_interval, refresh=False, now=None):
+    """
+    Decide how to bring a stored snapshot up to date.
+
+    Returns 'fresh' when the snapshot can be used as is, 'incremental' when
+    only repositories updated since its high-water mark need fetching, and
+    'full' when every page has to be walked.
+    """
+    now = time.time() if now is None else now
+    if snapshot is None or snapshot['high_water'] is None:
+        return 'full'
+    if not refresh and now - snapshot['refreshed_at'] < max_age:
+        return 'fresh'
+    if now - snapshot['full_crawl_at'] > full_crawl_interval:
+        return 'full'
+    return 'incremental'
@@ -0,0 +1,84 @@
+"""
+Shared setup: the repository's flat modules on sys.path and the app
+pointed at an in-process fake_github server.
+
+The GitHub URL and snapshot settings are read when main and async_app are
+imported, so they are set here, before any test module imports them.
+"""
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_github  # noqa: E402
+
+FAKE = fake_github.FakeGitHub(latency_ms=0, rate_limit=100000)
+SERVER = fake_github.serve(FAKE, port=0)
+
+os.environ['GITHUB_GRAPHQL_URL'] = f'http://127.0.0.1:{SERVER.server_port}/graphql'
+os.environ.setdefault('CACHE_URL', 'memory://')
+os.environ['SNAPSHOT_DB_PATH'] = ''
+os.environ['WATCHLIST'] = ''
+
+
+@pytest.fixture
+def fake_github_server():
+    """The FakeGitHub behind GITHUB_GRAPHQL_URL"""
+    return FAKE
+
+
+@pytest.fixture
+def repo_pages():
+    """Pages of GraphQL repository nodes with empty, zero-size and tied repositories"""
+    rng = random.Random(3)
+    names = ['Python', 'Go', 'Rust', 'C', 'Zig']
+
+    def node(i):
+        edges = [
+            {'size': rng.choice([0, rng.randint(1, 50)]), 'node': {'name': name}}
+            for name in rng.sample(names, rng.randint(0, 3))
+        ]
+        if i % 97 == 0:
+            edges = [{'size': 0, 'node': {'name': 'Ghost'}}]
+        return {'name': f'repo-{i}', 'url': f'https://github.com/u/repo-{i}', 'stargazerCount': i % 5,
+                'languages': {'edges': edges}}
+
+    return [[node(page * 100 + i) for i in range(100)] for page in range(20)]
+
+
+def git(*args, cwd=None, author='Dev <dev@example.com>'):
+    """Run a git command in a throwaway repository, committing as author"""
+    name, _, email = author.partition(' <')
+    env = dict(os.environ, GIT_AUTHOR_NAME=name, GIT_AUTHOR_EMAIL=email.rstrip('>'),
+               GIT_COMMITTER_NAME=name, GIT_COMMITTER_EMAIL=email.rstrip('>'))
+    subprocess.run(['git', '-c', 'init.defaultBranch=main', *args], cwd=cwd, env=env,
+                   check=True, capture_output=True)
+
+
+@pytest.fixture
+def git_repos(tmp_path):
+    """
+    A directory holding a checkout with two authors' history (and a renamed
+    file) and a bare clone of it.
+    """
+    root = tmp_path / 'repos'
+    checkout = root / 'app'
+    checkout.mkdir(parents=True)
+    git('init', '-q', cwd=checkout)
+    (checkout / 'main.py').write_text('import os\n\nprint(os.name)\n')
+    (checkout / 'README').write_text('no language\n')
+    git('add', '.', cwd=checkout)
+    git('commit', '-q', '-m', 'first', cwd=checkout)
+
+    (checkout / 'src').mkdir()
+    (checkout / 'src' / 'util.go').write_text('package src\n\nfunc A() {}\n\nfunc B() {}')
+    git('mv', 'main.py', 'app.py', cwd=checkout)
+    git('add', '.', cwd=checkout)
+    git('commit', '-q', '-m', 'second', cwd=checkout, author='Other Person <other@example.com>')
+
+    git('clone', '-q', '--bare', str(checkout), str(root / 'app-mirror.git'))
+    return root
@@ -0,0 +1,38 @@
+from analysis import RepoAggregator, build_result, parse_repo_node
+
+
+def test_pages_fold_like_one_pass(repo_pages):
+    paged = RepoAggregator()
+    for page in repo_pages:
+        paged.add_page(page)
+    whole = RepoAggregator()
+    whole.add_page(node for page in repo_pages for node in page)
+    assert paged.result('u') == whole.result('u')
+
+
+def test_totals_cover_every_repository(repo_pages):
+    nodes = [node for page in repo_pages for node in page]
+    parsed = [repo for repo in map(parse_repo_node, nodes) if repo is not None]
+    result = build_result('u', nodes)
+    assert result['total_lines'] == sum(repo['lines'] for repo in parsed)
+    assert result['repo_count'] == len(parsed)
+    assert len(result['repos']) == len(parsed)
+
+
+def test_top_k_keeps_largest_and_earliest_on_ties(repo_pages):
+    nodes = [node for page in repo_pages for node in page]
+    full = build_result('u', nodes)
+    top = build_result('u', nodes, top_k=10)
+    # A stable sort by size is the reference order
+    assert top['repos'] == sorted(full['repos'], key=lambda repo: repo['lines'], reverse=True)[:10]
+    assert top['total_lines'] == full['total_lines']
+    assert top['language_distribution'] == full['language_distribution']
+
+
+def test_progress_reports_running_totals(repo_pages):
+    aggregator = RepoAggregator()
+    aggregator.add_page(repo_pages[0])
+    progress = aggregator.progress()
+    assert progress['repos_scanned'] == len(repo_pages[0])
+    assert progress['total_lines'] == aggregator.total_lines
+    assert len(progress['language_distribution']) <= 5
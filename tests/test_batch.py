@@ -0,0 +1,55 @@
+import main
+from github_client import fetch_repos_batch, fetch_repos_with_graphql
+
+
+def test_batch_matches_single_user_fetches(fake_github_server):
+    usernames = ['batch-a-r5', 'batch-b-r230', 'batch-c-r0', 'batch-d-r101']
+    batched = fetch_repos_batch(usernames, batch_size=3)
+    assert set(batched) == set(usernames)
+    for username in usernames:
+        assert batched[username] == fetch_repos_with_graphql(username)
+
+
+def test_finished_slots_are_refilled(fake_github_server):
+    requests = fake_github_server.requests
+    # One user needs three pages; the two slots it does not use take the other users in turn
+    results = fetch_repos_batch(['batch-big-r250', 'batch-1-r3', 'batch-2-r3', 'batch-3-r3'], batch_size=2)
+    assert all(status_code == 200 for _, _, status_code in results.values())
+    assert fake_github_server.requests - requests == 3
+
+
+def test_missing_user_fails_alone(fake_github_server):
+    results = fetch_repos_batch(['batch-ok-r2', 'ghost-batch'])
+    assert len(results['batch-ok-r2'][0]) == 2
+    assert results['ghost-batch'][0] is None
+    assert results['ghost-batch'][2] == 404
+
+
+def test_duplicates_are_fetched_once(fake_github_server):
+    requests = fake_github_server.requests
+    results = fetch_repos_batch(['batch-dup-r2', 'batch-dup-r2'])
+    assert list(results) == ['batch-dup-r2']
+    assert fake_github_server.requests - requests == 1
+
+
+def test_since_stops_at_the_high_water_mark(fake_github_server):
+    repos, _, _ = fetch_repos_with_graphql('batch-since-r40')
+    high_water = repos[9]['updatedAt']
+    results = fetch_repos_batch(['batch-since-r40'], since={'batch-since-r40': high_water})
+    assert results['batch-since-r40'][0] == [repo for repo in repos if repo['updatedAt'] >= high_water]
+
+
+def test_batch_endpoint_reports_results_and_errors(fake_github_server):
+    client = main.app.test_client()
+    response = client.post('/analyze/batch?view=summary', json={
+        'usernames': ['batch-api-r4', 'Batch-API-r4', ' ', 'ghost-batch-api']
+    })
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body['requested'] == 2
+    assert body['results']['batch-api-r4']['repo_count'] == 4
+    assert 'repos' not in body['results']['batch-api-r4']
+    assert body['errors']['ghost-batch-api']['status'] == 404
+
+    assert client.post('/analyze/batch', json={'usernames': []}).status_code == 400
+    assert client.post('/analyze/batch', json={'usernames': 'batch-api-r4'}).status_code == 400
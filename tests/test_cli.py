@@ -0,0 +1,77 @@
+import io
+import json
+import threading
+import time
+
+import cli
+from cli import analyze_all, analyze_user, read_usernames
+
+
+def test_read_usernames_skips_blanks_and_comments():
+    assert list(read_usernames(['alice\n', '  # team\n', '\n', 'bob  # lead\n'])) == ['alice', 'bob']
+
+
+def test_analyze_all_writes_every_record_and_counts_failures():
+    output = io.StringIO()
+
+    def analyze(username, api_token, top_k):
+        if username == 'broken':
+            raise ValueError('boom')
+        if username.startswith('missing'):
+            return None, 'User not found', 404
+        return {'username': username, 'repos': [], 'success': True}, None, 200
+
+    failures = analyze_all(['a', 'missing', 'b', 'broken', 'c'], analyze, output, workers=2, summary=True)
+    records = {record['username']: record for record in map(json.loads, output.getvalue().splitlines())}
+    assert failures == 2
+    assert set(records) == {'a', 'b', 'c', 'missing', 'broken'}
+    assert records['missing']['status_code'] == 404
+    assert records['broken'] == {'success': False, 'username': 'broken', 'error': 'ValueError: boom', 'status_code': 500}
+    assert 'repos' not in records['a']
+
+
+def test_analyze_all_reads_input_as_it_is_consumed():
+    read = []
+    started = threading.Event()
+
+    def usernames():
+        for i in range(100):
+            read.append(i)
+            yield f'user-{i}'
+
+    def analyze(username, api_token, top_k):
+        started.wait(5)
+        return {'username': username, 'success': True}, None, 200
+
+    generator = usernames()
+    output = io.StringIO()
+    thread = threading.Thread(target=analyze_all, args=(generator, analyze, output, 2))
+    thread.start()
+    try:
+        deadline = time.monotonic() + 5
+        while len(read) < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # Twice the workers are queued; the rest of the input waits
+        assert len(read) == 4
+    finally:
+        started.set()
+        thread.join(5)
+    assert len(output.getvalue().splitlines()) == 100
+
+
+def test_analyze_user_matches_the_web_result(fake_github_server):
+    result, error_msg, status_code = analyze_user('cli-user-r150', top_k=5)
+    assert status_code == 200
+    assert result['repo_count'] == 150
+    assert len(result['repos']) == 5
+    assert analyze_user('ghost-cli')[2] == 404
+
+
+def test_main_reads_a_file_and_writes_jsonl(fake_github_server, tmp_path):
+    users = tmp_path / 'users.txt'
+    users.write_text('cli-file-r3\n# skipped\nghost-cli\n')
+    output = tmp_path / 'out.jsonl'
+    assert cli.main(['-f', str(users), '-o', str(output), '--summary']) == 1
+    records = {record['username']: record for record in map(json.loads, output.read_text().splitlines())}
+    assert records['cli-file-r3']['repo_count'] == 3
+    assert records['ghost-cli']['success'] is False
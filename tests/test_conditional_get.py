@@ -0,0 +1,81 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def client():
+    return main.app.test_client()
+
+
+def test_etag_revalidates_to_304(client):
+    first = client.get('/analyze/etag-user-r30', headers={'Accept-Encoding': 'gzip'})
+    assert first.status_code == 200
+    assert first.headers['Content-Encoding'] == 'gzip'
+    assert first.headers['Vary'] == 'Accept-Encoding'
+    assert first.headers['X-Cache'] == 'MISS'
+    assert first.headers['ETag'].endswith('-gz"')
+    assert json.loads(gzip.decompress(first.data))['repo_count'] == 30
+
+    again = client.get('/analyze/etag-user-r30', headers={
+        'Accept-Encoding': 'gzip', 'If-None-Match': first.headers['ETag']
+    })
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'] == first.headers['ETag']
+    assert again.headers['X-Cache'] == 'HIT'
+
+
+def test_any_coding_of_a_result_revalidates(client):
+    gzipped = client.get('/analyze/etag-coding-r12', headers={'Accept-Encoding': 'gzip'})
+    plain = client.get('/analyze/etag-coding-r12', headers={
+        'Accept-Encoding': 'identity', 'If-None-Match': gzipped.headers['ETag']
+    })
+    assert plain.status_code == 304
+    assert 'Content-Encoding' not in plain.headers
+
+
+def test_changed_result_gets_a_new_etag(client):
+    full = client.get('/analyze/etag-view-r12', headers={'Accept-Encoding': 'identity'})
+    summary = client.get('/analyze/etag-view-r12?view=summary', headers={
+        'Accept-Encoding': 'identity', 'If-None-Match': full.headers['ETag']
+    })
+    assert summary.status_code == 200
+    assert summary.headers['ETag'] != full.headers['ETag']
+    assert 'repos' not in summary.get_json()
+
+
+def test_missing_user_is_not_cached(client):
+    response = client.get('/analyze/ghost-etag')
+    assert response.status_code == 404
+    assert 'ETag' not in response.headers
+
+
+def test_latency_is_labelled_by_route_pattern(client):
+    client.get('/analyze/etag-metrics-r5')
+    rendered = client.get('/metrics').get_data(as_text=True)
+    assert 'route="/analyze/<username>"' in rendered
+    assert 'etag-metrics-r5' not in rendered
+
+
+def test_async_app_revalidates_to_304():
+    import async_app
+
+    async def main():
+        async with async_app.app.test_app() as app:
+            client = app.test_client()
+            first = await client.get('/analyze/etag-async-r20', headers={'Accept-Encoding': 'gzip'})
+            again = await client.get('/analyze/etag-async-r20', headers={
+                'Accept-Encoding': 'gzip', 'If-None-Match': first.headers['ETag']
+            })
+            return first, again
+
+    first, again = asyncio.run(main())
+    assert first.status_code == 200
+    assert first.headers['Content-Encoding'] == 'gzip'
+    assert again.status_code == 304
+    assert again.headers['ETag'] == first.headers['ETag']
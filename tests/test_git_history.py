@@ -0,0 +1,55 @@
+import git_history
+from git_history import authored_in_repo, authored_summary, numstat_path, parse_numstat
+
+
+def test_numstat_path_resolves_renames():
+    assert numstat_path('src/app.py') == 'src/app.py'
+    assert numstat_path('old.py => new.go') == 'new.go'
+    assert numstat_path('src/{old => new}/app.py') == 'src/new/app.py'
+    assert numstat_path('src/{ => lib}/app.py') == 'src/lib/app.py'
+    assert numstat_path('src/{lib => }/app.py') == 'src/app.py'
+
+
+def test_parse_numstat_groups_files_by_commit_and_language():
+    lines = [
+        '\0aaa\tdev@example.com\tDev',
+        '',
+        '3\t1\tsrc/{a.py => b.py}',
+        '2\t0\tREADME',
+        '-\t-\tlogo.png',
+        '4\t2\tmain.go',
+        '\0bbb\tother@example.com\tOther Person',
+        '\0ccc\tdev@example.com\tDev',
+        '1\t1\tb.py',
+    ]
+    assert list(parse_numstat(lines)) == [
+        ('aaa', 'dev@example.com', 'Dev', {'Python': [3, 1], 'Go': [4, 2]}),
+        ('bbb', 'other@example.com', 'Other Person', {}),
+        ('ccc', 'dev@example.com', 'Dev', {'Python': [1, 1]}),
+    ]
+
+
+def test_authored_lines_by_email_or_name(git_repos, tmp_path):
+    cache_path = str(tmp_path / 'history.db')
+    dev = authored_in_repo(git_repos / 'app', {'dev@example.com'}, cache_path)
+    assert (dev['commits'], dev['added'], dev['languages']) == (1, 3, {'Python': 3})
+    # The renamed file adds no lines, and README has no language
+    other = authored_in_repo(git_repos / 'app-mirror.git', {'other person'}, cache_path, batch_size=1)
+    assert (other['commits'], other['added'], other['languages']) == (1, 5, {'Python': 0, 'Go': 5})
+
+
+def test_second_run_reads_commits_from_the_cache(git_repos, tmp_path, monkeypatch):
+    cache_path = str(tmp_path / 'history.db')
+    assert authored_in_repo(git_repos / 'app', {'dev@example.com'}, cache_path)['parsed'] == 2
+    monkeypatch.setattr(git_history, 'iter_numstat', lambda repo, shas: iter(()) if not shas else 1 / 0)
+    again = authored_in_repo(git_repos / 'app', {'dev@example.com'}, cache_path)
+    assert (again['parsed'], again['added']) == (0, 3)
+
+
+def test_authored_summary_spans_repositories(git_repos, tmp_path):
+    summary = authored_summary(git_repos, ['Dev@Example.com ', 'Other Person'], workers=2,
+                               cache_path=str(tmp_path / 'history.db'))
+    assert summary['authors'] == ['dev@example.com', 'other person']
+    assert (summary['commits'], summary['lines_added']) == (4, 16)
+    assert summary['repos'] == {'app': 8, 'app-mirror': 8}
+    assert [entry['name'] for entry in summary['language_distribution']] == ['Go', 'Python']
@@ -0,0 +1,85 @@
+import pytest
+
+import local_count
+from conftest import git
+from local_count import (
+    BlobLineCache, analyze_local, count_blobs, count_file_lines, count_repositories, find_repositories, list_bare_files, language_for
+)
+
+
+@pytest.mark.parametrize('data', [b'', b'one', b'one\n', b'a\nb\nc', b'a\n\n\nb\n', b'x' * 5000 + b'\n' * 3000 + b'tail'])
+def test_mmap_chunks_count_the_same_lines_as_a_plain_read(tmp_path, data):
+    path = tmp_path / 'file.py'
+    path.write_bytes(data)
+    expected = data.count(b'\n') + (1 if data and not data.endswith(b'\n') else 0)
+    assert count_file_lines(path, mmap_min_size=1 << 30) == expected
+    # Chunks smaller than the file, ending mid-line
+    assert count_file_lines(path, chunk_size=7, mmap_min_size=1) == expected
+
+
+def test_language_for_maps_extensions_and_skips_unknown_files():
+    assert language_for('src/App.TSX') == 'TypeScript'
+    assert language_for('README') is None
+    assert language_for('docker/Dockerfile') == 'Dockerfile'
+    assert language_for('.bashrc') is None
+
+
+def test_checkouts_and_bare_repositories_count_the_same(git_repos):
+    repos = find_repositories(git_repos)
+    assert [repo.name for repo in repos] == ['app', 'app-mirror.git']
+    nodes = {node['name']: node for node in count_repositories(git_repos, workers=2)}
+    expected = [{'size': 5, 'node': {'name': 'Go'}}, {'size': 3, 'node': {'name': 'Python'}}]
+    assert nodes['app']['languages']['edges'] == expected
+    assert nodes['app-mirror']['languages']['edges'] == expected
+
+
+def test_bare_blobs_are_read_through_cat_file(git_repos):
+    bare = git_repos / 'app-mirror.git'
+    files = list_bare_files(bare)
+    assert sorted(language for _, path, language in files) == ['Go', 'Python']
+    assert all(path is None for _, path, _ in files)
+    counts = count_blobs(str(bare), [sha for sha, _, _ in files] + ['0' * 40])
+    assert sorted(counts.values()) == [3, 5]
+
+
+def test_modified_files_are_counted_from_disk(git_repos):
+    (git_repos / 'app' / 'app.py').write_text('print(1)\n')
+    nodes = {node['name']: node for node in count_repositories(git_repos / 'app', workers=1)}
+    assert nodes['app']['languages']['edges'][-1] == {'size': 1, 'node': {'name': 'Python'}}
+
+
+def test_analyze_local_builds_an_analysis_result(git_repos):
+    result = analyze_local(git_repos, name='team', workers=1, cache_path='')
+    assert result['username'] == 'team'
+    assert result['repo_count'] == 2
+    assert result['total_lines'] == 16
+    assert [entry['name'] for entry in result['language_distribution']] == ['Go', 'Python']
+
+
+def test_blob_cache_skips_counted_blobs_on_a_second_run(git_repos, tmp_path, monkeypatch):
+    cache = BlobLineCache(str(tmp_path / 'counts.db'))
+    first = count_repositories(git_repos, workers=1, cache=cache)
+    # The checkout and its bare clone share both blobs
+    assert len(cache) == 2
+
+    def fail(*args):
+        raise AssertionError('cached blob read again')
+
+    monkeypatch.setattr(local_count, 'count_files', fail)
+    monkeypatch.setattr(local_count, 'count_blobs', fail)
+    assert count_repositories(git_repos, workers=1, cache=cache) == first
+    cache.close()
+
+
+def test_a_cached_blob_takes_the_language_of_its_path(git_repos, tmp_path):
+    cache = BlobLineCache(str(tmp_path / 'counts.db'))
+    count_repositories(git_repos / 'app', workers=1, cache=cache)
+    copy = git_repos / 'copy'
+    copy.mkdir()
+    (copy / 'script.rb').write_text((git_repos / 'app' / 'app.py').read_text())
+    git('init', '-q', cwd=copy)
+    git('add', '.', cwd=copy)
+    git('commit', '-q', '-m', 'copy', cwd=copy)
+    nodes = {node['name']: node for node in count_repositories(copy, workers=1, cache=cache)}
+    assert nodes['copy']['languages']['edges'] == [{'size': 3, 'node': {'name': 'Ruby'}}]
+    cache.close()
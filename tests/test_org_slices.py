@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import main
+from github_client import fetch_org_repos, fetch_repos_with_graphql, org_slice_query, plan_org_slices, split_range
+
+
+def test_split_range_is_contiguous_and_whole_seconds():
+    assert split_range(0, 10, 3) == [(0, 3), (3, 6), (6, 10)]
+    # Never more parts than seconds, and always at least one
+    assert split_range(5, 7, 10) == [(5, 6), (6, 7)]
+    assert split_range(5, 7, 0) == [(5, 7)]
+
+
+def test_org_slice_query_bounds_are_inclusive_seconds():
+    assert org_slice_query('acme', 0, 86400) == \
+        'org:acme fork:false created:1970-01-01T00:00:00Z..1970-01-01T23:59:59Z sort:created-asc'
+
+
+def test_slices_are_disjoint_and_cover_every_repository(fake_github_server):
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        slices, error_msg, status_code = plan_org_slices('slice-org-r1500', slice_repos=100, executor=executor)
+    assert (error_msg, status_code) == (None, 200)
+    assert sum(count for _, _, count in slices) == 1500
+    assert all(0 < count <= 100 for _, _, count in slices)
+    assert all(end <= start for (_, end, _), (start, _, _) in zip(slices, slices[1:]))
+
+
+def test_empty_and_missing_organizations(fake_github_server):
+    assert plan_org_slices('slice-empty-r0') == ([], None, 200)
+    slices, error_msg, status_code = plan_org_slices('ghost-org')
+    assert slices is None and status_code == 404
+
+
+def test_org_crawl_matches_a_sequential_crawl(fake_github_server):
+    repos, error_msg, status_code = fetch_org_repos('crawl-org-r700', workers=4)
+    assert status_code == 200
+    assert len({repo['url'] for repo in repos}) == len(repos) == 700
+    updated = [repo['updatedAt'] for repo in repos]
+    assert updated == sorted(updated, reverse=True)
+    sequential, _, _ = fetch_repos_with_graphql('crawl-org-r700')
+    assert {repo['url'] for repo in repos} == {repo['url'] for repo in sequential}
+
+
+def test_org_mode_endpoint(fake_github_server):
+    client = main.app.test_client()
+    response = client.post('/analyze', json={'username': 'endpoint-org-r120', 'org': True})
+    assert response.status_code == 200
+    assert response.get_json()['repo_count'] == 120
+    assert client.post('/analyze', json={'username': 'ghost-org', 'org': True}).status_code == 404
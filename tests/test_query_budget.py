@@ -0,0 +1,59 @@
+import pytest
+
+import github_client
+from github_client import LANGUAGES_PER_REPO, PAGE_SHAPES, QueryBudget, choose_page_shape, query_cost
+
+
+def test_query_cost_counts_connections():
+    assert query_cost(100) == 1
+    assert query_cost(25) == 1
+    assert query_cost(100, aliases=10) == 10
+    assert query_cost(50, aliases=10) == 5
+
+
+@pytest.mark.parametrize('remaining', [None, 4000, 500, 100, 0])
+def test_single_user_pages_never_shrink(remaining):
+    # A full page already costs GitHub's 1 point minimum
+    assert choose_page_shape(remaining, 5000) == 'full'
+
+
+@pytest.mark.parametrize('remaining, shape', [(None, 'full'), (4000, 'full'), (500, 'reduced'), (100, 'minimal')])
+def test_batch_pages_shrink_as_budget_runs_low(remaining, shape):
+    assert choose_page_shape(remaining, 5000, aliases=10) == shape
+
+
+@pytest.mark.parametrize('remaining', [None, 4000, 500, 100])
+def test_every_shape_keeps_every_language(remaining):
+    budget = QueryBudget('test', token='caller-token')
+    budget.remaining, budget.limit = remaining, 5000
+    variables = budget.next_variables(aliases=10)
+    assert variables['languages'] == LANGUAGES_PER_REPO
+    assert variables['first'] in PAGE_SHAPES.values()
+
+
+def test_incremental_refresh_starts_with_a_small_page():
+    budget = QueryBudget('test', token='caller-token', since='2024-01-01T00:00:00Z')
+    assert budget.next_variables() == {'first': PAGE_SHAPES['minimal'], 'languages': LANGUAGES_PER_REPO}
+    assert budget.next_variables() == {'first': PAGE_SHAPES['full'], 'languages': LANGUAGES_PER_REPO}
+
+
+def test_record_sums_reported_cost():
+    budget = QueryBudget('test', token='caller-token')
+    budget.record({'rateLimit': {'cost': 3, 'remaining': 97, 'limit': 100}})
+    budget.record({'rateLimit': {'cost': 2, 'remaining': 95, 'limit': 100}})
+    assert (budget.points, budget.remaining, budget.limit) == (5, 95, 100)
+
+
+def test_fake_github_charges_the_estimated_cost(fake_github_server):
+    assert fake_github_server.cost({'username': 'u', 'first': 100}) == query_cost(100)
+    logins = {f'login{i}': f'u{i}' for i in range(10)}
+    assert fake_github_server.cost({**logins, 'first': 50}) == query_cost(50, aliases=10)
+
+
+def test_batch_fetch_reports_points_from_fake_github(fake_github_server, monkeypatch):
+    recorded = []
+    monkeypatch.setattr(QueryBudget, 'log_summary', lambda self: recorded.append((self.requests, self.points)))
+    results = github_client.fetch_repos_batch([f'batch-user-{i}-r150' for i in range(10)], 'caller-token')
+    assert all(len(results[f'batch-user-{i}-r150'][0]) == 150 for i in range(10))
+    # Two pages of ten aliases at 100 repositories a page, 10 points each
+    assert recorded == [(2, 20)]
@@ -0,0 +1,39 @@
+import pytest
+
+from analysis import RepoAggregator
+from repo_table import ColumnarAggregator
+
+
+@pytest.mark.parametrize('compact_rows', [64, ColumnarAggregator.COMPACT_ROWS])
+@pytest.mark.parametrize('top_k', [None, 0, 1, 7, 20, 10000])
+def test_columnar_matches_python_aggregator(repo_pages, top_k, compact_rows):
+    python, columnar = RepoAggregator(top_k), ColumnarAggregator(top_k)
+    columnar.COMPACT_ROWS = compact_rows
+    for page in repo_pages:
+        python.add_page(page)
+        columnar.add_page(page)
+        assert columnar.progress() == python.progress()
+    assert columnar.languages == python.languages
+    assert columnar.result('u') == python.result('u')
+
+
+def test_zero_size_languages_of_repositories_with_code_are_listed():
+    nodes = [
+        {'name': 'empty', 'languages': {'edges': [{'size': 0, 'node': {'name': 'Ghost'}}]}},
+        {'name': 'code', 'languages': {'edges': [
+            {'size': 10, 'node': {'name': 'Python'}}, {'size': 0, 'node': {'name': 'Shell'}}
+        ]}},
+    ]
+    for aggregator in (RepoAggregator(), ColumnarAggregator()):
+        aggregator.add_page(nodes)
+        distribution = aggregator.result('u')['language_distribution']
+        assert [(entry['name'], entry['lines']) for entry in distribution] == [('Python', 10), ('Shell', 0)]
+
+
+def test_kept_rows_stay_bounded_by_top_k(repo_pages):
+    aggregator = ColumnarAggregator(top_k=5)
+    aggregator.COMPACT_ROWS = 64
+    for page in repo_pages:
+        aggregator.add_page(page)
+        assert len(aggregator._builder) < 5 + 64
+    assert len(aggregator.result('u')['repos']) == 5
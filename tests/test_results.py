@@ -0,0 +1,95 @@
+import pytest
+
+import main
+from results import MAX_PAGE_SIZE, page_repos, parse_accept_encoding, parse_fields, project, render_result
+
+RESULT = {
+    'result_id': 'abc',
+    'repo_count': 45,
+    'repos': [{'name': f'repo-{i}', 'lines': 1000 - i, 'url': f'https://github.com/u/repo-{i}'} for i in range(45)],
+}
+
+
+def test_pages_follow_next_cursor_to_the_end():
+    seen = []
+    cursor = None
+    while True:
+        page, error_msg = page_repos(RESULT, cursor, limit=20)
+        assert error_msg is None
+        assert page['total'] == 45
+        seen.extend(repo['name'] for repo in page['repos'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert seen == [repo['name'] for repo in RESULT['repos']]
+
+
+def test_default_and_capped_limits():
+    assert len(page_repos(RESULT)[0]['repos']) == 20
+    big = dict(RESULT, repos=RESULT['repos'] * 20)
+    assert len(page_repos(big, limit=MAX_PAGE_SIZE + 100)[0]['repos']) == MAX_PAGE_SIZE
+
+
+@pytest.mark.parametrize('cursor, limit', [('x', None), ('-1', None), (None, '0'), (None, '-5'), (None, 'ten')])
+def test_invalid_cursor_or_limit(cursor, limit):
+    assert page_repos(RESULT, cursor, limit) == (None, 'Invalid cursor or limit')
+
+
+def test_cursor_past_the_end_is_an_empty_last_page():
+    page, _ = page_repos(RESULT, '100')
+    assert page['repos'] == [] and page['next_cursor'] is None
+
+
+def test_fields_projection():
+    assert parse_fields('name, lines,,') == ['name', 'lines']
+    assert parse_fields(['url', 3, '']) == ['url']
+    assert parse_fields('') is None
+    page, _ = page_repos(RESULT, limit=1, fields=['name', 'missing'])
+    assert page['repos'] == [{'name': 'repo-0'}]
+    assert project(RESULT, None) is RESULT
+
+
+def test_summary_view_points_at_the_repos_pages():
+    summary = render_result(RESULT, 'summary')
+    assert 'repos' not in summary
+    assert summary['repos_available'] == 45
+    assert summary['repos_url'] == '/results/abc/repos'
+
+
+def test_result_ids_serve_results_and_repo_pages(fake_github_server):
+    client = main.app.test_client()
+    analyzed = client.post('/analyze?view=summary', json={'username': 'result-ids-r30'}).get_json()
+    assert 'repos' not in analyzed
+
+    result = client.get(f"/results/{analyzed['result_id']}?fields=username,repo_count").get_json()
+    assert result == {'username': 'result-ids-r30', 'repo_count': 30}
+
+    page = client.get(f"{analyzed['repos_url']}?limit=25&fields=name,lines").get_json()
+    assert len(page['repos']) == 25 and set(page['repos'][0]) == {'name', 'lines'}
+    rest = client.get(f"{analyzed['repos_url']}?cursor={page['next_cursor']}").get_json()
+    assert len(rest['repos']) == 5 and rest['next_cursor'] is None
+
+    assert client.get(f"{analyzed['repos_url']}?limit=nope").status_code == 400
+    assert client.get('/results/unknown-id').status_code == 404
+
+
+def test_results_keep_the_largest_repos_by_default(fake_github_server):
+    client = main.app.test_client()
+    full = client.post('/analyze', json={'username': 'top-repos-r250'}).get_json()
+    assert full['repo_count'] == 250
+    assert len(full['repos']) == main.RESULT_TOP_REPOS == 100
+    assert full['total_lines'] > sum(repo['lines'] for repo in full['repos'])
+    lines = [repo['lines'] for repo in full['repos']]
+    assert lines == sorted(lines, reverse=True)
+
+    summary = client.post('/analyze?view=summary', json={'username': 'top-repos-r250'}).get_json()
+    assert summary['repos_available'] == 100
+    page = client.get(f"{summary['repos_url']}?cursor=80&limit=50").get_json()
+    assert len(page['repos']) == 20 and page['next_cursor'] is None
+
+
+def test_accept_encoding_q_values_in_any_position():
+    assert parse_accept_encoding('gzip, br;q=0.5, *;q=0') == {'gzip': 1.0, 'br': 0.5, '*': 0.0}
+    assert parse_accept_encoding('GZIP; level=1; q=0.2 , identity ;Q = 0.1') == {'gzip': 0.2, 'identity': 0.1}
+    assert parse_accept_encoding('br;q=high, ,') == {'br': 0.0}
+    assert parse_accept_encoding(None) == {}
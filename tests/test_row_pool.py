@@ -0,0 +1,47 @@
+from row_pool import PagedRows, fill
+
+
+class Row:
+    """Stands in for a Flet row: set() records the item and returns the row as its control"""
+
+    created = 0
+
+    def __init__(self):
+        Row.created += 1
+        self.item = None
+
+    def set(self, item):
+        self.item = item
+        return self
+
+
+def test_fill_reuses_and_grows_the_pool():
+    pool = []
+    first = fill(pool, ['a', 'b', 'c'], Row)
+    assert [row.item for row in first] == ['a', 'b', 'c']
+    second = fill(pool, ['d'], Row)
+    assert second == [first[0]] and second[0].item == 'd'
+    assert len(pool) == 3
+
+
+def test_paged_rows_build_one_page_at_a_time():
+    Row.created = 0
+    rows = PagedRows(Row, page_size=4)
+    shown = rows.show(list(range(10)))
+    assert [row.item for row in shown] == [0, 1, 2, 3]
+    assert Row.created == 4 and rows.has_more()
+    while rows.has_more():
+        shown.extend(rows.more())
+    assert [row.item for row in shown] == list(range(10))
+    assert rows.more() == [] and rows.shown == 10
+    assert Row.created == 10
+
+
+def test_paged_rows_reuse_rows_for_the_next_result():
+    Row.created = 0
+    rows = PagedRows(Row, page_size=4)
+    first = rows.show(list(range(10)))
+    second = rows.show(['x', 'y'])
+    assert second == first[:2] and [row.item for row in second] == ['x', 'y']
+    assert not rows.has_more()
+    assert rows.show([]) == [] and Row.created == 4
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_calls_share_one_run():
+    flights = SingleFlight()
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'result'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do('key', work)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flights.do('key', work))) for _ in range(4)]
+    for thread in followers:
+        thread.start()
+    # Followers register under the lock before they block
+    while flights._calls['key'].waiters < 4:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results, key=lambda item: item[1]) == [('result', False)] + [('result', True)] * 4
+    assert flights.in_flight() == 0
+
+
+def test_exception_is_raised_and_key_is_forgotten():
+    flights = SingleFlight()
+
+    def fail():
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        flights.do('key', fail)
+    assert flights.do('key', lambda: 'again') == ('again', False)
+
+
+def test_async_calls_share_one_run():
+    async def main():
+        flights = AsyncSingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 'result'
+
+        results = await asyncio.gather(*(flights.do('key', work) for _ in range(5)))
+        return calls, results, flights.in_flight()
+
+    calls, results, in_flight = asyncio.run(main())
+    assert len(calls) == 1
+    assert results == [('result', False)] + [('result', True)] * 4
+    assert in_flight == 0
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    async def main():
+        flights = AsyncSingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return 'result'
+
+        leader = asyncio.create_task(flights.do('key', work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do('key', work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower, flights.in_flight()
+
+    assert asyncio.run(main()) == (('result', True), 0)
+
+
+def test_async_exception_reaches_every_caller():
+    async def main():
+        flights = AsyncSingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise ValueError('boom')
+
+        results = await asyncio.gather(*(flights.do('key', work) for _ in range(3)), return_exceptions=True)
+        return results, flights.in_flight()
+
+    results, in_flight = asyncio.run(main())
+    assert [type(result) for result in results] == [ValueError] * 3
+    assert in_flight == 0
@@ -0,0 +1,144 @@
+import time
+
+import pytest
+
+import fake_redis
+import main
+from cache import cache_key
+from fake_github import make_repo
+from redis_client import RedisClient
+from snapshot_store import EMPTY_HIGH_WATER, RedisSnapshotStore, SnapshotStore, plan_refresh
+
+
+@pytest.fixture(scope='module')
+def redis_server():
+    server = fake_redis.serve(fake_redis.FakeRedis(), port=0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def store(request, tmp_path, redis_server):
+    if request.param == 'sqlite':
+        return SnapshotStore(str(tmp_path / 'snapshots.db'))
+    client = RedisClient('127.0.0.1', redis_server.server_address[1])
+    client.execute('FLUSHDB')
+    return RedisSnapshotStore(client)
+
+
+def nodes(login, count):
+    return [make_repo(login, i, 3) for i in range(count)]
+
+
+def test_saved_snapshot_streams_back_newest_first(store):
+    saved = nodes('snap', 1200)
+    store.save('snap', saved, full_crawl=True)
+    snapshot = store.load('snap')
+    assert snapshot['repo_count'] == 1200
+    assert snapshot['high_water'] == max(node['updatedAt'] for node in saved)
+    loaded = list(store.iter_nodes('snap'))
+    assert [node['name'] for node in loaded] == [
+        node['name'] for node in sorted(saved, key=lambda node: node['updatedAt'], reverse=True)
+    ]
+    assert loaded[0]['languages'] == next(node for node in saved if node['name'] == loaded[0]['name'])['languages']
+
+
+def test_writer_commit_replaces_and_discard_keeps_previous(store):
+    store.save('snap', nodes('old', 3), full_crawl=True)
+
+    writer = store.writer('snap', full_crawl=True)
+    writer.add(nodes('new', 2))
+    writer.discard()
+    assert store.load('snap')['repo_count'] == 3
+
+    writer = store.writer('snap', full_crawl=True)
+    writer.add(nodes('new', 2))
+    # Readers still see the previous snapshot until commit
+    assert store.load('snap')['repo_count'] == 3
+    writer.commit()
+    assert {node['name'] for node in store.iter_nodes('snap')} == {node['name'] for node in nodes('new', 2)}
+
+
+def test_upsert_merges_and_moves_the_high_water_mark_forward(store):
+    saved = nodes('snap', 5)
+    store.save('snap', saved, full_crawl=True)
+    high_water = store.load('snap')['high_water']
+    changed = dict(saved[0], stargazerCount=999, updatedAt='2999-01-01T00:00:00Z')
+    store.upsert('snap', [changed, dict(saved[1], updatedAt='1999-01-01T00:00:00Z')])
+    snapshot = store.load('snap')
+    assert snapshot['repo_count'] == 5
+    assert snapshot['high_water'] == '2999-01-01T00:00:00Z' > high_water
+    assert next(store.iter_nodes('snap'))['stargazerCount'] == 999
+
+
+def test_empty_account_gets_a_marker_instead_of_a_full_crawl_every_time(store):
+    store.save('empty', [], full_crawl=True)
+    snapshot = store.load('empty')
+    assert snapshot['high_water'] == EMPTY_HIGH_WATER
+    assert plan_refresh(snapshot, max_age=600, full_crawl_interval=3600) == 'fresh'
+    store.upsert('empty', nodes('empty', 1))
+    assert store.load('empty')['high_water'] == nodes('empty', 1)[0]['updatedAt']
+
+
+def test_plan_refresh():
+    now = time.time()
+    snapshot = {'high_water': '2024-01-01T00:00:00Z', 'full_crawl_at': now - 100, 'refreshed_at': now - 10}
+    assert plan_refresh(None, 600, 3600, now=now) == 'full'
+    assert plan_refresh(dict(snapshot, high_water=None), 600, 3600, now=now) == 'full'
+    assert plan_refresh(snapshot, 600, 3600, now=now) == 'fresh'
+    assert plan_refresh(snapshot, 600, 3600, refresh=True, now=now) == 'incremental'
+    assert plan_refresh(snapshot, 5, 3600, now=now) == 'incremental'
+    assert plan_refresh(snapshot, 5, 50, now=now) == 'full'
+
+
+def test_abandoned_staging_rows_are_swept(tmp_path):
+    path = str(tmp_path / 'snapshots.db')
+    store = SnapshotStore(path)
+    writer = store.writer('snap', full_crawl=True)
+    writer.add(nodes('snap', 600))
+    staged = "SELECT COUNT(*) FROM repos WHERE user_key != 'snap'"
+    assert store._conn.execute(staged).fetchone()[0] == 500
+
+    # A live crawl is left alone; one that stopped writing an hour ago is not
+    assert SnapshotStore(path)._conn.execute(staged).fetchone()[0] == 500
+    store._conn.execute('UPDATE staging SET touched_at = touched_at - 7200')
+    store._conn.commit()
+    reopened = SnapshotStore(path)
+    assert reopened._conn.execute(staged).fetchone()[0] == 0
+
+    # The stalled crawl must not commit a partial snapshot
+    writer.commit()
+    assert store.load('snap') is None
+
+
+def test_iter_nodes_reuses_its_connection(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'snapshots.db'))
+    store.save('snap', nodes('snap', 3), full_crawl=True)
+    assert len(list(store.iter_nodes('snap'))) == 3
+    conn = store._local.conn
+    assert len(list(store.iter_nodes('snap'))) == 3
+    assert store._local.conn is conn
+
+
+def test_analysis_uses_full_fresh_and_incremental_plans(monkeypatch, tmp_path, fake_github_server):
+    store = SnapshotStore(str(tmp_path / 'snapshots.db'))
+    monkeypatch.setattr(main, 'snapshot_store', store)
+    username = 'snap-plans-r250'
+    key = cache_key(username)
+    requests = fake_github_server.requests
+
+    result, _, _ = main.run_analysis(username)
+    assert result['repo_count'] == 250
+    assert store.load(key)['repo_count'] == 250
+    assert fake_github_server.requests - requests == 3
+
+    requests = fake_github_server.requests
+    fresh, _, _ = main.run_analysis(username)
+    assert fake_github_server.requests == requests
+    assert fresh['total_lines'] == result['total_lines']
+
+    # Nothing changed since the high-water mark, so the incremental fetch stops after its first page
+    refreshed, _, _ = main.run_analysis(username, refresh=True)
+    assert fake_github_server.requests - requests == 1
+    assert refreshed['total_lines'] == result['total_lines']
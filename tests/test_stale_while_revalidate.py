@@ -0,0 +1,105 @@
+import threading
+import time
+
+import pytest
+
+import cache
+import main
+from cache import ResultCache, SQLiteCache
+from refresher import Refresher
+
+
+class Clock:
+    """Stands in for the time module in cache, moved forward by hand"""
+
+    def __init__(self):
+        self.now = time.time()
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, 'time', clock)
+    return clock
+
+
+@pytest.mark.parametrize('make_cache', [
+    lambda tmp_path: ResultCache(ttl=10, stale_ttl=60),
+    lambda tmp_path: SQLiteCache(str(tmp_path / 'cache.db'), ttl=10, stale_ttl=60),
+])
+def test_expired_entries_are_served_stale_until_the_window_ends(make_cache, clock, tmp_path):
+    results = make_cache(tmp_path)
+    results.set('key', {'total_lines': 1})
+    assert results.get_stale('key') == ({'total_lines': 1}, False)
+
+    clock.now += 30
+    assert results.get('key') is None
+    assert results.get_stale('key') == ({'total_lines': 1}, True)
+    assert results.expires_in('key') == pytest.approx(-20)
+
+    clock.now += 60
+    assert results.get_stale('key') == (None, False)
+    assert results.expires_in('key') is None
+
+
+def test_refresher_runs_one_refresh_per_key():
+    release = threading.Event()
+    calls = []
+
+    def refresh(username, api_token):
+        calls.append(username)
+        release.wait(5)
+        return {'username': username}, None, 200
+
+    refresher = Refresher(refresh, workers=2)
+    try:
+        assert refresher.submit('alice')
+        assert not refresher.submit('Alice')
+        assert refresher.submit('bob')
+        release.set()
+        deadline = time.monotonic() + 5
+        while refresher.pending() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert sorted(calls) == ['alice', 'bob']
+        assert refresher.pending() == 0
+    finally:
+        refresher.shutdown()
+
+
+def test_refresher_leaves_low_headroom_to_interactive_requests():
+    class Pool:
+        def __len__(self):
+            return 1
+
+        def headroom(self):
+            return 100, 5000
+
+    refresher = Refresher(lambda username, api_token: None, Pool())
+    try:
+        assert not refresher.submit('alice')
+        # A caller's own token does not draw on the pool
+        assert refresher.submit('alice', 'caller-token')
+    finally:
+        refresher.shutdown()
+
+
+def test_stale_result_is_served_and_refreshed(clock):
+    client = main.app.test_client()
+    assert client.post('/analyze', json={'username': 'stale-user-r8'}).headers['X-Cache'] == 'MISS'
+
+    clock.now += main.result_cache.ttl + 1
+    stale = client.post('/analyze', json={'username': 'stale-user-r8'})
+    assert stale.status_code == 200
+    assert stale.headers['X-Cache'] == 'STALE'
+    assert stale.get_json()['repo_count'] == 8
+
+    deadline = time.monotonic() + 5
+    while main.refresher.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert client.post('/analyze', json={'username': 'stale-user-r8'}).headers['X-Cache'] == 'HIT'
@@ -0,0 +1,106 @@
+import time
+
+import pytest
+
+import github_client
+import token_pool
+from token_pool import DEFAULT_LIMIT, REJECTED_PARK_SECONDS, TokenPool
+
+
+class Clock:
+    """Stands in for the time module in token_pool"""
+
+    def __init__(self):
+        self.now = time.time()
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(token_pool, 'time', clock)
+    return clock
+
+
+def test_acquire_picks_the_token_with_most_headroom():
+    pool = TokenPool(['a', 'b', 'c', 'a', ''])
+    assert len(pool) == 3
+    pool.update('a', remaining=100)
+    pool.update('b', remaining=4000, limit=5000)
+    pool.update('c', remaining=3999)
+    assert pool.acquire() == 'b'
+    # The estimate is decremented, so the next caller ties and the first seen wins
+    assert pool.acquire() == 'b'
+    assert pool.acquire() == 'c'
+    assert pool.headroom() == (3998, 5000)
+
+
+def test_exhausted_token_is_parked_until_reset(clock):
+    pool = TokenPool(['a', 'b'])
+    pool.update('a', remaining=0, reset_at=clock.now + 30)
+    assert pool.status()['...a']['parked_until'] == clock.now + 30
+    assert [pool.acquire() for _ in range(3)] == ['b'] * 3
+
+    clock.now += 31
+    pool.update('b', remaining=10)
+    assert pool.acquire() == 'a'
+    assert pool.status()['...a']['remaining'] == DEFAULT_LIMIT - 1
+
+
+def test_park_without_reset_uses_the_default(clock):
+    pool = TokenPool(['a'])
+    pool.park('a')
+    assert pool.acquire() is None
+    assert pool.next_reset() == clock.now + token_pool.DEFAULT_PARK_SECONDS
+    assert pool.headroom() == (0, DEFAULT_LIMIT)
+
+
+def test_rejected_token_leaves_rotation(clock):
+    pool = TokenPool(['a', 'b'])
+    pool.reject('a')
+    assert [pool.acquire() for _ in range(3)] == ['b'] * 3
+    assert not pool.all_rejected()
+    pool.reject('b')
+    assert pool.acquire() is None
+    assert pool.all_rejected()
+
+    clock.now += REJECTED_PARK_SECONDS + 1
+    assert not pool.all_rejected()
+    assert pool.acquire() in ('a', 'b')
+
+
+def pages(monkeypatch, tokens):
+    pool = TokenPool(tokens)
+    monkeypatch.setattr(github_client, 'token_pool', pool)
+    return pool, github_client.execute_graphql(
+        github_client.REPOS_QUERY, {'username': 'pool-user-r3', 'cursor': None, 'first': 100, 'languages': 20}
+    )
+
+
+def test_revoked_pooled_token_is_skipped(monkeypatch, fake_github_server):
+    pool, (data, error_msg, status_code) = pages(monkeypatch, ['revoked-1111', 'good-2222'])
+    # Headroom is equal, so the revoked token is tried first
+    assert status_code == 200
+    assert len(data['user']['repositories']['nodes']) == 3
+    assert pool.status()['...1111']['rejected'] is True
+    assert pool.acquire() == 'good-2222'
+
+
+def test_single_revoked_token_reports_authentication_failure(monkeypatch, fake_github_server):
+    pool, (data, _, status_code) = pages(monkeypatch, ['revoked-token'])
+    assert (data, status_code) == (None, 401)
+    data, _, status_code = github_client.execute_graphql(github_client.REPOS_QUERY, {'username': 'x'})
+    assert (data, status_code) == (None, 401)
+
+
+def test_page_that_spends_the_last_point_is_returned(monkeypatch, fake_github_server):
+    # One point left for this token at the fake: the page uses it up
+    fake_github_server._budgets['Bearer last-point'] = (1, time.time() + 3600)
+    pool, (data, _, status_code) = pages(monkeypatch, ['last-point'])
+    assert status_code == 200
+    assert data['rateLimit']['remaining'] == 0
+    assert len(data['user']['repositories']['nodes']) == 3
+    # The pool saw the rateLimit block and parked the only token
+    assert pool.acquire() is None
@@ -0,0 +1,173 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+# Assumed headroom for a token GitHub has not reported on yet
+DEFAULT_LIMIT = 5000
+
+# How long to park a token when GitHub does not say when it resets
+DEFAULT_PARK_SECONDS = 60
+
+# How long to park a token GitHub rejected (401) before trying it again
+REJECTED_PARK_SECONDS = 3600
+
+
+def parse_reset_at(reset_at):
+    """Convert GraphQL's ISO-8601 resetAt (or an epoch value) to epoch seconds"""
+    if reset_at is None or reset_at == '':
+        return None
+    try:
+        return float(reset_at)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(str(reset_at).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def token_label(token):
+    """Short, non-secret label for a token in logs and metrics"""
+    return f"...{token[-4:]}" if token else 'anonymous'
+
+
+class TokenPool:
+    """
+    Rate-limit-aware pool of GitHub API tokens.
+
+    Tracks `remaining` and `resetAt` per token from every response, hands
+    each request to the token with the most headroom, and parks exhausted
+    tokens until their reset time.
+    """
+
+    def __init__(self, tokens):
+        self._lock = threading.Lock()
+        self._state = {}
+        for token in tokens:
+            if token and token not in self._state:
+                self._state[token] = {
+                    'remaining': DEFAULT_LIMIT,
+                    'limit': DEFAULT_LIMIT,
+                    'reset_at': None,
+                    'parked_until': 0.0,
+                    'rejected': False,
+                    'points_used': 0
+                }
+
+    @classmethod
+    def from_env(cls):
+        """Build a pool from GITHUB_TOKENS (comma separated) plus GITHUB_TOKEN"""
+        tokens = [token.strip() for token in os.environ.get('GITHUB_TOKENS', '').split(',')]
+        tokens.append(os.environ.get('GITHUB_TOKEN', ''))
+        return cls([token for token in tokens if token])
+
+    def __len__(self):
+        return len(self._state)
+
+    def acquire(self):
+        """
+        Pick the available token with the most remaining points.
+
+        Returns None if every token is parked. The chosen token's estimate is
+        decremented so concurrent callers spread across tokens.
+        """
+        now = time.time()
+        with self._lock:
+            best = None
+            for token, state in self._state.items():
+                if state['parked_until'] > now:
+                    continue
+                if state['parked_until']:
+                    # Reset time has passed, the token has a fresh budget
+                    state['parked_until'] = 0.0
+                    state['remaining'] = DEFAULT_LIMIT
+                    state['rejected'] = False
+                if best is None or state['remaining'] > self._state[best]['remaining']:
+                    best = token
+            if best is not None:
+                self._state[best]['remaining'] -= 1
+            return best
+
+    def update(self, token, remaining=None, reset_at=None, limit=None, cost=None):
+        """Record the rate limit (and optionally the query cost) GitHub reported for a token"""
+        with self._lock:
+            state = self._state.get(token)
+            if state is None:
+                return
+            if remaining is not None:
+                state['remaining'] = int(remaining)
+            if limit is not None:
+                state['limit'] = int(limit)
+            if cost is not None:
+                state['points_used'] += int(cost)
+            reset = parse_reset_at(reset_at)
+            if reset is not None:
+                state['reset_at'] = reset
+            if state['remaining'] <= 0:
+                state['parked_until'] = state['reset_at'] or time.time() + DEFAULT_PARK_SECONDS
+
+    def park(self, token, until=None):
+        """Take a token out of rotation until `until` (epoch), its known reset, or a short default"""
+        with self._lock:
+            state = self._state.get(token)
+            if state is None:
+                return
+            if until is None:
+                reset_at = state['reset_at']
+                until = reset_at if reset_at and reset_at > time.time() else time.time() + DEFAULT_PARK_SECONDS
+            state['parked_until'] = until
+            state['remaining'] = 0
+
+    def reject(self, token):
+        """Take a token GitHub refused (revoked or expired) out of rotation for REJECTED_PARK_SECONDS"""
+        with self._lock:
+            state = self._state.get(token)
+            if state is None:
+                return
+            state['parked_until'] = time.time() + REJECTED_PARK_SECONDS
+            state['remaining'] = 0
+            state['rejected'] = True
+
+    def all_rejected(self):
+        """Whether every token is out of rotation because GitHub refused it"""
+        now = time.time()
+        with self._lock:
+            return bool(self._state) and all(
+                state['rejected'] and state['parked_until'] > now for state in self._state.values()
+            )
+
+    def headroom(self):
+        """(remaining, limit) of the available token with the most remaining points"""
+        now = time.time()
+        with self._lock:
+            available = [
+                (state['remaining'], state['limit'])
+                for state in self._state.values()
+                if state['parked_until'] <= now
+            ]
+        if not available:
+            return 0, DEFAULT_LIMIT
+        return max(available)
+
+    def next_reset(self):
+        """Earliest time a parked token becomes available again, or None"""
+        now = time.time()
+        with self._lock:
+            parked = [state['parked_until'] for state in self._state.values() if state['parked_until'] > now]
+        return min(parked) if parked else None
+
+    def status(self):
+        """Snapshot of every token's state, keyed by its label"""
+        with self._lock:
+            return {
+                token_label(token): {
+                    'remaining': state['remaining'],
+                    'limit': state['limit'],
+                    'points_used': state['points_used'],
+                    'reset_at': state['reset_at'],
+                    'parked_until': state['parked_until'] or None,
+                    'rejected': state['rejected']
+                }
+                for token, state in self._state.items()
+            }